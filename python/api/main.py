@@ -1,35 +1,256 @@
 #!/usr/bin/env python
 
-from typing import List
+from datetime import datetime, timedelta, timezone
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from urllib.parse import urljoin
+from urllib.request import urlopen
 import functions_framework
 from flask import Request
-from cdp_backend.database import models as db_models
-import fireo
-from google.auth.credentials import AnonymousCredentials
-from google.cloud.firestore import Client
-from flask import jsonify
+from flask import Response
+from werkzeug.exceptions import BadRequest
+
+# The CDP database models, fireo and the Firestore client take most of a second to
+# import, and the listing is usually served from the snapshot without them, so they
+# are only imported by the first request that queries Firestore (see _connect).
+if TYPE_CHECKING:
+    from cdp_backend.database import models as db_models
+    from google.cloud.firestore import Client
+
+# How long the event listing is served from memory before Firestore is read again. This is
+# also the max-age of the response, so clients and CDNs can cache it for as long.
+CACHE_TTL_SECONDS = int(os.environ.get("EVENT_SOURCE_IDS_CACHE_TTL_SECONDS", "300"))
+
+# The Firestore client and the event listing are kept for the lifetime of the function
+# instance, so only the first request (and the first one after the TTL) reads Firestore.
+_client: Optional["Client"] = None
+_client_lock = threading.Lock()
+_lock = threading.Lock()
+# (response body, ETag of the body, monotonic time the listing expires at)
+_cached_listing: Optional[Tuple[str, str, float]] = None
+
+# The manifest of the event source id snapshot published after the event gather pipeline
+# (cdp_montana_legislature_backend/snapshot.py). Any URL urllib can open works, e.g. a
+# file:// URL for testing. Set it to an empty string to always query Firestore.
+SNAPSHOT_MANIFEST_URL = os.environ.get(
+    "EVENT_SOURCE_IDS_SNAPSHOT_URL",
+    "https://storage.googleapis.com/cdp-montana-legislature.appspot.com/"
+    "event-source-ids/v1/manifest.json",
+)
+# A snapshot older than this is stale and Firestore is queried instead. The snapshot is
+# published after every event gather pipeline and special event, and every 30 minutes
+# (publish-event-source-id-snapshot.yml) so events ingested during a long gather run show
+# up, so the listing lags Firestore by at most about half an hour.
+SNAPSHOT_MAX_AGE_SECONDS = int(
+    os.environ.get("EVENT_SOURCE_IDS_SNAPSHOT_MAX_AGE_SECONDS", "3600")
+)
+SNAPSHOT_VERSION = 1
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+# Hearings are often ingested days after they happened, the scraper retries a hearing until
+# its video is timestamped for as long as default_event_gather_from_days_timedelta in
+# event-gather-config.json. A `since` query looks back this many days before the given
+# datetime, so the events ingested late are still returned to clients polling with it.
+SINCE_OVERLAP_DAYS = int(os.environ.get("EVENT_SOURCE_IDS_SINCE_OVERLAP_DAYS", "10"))
 
 
 @functions_framework.http
 def get_event_source_ids(request: Request):
-    fireo.connection(
-        client=Client(
-            project="cdp-montana-legislature",
-            credentials=AnonymousCredentials(),
+    """
+    List the CDP event id and external source id of the events.
+
+    Without query parameters all events are returned as a JSON array of
+    {"event_id", "external_source_id"} objects. The array is read from the snapshot
+    published after the event gather pipeline, Firestore is only queried if the snapshot
+    is missing or stale.
+
+    With any of the query parameters below, only the matching events are read and the
+    response is an object {"events": [...], "next_page_token": ...}, where each event
+    also has its "event_datetime", and "since" is the event_datetime the events start
+    at. Pass next_page_token as page_token to get the next page, it is null on the last
+    page.
+
+    Query Parameters
+    ----------------
+    since: str
+        ISO formatted datetime (UTC if no timezone is given), only return events with an
+        event_datetime at or after it minus EVENT_SOURCE_IDS_SINCE_OVERLAP_DAYS (default
+        10). This is a best-effort overlap window, not a delta cursor: the events don't
+        have an ingestion time to query on, and are often ingested days after their
+        event_datetime, so every poll with the latest event_datetime seen gets the
+        events of the last 10 days again, and an event ingested more than 10 days after
+        its event_datetime is missed. Clients skip the event_ids they already saw, and
+        should fetch the full listing now and then to catch up.
+    page_size: int
+        The maximum number of events in the response.
+        Default: 500, at most 1000
+    page_token: str
+        The next_page_token of the previous page.
+    """
+    if any(arg in request.args for arg in ("since", "page_size", "page_token")):
+        body = _get_event_source_ids_page(
+            since=request.args.get("since"),
+            page_size=request.args.get("page_size"),
+            page_token=request.args.get("page_token"),
         )
+        etag = hashlib.sha1(body.encode("utf-8")).hexdigest()
+    else:
+        body, etag = _get_event_source_ids_listing()
+
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={CACHE_TTL_SECONDS}"
+    # Answers 304 Not Modified without a body if the client sent a matching If-None-Match
+    return response.make_conditional(request)
+
+
+def _get_event_source_ids_listing() -> Tuple[str, str]:
+    global _cached_listing
+
+    with _lock:
+        if _cached_listing is None or time.monotonic() >= _cached_listing[2]:
+            snapshot = _read_snapshot()
+            if snapshot is not None:
+                body, etag = snapshot
+            else:
+                _connect()
+                events_with_source_id = list(
+                    map(
+                        lambda e: {
+                            "event_id": e.id,
+                            "external_source_id": e.external_source_id,
+                        },
+                        _get_all_events(),
+                    )
+                )
+                body = json.dumps(events_with_source_id)
+                etag = hashlib.sha1(body.encode("utf-8")).hexdigest()
+            _cached_listing = (body, etag, time.monotonic() + CACHE_TTL_SECONDS)
+
+        body, etag, _ = _cached_listing
+
+    return body, etag
+
+
+def _read_snapshot() -> Optional[Tuple[str, str]]:
+    """
+    Read the latest event source id snapshot.
+
+    Returns the response body and its ETag, or None if there is no snapshot, it is
+    stale, or it can't be read, in which case Firestore has to be queried.
+    """
+    if not SNAPSHOT_MANIFEST_URL:
+        return None
+
+    try:
+        with urlopen(SNAPSHOT_MANIFEST_URL, timeout=10) as manifest_resource:
+            manifest = json.load(manifest_resource)
+        if manifest.get("version") != SNAPSHOT_VERSION:
+            logging.warning(f"Unknown snapshot version {manifest.get('version')}.")
+            return None
+
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(manifest["created"])
+        if age.total_seconds() > SNAPSHOT_MAX_AGE_SECONDS:
+            logging.warning(f"Snapshot {manifest['name']} is stale ({age} old).")
+            return None
+
+        # The snapshot is next to the manifest
+        snapshot_url = urljoin(SNAPSHOT_MANIFEST_URL, manifest["name"].split("/")[-1])
+        with urlopen(snapshot_url, timeout=30) as snapshot_resource:
+            body = gzip.decompress(snapshot_resource.read())
+    except Exception as e:
+        logging.warning(f"Failed to read the event source id snapshot: {e}")
+        return None
+
+    if hashlib.sha1(body).hexdigest() != manifest["etag"]:
+        logging.warning(f"Snapshot {manifest['name']} doesn't match its manifest.")
+        return None
+
+    return body.decode("utf-8"), manifest["etag"]
+
+
+def _get_event_source_ids_page(
+    since: Optional[str], page_size: Optional[str], page_token: Optional[str]
+) -> str:
+    try:
+        since_datetime = datetime.fromisoformat(since) if since else None
+        page_size = int(page_size) if page_size else DEFAULT_PAGE_SIZE
+    except ValueError as e:
+        raise BadRequest(str(e))
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise BadRequest(f"page_size must be between 1 and {MAX_PAGE_SIZE}.")
+    if since_datetime is not None:
+        if since_datetime.tzinfo is None:
+            since_datetime = since_datetime.replace(tzinfo=timezone.utc)
+        since_datetime -= timedelta(days=SINCE_OVERLAP_DAYS)
+
+    client = _connect()
+    from cdp_backend.database import models as db_models
+
+    collection = client.collection(db_models.Event._meta.collection_name)
+    # Only read the two fields needed instead of loading full Event models
+    query = collection.select(["event_datetime", "external_source_id"]).order_by(
+        "event_datetime"
     )
+    if since_datetime is not None:
+        query = query.where("event_datetime", ">=", since_datetime)
+    if page_token:
+        try:
+            last_event = collection.document(page_token).get()
+        except ValueError:
+            # e.g. "a/b", which isn't a document path of the collection
+            raise BadRequest(f"Invalid page_token: {page_token}")
+        if not last_event.exists:
+            raise BadRequest(f"Invalid page_token: {page_token}")
+        query = query.start_after(last_event)
 
-    events_with_source_id = list(
-        map(
-            lambda e: {"event_id": e.id,
-                       "external_source_id": e.external_source_id},
-            _get_all_events(),
-        )
+    events = [
+        {
+            "event_id": snapshot.id,
+            "external_source_id": snapshot.get("external_source_id"),
+            "event_datetime": snapshot.get("event_datetime").isoformat(),
+        }
+        for snapshot in query.limit(page_size).stream()
+    ]
+    next_page_token = events[-1]["event_id"] if len(events) == page_size else None
+
+    return json.dumps(
+        {
+            "events": events,
+            "since": since_datetime.isoformat() if since_datetime else None,
+            "next_page_token": next_page_token,
+        }
     )
 
-    response = jsonify(events_with_source_id)
-    return response
 
+def _connect() -> "Client":
+    """Create the Firestore client and connect fireo to it, once per instance."""
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            import fireo
+            from google.auth.credentials import AnonymousCredentials
+            from google.cloud.firestore import Client
+
+            client = Client(
+                project="cdp-montana-legislature",
+                credentials=AnonymousCredentials(),
+            )
+            fireo.connection(client=client)
+            _client = client
+
+    return _client
+
+
+def _get_all_events() -> List["db_models.Event"]:
+    from cdp_backend.database import models as db_models
 
-def _get_all_events() -> List[db_models.Event]:
     return list(db_models.Event.collection.fetch())
@@ -0,0 +1,294 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import flask
+from werkzeug.exceptions import BadRequest
+
+from cdp_montana_legislature_backend.snapshot import (
+    LocalSnapshotStorage,
+    write_snapshot,
+)
+import main
+
+EVENT_DATETIMES = {
+    f"event-{day}": datetime(2023, 1, day, 8, tzinfo=timezone.utc)
+    for day in [3, 17, 10, 24, 31]
+}
+
+
+class FakeSnapshot:
+    def __init__(self, id: str, event_datetime: datetime = None):
+        self.id = id
+        self.exists = event_datetime is not None
+        self._data = {
+            "event_datetime": event_datetime,
+            "external_source_id": f"https://sg001-harmony.sliq.net/{id}",
+        }
+
+    def get(self, field: str):
+        return self._data[field]
+
+
+class FakeDocument:
+    def __init__(self, snapshot: FakeSnapshot):
+        self._snapshot = snapshot
+
+    def get(self) -> FakeSnapshot:
+        return self._snapshot
+
+
+class FakeQuery:
+    """Filters, orders and pages the events in memory like a Firestore query."""
+
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+
+    def select(self, fields):
+        return FakeQuery(self.snapshots)
+
+    def order_by(self, field: str):
+        return FakeQuery(sorted(self.snapshots, key=lambda s: (s.get(field), s.id)))
+
+    def where(self, field: str, op: str, value):
+        assert op == ">="
+        return FakeQuery([s for s in self.snapshots if s.get(field) >= value])
+
+    def start_after(self, snapshot: FakeSnapshot):
+        ids = [s.id for s in self.snapshots]
+        return FakeQuery(self.snapshots[ids.index(snapshot.id) + 1 :])
+
+    def limit(self, n: int):
+        return FakeQuery(self.snapshots[:n])
+
+    def stream(self):
+        return iter(self.snapshots)
+
+
+class FakeCollection(FakeQuery):
+    def document(self, id: str) -> FakeDocument:
+        if id.count("/") % 2 == 1:
+            # Like Firestore, the path of a document has an even number of elements
+            raise ValueError("A document must have an even number of path elements")
+        return FakeDocument(FakeSnapshot(id, EVENT_DATETIMES.get(id)))
+
+
+class FakeClient:
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(
+            [FakeSnapshot(id, dt) for id, dt in EVENT_DATETIMES.items()]
+        )
+
+
+class EventSourceIdsPageTestCase(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.app = flask.Flask(__name__)
+        connect = mock.patch.object(main, "_connect", return_value=FakeClient())
+        connect.start()
+        self.addCleanup(connect.stop)
+
+    def get(self, query_string: str) -> flask.Response:
+        with self.app.test_request_context(f"/?{query_string}"):
+            return main.get_event_source_ids(flask.request)
+
+    def get_page(self, query_string: str) -> dict:
+        response = self.get(query_string)
+        self.assertEqual(200, response.status_code)
+        return json.loads(response.get_data())
+
+    def test_pages_are_ordered_by_event_datetime(self):
+        event_ids = []
+        page = self.get_page("page_size=2")
+        while True:
+            self.assertLessEqual(len(page["events"]), 2)
+            event_ids += [e["event_id"] for e in page["events"]]
+            if page["next_page_token"] is None:
+                break
+            page = self.get_page(f"page_size=2&page_token={page['next_page_token']}")
+
+        self.assertEqual(
+            ["event-3", "event-10", "event-17", "event-24", "event-31"], event_ids
+        )
+        self.assertIsNone(page["since"])
+
+    def test_since_looks_back_the_overlap(self):
+        page = self.get_page("since=2023-01-24T08:00:00%2B00:00")
+
+        # Events ingested after a poll with the latest event_datetime seen are returned
+        self.assertEqual(
+            ["event-17", "event-24", "event-31"],
+            [e["event_id"] for e in page["events"]],
+        )
+        self.assertEqual(
+            "2023-01-24T08:00:00+00:00",
+            page["events"][1]["event_datetime"],
+        )
+        self.assertEqual(
+            (
+                datetime(2023, 1, 24, 8, tzinfo=timezone.utc)
+                - timedelta(days=main.SINCE_OVERLAP_DAYS)
+            ).isoformat(),
+            page["since"],
+        )
+
+    def test_since_without_timezone_is_utc(self):
+        with mock.patch.object(main, "SINCE_OVERLAP_DAYS", 0):
+            page = self.get_page("since=2023-01-24T08:00:00")
+
+        self.assertEqual("2023-01-24T08:00:00+00:00", page["since"])
+        self.assertEqual(
+            ["event-24", "event-31"], [e["event_id"] for e in page["events"]]
+        )
+
+    def test_default_page_size(self):
+        page = self.get_page("since=2023-01-01")
+        self.assertEqual(5, len(page["events"]))
+        self.assertIsNone(page["next_page_token"])
+
+    def test_invalid_parameters_are_bad_requests(self):
+        for query_string in [
+            "since=yesterday",
+            "page_size=ten",
+            "page_size=0",
+            f"page_size={main.MAX_PAGE_SIZE + 1}",
+            "page_token=missing-event",
+            "page_token=a/b",
+        ]:
+            with self.subTest(query_string=query_string):
+                with self.assertRaises(BadRequest) as context:
+                    self.get(query_string)
+                self.assertEqual(400, context.exception.code)
+
+
+class FakeEvent:
+    def __init__(self, id: str):
+        self.id = id
+        self.external_source_id = f"https://sg001-harmony.sliq.net/{id}"
+
+
+class EventSourceIdsListingTestCase(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.app = flask.Flask(__name__)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.storage = LocalSnapshotStorage(self.tmp_dir.name)
+        manifest_path = os.path.join(
+            self.tmp_dir.name, "event-source-ids", "v1", "manifest.json"
+        )
+
+        self.now = 1000.0
+        self.connect = mock.Mock()
+        self.get_all_events = mock.Mock(
+            return_value=[FakeEvent("event-1"), FakeEvent("event-2")]
+        )
+        for patch in [
+            mock.patch.object(main, "_cached_listing", None),
+            mock.patch.object(main, "SNAPSHOT_MANIFEST_URL", f"file://{manifest_path}"),
+            mock.patch.object(main, "time", mock.Mock(monotonic=lambda: self.now)),
+            mock.patch.object(main, "_connect", self.connect),
+            mock.patch.object(main, "_get_all_events", self.get_all_events),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def get(self, headers: dict = None) -> flask.Response:
+        with self.app.test_request_context("/", headers=headers):
+            return main.get_event_source_ids(flask.request)
+
+    def write_snapshot(self, event_ids, created: datetime = None) -> dict:
+        return write_snapshot(
+            self.storage,
+            [
+                (event_id, f"https://sg001-harmony.sliq.net/{event_id}")
+                for event_id in event_ids
+            ],
+            created=created,
+        )
+
+    def test_listing_is_served_from_snapshot(self):
+        manifest = self.write_snapshot(["event-1"])
+        response = self.get()
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            [
+                {
+                    "event_id": "event-1",
+                    "external_source_id": "https://sg001-harmony.sliq.net/event-1",
+                }
+            ],
+            json.loads(response.get_data()),
+        )
+        self.assertEqual((manifest["etag"], False), response.get_etag())
+        self.assertEqual(
+            f"public, max-age={main.CACHE_TTL_SECONDS}",
+            response.headers["Cache-Control"],
+        )
+        self.connect.assert_not_called()
+        self.get_all_events.assert_not_called()
+
+    def test_matching_if_none_match_is_not_modified(self):
+        manifest = self.write_snapshot(["event-1"])
+
+        response = self.get({"If-None-Match": f'"{manifest["etag"]}"'})
+        # The body is dropped when a 304 response is sent
+        self.assertEqual(304, response.status_code)
+
+        response = self.get({"If-None-Match": '"outdated"'})
+        self.assertEqual(200, response.status_code)
+
+    def test_listing_is_cached_until_ttl(self):
+        self.write_snapshot(["event-1"])
+        first = self.get().get_data()
+        self.write_snapshot(["event-1", "event-2"])
+
+        self.now += main.CACHE_TTL_SECONDS - 1
+        self.assertEqual(first, self.get().get_data())
+
+        self.now += 1
+        self.assertEqual(2, len(json.loads(self.get().get_data())))
+
+    def test_missing_or_stale_snapshot_falls_back_to_firestore(self):
+        stale = datetime.now(timezone.utc) - timedelta(
+            seconds=main.SNAPSHOT_MAX_AGE_SECONDS + 60
+        )
+        for write in [lambda: None, lambda: self.write_snapshot(["event-1"], stale)]:
+            with self.subTest(write=write):
+                write()
+                main._cached_listing = None
+                response = self.get()
+
+                body = response.get_data()
+                self.assertEqual(
+                    ["event-1", "event-2"],
+                    [e["event_id"] for e in json.loads(body)],
+                )
+                self.assertEqual(
+                    (hashlib.sha1(body).hexdigest(), False), response.get_etag()
+                )
+
+        self.assertEqual(2, self.get_all_events.call_count)
+        # The listing is cached like the snapshot
+        self.get()
+        self.assertEqual(2, self.get_all_events.call_count)
+
+
+class ConnectTestCase(unittest.TestCase):
+    def test_client_is_created_once_per_instance(self):
+        with mock.patch.object(main, "_client", None), mock.patch(
+            "google.cloud.firestore.Client"
+        ) as client_class, mock.patch("fireo.connection") as connection:
+            with ThreadPoolExecutor(4) as executor:
+                clients = list(executor.map(lambda _: main._connect(), range(8)))
+
+        self.assertEqual(1, client_class.call_count)
+        connection.assert_called_once_with(client=client_class.return_value)
+        self.assertTrue(all(c is client_class.return_value for c in clients))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare the bill action row parser with the BeautifulSoup parsing it replaced.
+
+The bill action pages are read from the Betamax cassettes in vcr/cassettes. When the
+cassettes don't contain any (the bill action pages aren't recorded at the moment) a
+synthetic page with the same row layout is used instead.
+
+Usage (from the python/ directory):
+
+    python -m benchmarks.bench_action_rows
+"""
+
+import argparse
+from datetime import datetime
+import glob
+import json
+import os
+import re
+import timeit
+from typing import List
+
+from bs4 import BeautifulSoup
+
+from cdp_montana_legislature_backend.actions import (
+    ActionRow,
+    find_action_rows_with_recordings,
+    parse_action_row,
+)
+
+CASSETTES_DIR = os.path.join(os.path.dirname(__file__), "..", "vcr", "cassettes")
+SLIQ_URL = "https://sg001-harmony.sliq.net/00309/Harmony/en/PowerBrowser/PowerBrowserV2/20230117/-1/47163"
+
+
+def parse_action_row_with_beautifulsoup(bill_row: str) -> ActionRow:
+    """How the scraper used to parse the bill action rows."""
+    bill_cells = BeautifulSoup(bill_row, "html.parser").find_all("td")
+    return ActionRow(
+        action=bill_cells[0].text,
+        date=datetime.strptime(bill_cells[1].text, "%m/%d/%Y").date(),
+        committee=bill_cells[-1].text.strip(),
+        sliq_links=[
+            link["href"]
+            for link in bill_cells[-1].find_all("a", href=re.compile("sliq"))
+        ],
+    )
+
+
+def load_recorded_action_pages() -> List[str]:
+    pages = []
+    for cassette in glob.glob(os.path.join(CASSETTES_DIR, "*.json")):
+        with open(cassette) as open_resource:
+            interactions = json.load(open_resource)["http_interactions"]
+        for interaction in interactions:
+            if "ActionQuery" in interaction["request"]["uri"]:
+                pages.append(interaction["response"]["body"]["string"])
+    return pages
+
+
+def create_synthetic_action_page(n_actions: int = 40, n_hearings: int = 6) -> str:
+    rows = []
+    for i in range(n_actions):
+        if i % (n_actions // n_hearings) == 0:
+            links = (
+                f'<a href="{SLIQ_URL}?agendaId={240000 + i}"><img src="http://laws.leg.mt.gov/images/video.png" BORDER=0></a>'
+                f'&nbsp;<a href="{SLIQ_URL}?agendaId={240000 + i}&amp;audio=1"><img src="http://laws.leg.mt.gov/images/audio.png" BORDER=0></a>'
+            )
+            rows.append(
+                f"<tr><td>(H) Hearing</td><td>01/{(i % 28) + 1:02d}/2023</td><td></td><td></td><td></td><td>(H) Appropriations&nbsp;{links}</td></tr>"
+            )
+        else:
+            rows.append(
+                f"<tr><td>(H) Committee Report--Bill Passed</td><td>01/{(i % 28) + 1:02d}/2023</td><td>Y: 10 N: 2</td><td></td><td></td><td></td></tr>"
+            )
+    return "<html><body><table>\n" + "\n".join(rows) + "\n</table></body></html>"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "-n", "--number", type=int, default=20, help="Times to parse each page."
+    )
+    args = parser.parse_args()
+
+    pages = load_recorded_action_pages()
+    source = "cassettes"
+    if not pages:
+        pages = [create_synthetic_action_page()]
+        source = "synthetic page"
+
+    bill_rows = [
+        row for page in pages for row in find_action_rows_with_recordings(page)
+    ]
+    assert [parse_action_row(row) for row in bill_rows] == [
+        parse_action_row_with_beautifulsoup(row) for row in bill_rows
+    ], "The parsers disagree"
+
+    print(f"{len(bill_rows)} rows with recordings from {len(pages)} {source}(s)")
+    results = {}
+    for name, parse in [
+        ("beautifulsoup", parse_action_row_with_beautifulsoup),
+        ("parse_action_row", parse_action_row),
+    ]:
+        seconds = min(
+            timeit.repeat(
+                lambda: [parse(row) for row in bill_rows], number=args.number, repeat=3
+            )
+        )
+        results[name] = seconds / (args.number * len(bill_rows))
+        print(f"{name:>20}: {results[name] * 1e6:8.1f} µs per row")
+
+    print(
+        f"{'speedup':>20}: {results['beautifulsoup'] / results['parse_action_row']:8.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
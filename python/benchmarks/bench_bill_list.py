@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare the streaming bills table parser with the BeautifulSoup parsing it replaced.
+
+Both parsers read the LAWS all bills page of the synthetic session of
+benchmarks/corpus.py (a full session by default, with the unintroduced bill drafts
+that follow the bills table) and the page recorded in vcr/cassettes. For each page the
+best time of the parse and its peak memory (measured with tracemalloc) are reported.
+
+Usage (from the python/ directory):
+
+    python -m benchmarks.bench_bill_list
+"""
+
+import argparse
+import json
+import os
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List
+
+from bs4 import BeautifulSoup
+
+from cdp_montana_legislature_backend import scraper
+from cdp_montana_legislature_backend.bills import Bill, iter_bills
+
+from benchmarks.corpus import SESSION_BILLS, Corpus
+
+CASSETTE = os.path.join(
+    os.path.dirname(__file__),
+    "..",
+    "vcr",
+    "cassettes",
+    "ScraperTestCase.test_get_laws_all_bills_html.json",
+)
+
+
+def parse_bills_with_beautifulsoup(laws_all_bills_html: str) -> List[Bill]:
+    """How the scraper used to parse the all bills page."""
+    return [
+        scraper.row_to_bill(row)
+        for row in scraper.get_active_bills_rows(
+            BeautifulSoup(laws_all_bills_html, features="html.parser")
+        )
+    ]
+
+
+def parse_bills_streaming(laws_all_bills_html: str) -> List[Bill]:
+    return list(iter_bills(laws_all_bills_html))
+
+
+def load_recorded_page() -> str:
+    with open(CASSETTE) as open_resource:
+        interactions = json.load(open_resource)["http_interactions"]
+    return interactions[0]["response"]["body"]["string"]
+
+
+def measure(parse: Callable[[str], List[Bill]], page: str, number: int) -> dict:
+    seconds = min(timeit.repeat(lambda: parse(page), number=number, repeat=3))
+
+    tracemalloc.start()
+    parse(page)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": seconds / number, "peak_memory_bytes": peak_bytes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--bills",
+        type=int,
+        default=SESSION_BILLS,
+        help=f"Number of bills in the synthetic session. Default: {SESSION_BILLS}",
+    )
+    parser.add_argument(
+        "-n", "--number", type=int, default=3, help="Times to parse each page."
+    )
+    args = parser.parse_args()
+
+    pages: Dict[str, str] = {
+        "synthetic session": Corpus(args.bills).get(scraper.LAWS_2023_ROOT_URL),
+        "recorded page": load_recorded_page(),
+    }
+
+    for source, page in pages.items():
+        bills = parse_bills_streaming(page)
+        assert bills == parse_bills_with_beautifulsoup(page), "The parsers disagree"
+        print(f"{source}: {len(bills)} bills, {len(page) / 2**20:.1f} MiB of HTML")
+
+        results = {}
+        for name, parse in [
+            ("beautifulsoup", parse_bills_with_beautifulsoup),
+            ("iter_bills", parse_bills_streaming),
+        ]:
+            results[name] = measure(parse, page, args.number)
+            print(
+                f"{name:>20}: {results[name]['seconds'] * 1000:9.1f} ms "
+                f"{results[name]['peak_memory_bytes'] / 2**20:9.1f} MiB peak"
+            )
+
+        print(
+            f"{'reduction':>20}: "
+            f"{results['beautifulsoup']['seconds'] / results['iter_bills']['seconds']:9.1f}x "
+            f"{results['beautifulsoup']['peak_memory_bytes'] / results['iter_bills']['peak_memory_bytes']:12.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
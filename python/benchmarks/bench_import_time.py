@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Measure the import time of the Cloud Function and scraper entry points.
+
+Every module is imported in a fresh interpreter with `python -X importtime`, which
+logs the time spent importing each module. The median over the runs of the cumulative
+import time of the entry point is reported, with its heaviest direct imports, and the
+results can be written as JSON to track the cold start cost between commits.
+
+Usage (from the python/ directory):
+
+    python -m benchmarks.bench_import_time --output import-times.json
+"""
+
+import argparse
+from datetime import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+PYTHON_DIR = os.path.join(os.path.dirname(__file__), "..")
+# The name of each entry point: the directory it is imported from and the module
+ENTRY_POINTS = {
+    "api": (os.path.join(PYTHON_DIR, "api"), "main"),
+    "scraper": (PYTHON_DIR, "cdp_montana_legislature_backend.scraper"),
+}
+# e.g. "import time:       487 |      90242 |   requests"
+IMPORT_TIME_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def measure_import(directory: str, module: str) -> Tuple[int, List[Tuple[str, int]]]:
+    """
+    Import the module in a fresh interpreter.
+
+    Returns the cumulative import time of the module in microseconds, and the
+    cumulative import time of each of its direct imports.
+    """
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(directory))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=directory,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total = 0
+    direct_imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match is None:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if name == module and len(indent) == 1:
+            total = int(cumulative)
+        elif len(indent) == 3:
+            # Imported by a top level module, i.e. by the entry point or by site
+            direct_imports.append((name, int(cumulative)))
+    return total, direct_imports
+
+
+def run_benchmarks(repeat: int, top: int) -> dict:
+    results: Dict[str, dict] = {}
+    for name, (directory, module) in ENTRY_POINTS.items():
+        runs = [measure_import(directory, module) for _ in range(repeat)]
+        totals = [total for total, _ in runs]
+        median_run = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+        heaviest = sorted(median_run[1], key=lambda item: -item[1])[:top]
+
+        results[name] = {
+            "module": module,
+            "median_seconds": statistics.median(totals) / 1e6,
+            "min_seconds": min(totals) / 1e6,
+            "heaviest_imports": {
+                imported: seconds / 1e6 for imported, seconds in heaviest
+            },
+        }
+        print(
+            f"{name:>8}: {results[name]['median_seconds'] * 1000:8.1f} ms median "
+            f"{results[name]['min_seconds'] * 1000:8.1f} ms min ({module})"
+        )
+        for imported, seconds in heaviest:
+            print(f"{'':>10}{seconds / 1000:8.1f} ms  {imported}")
+
+    return {
+        "created": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "entry_points": results,
+    }
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--repeat", type=int, default=7, help="Number of imports of each module."
+    )
+    parser.add_argument(
+        "--top", type=int, default=5, help="Number of heaviest imports to list."
+    )
+    parser.add_argument(
+        "-o", "--output", help="Path of the JSON file to write the results to."
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeat, args.top)
+
+    if args.output is not None:
+        with open(args.output, "w") as open_resource:
+            json.dump(results, open_resource, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+A synthetic corpus of LAWS and SLIQ pages for running the scraper offline.
+
+The pages follow the layout of the recorded LAWS bill list in vcr/cassettes and of the
+bill action and SLIQ pages the scraper parses. The corpus is deterministic for a given
+number of bills, so benchmark results can be compared between runs.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+import json
+import random
+from typing import Dict, List, Tuple
+
+import requests
+from requests.adapters import BaseAdapter
+
+from cdp_montana_legislature_backend.scraper import LAWS_2023_ROOT_URL
+
+LAWS_APP_URL = "https://laws.leg.mt.gov/legprd/"
+SLIQ_APP_URL = (
+    "https://sg001-harmony.sliq.net/00309/Harmony/en/PowerBrowser/PowerBrowserV2"
+)
+SESSION_START = date(2023, 1, 3)
+COMMITTEES = [
+    "(H) Appropriations",
+    "(H) Judiciary",
+    "(H) Taxation",
+    "(S) Finance and Claims",
+    "(S) Judiciary",
+    "(S) Taxation",
+]
+# A 2023 regular session has about 1,300 bills
+SESSION_BILLS = 1300
+
+
+def _bill_type_number(i: int) -> Tuple[str, int]:
+    bill_type = "HB" if i % 2 == 0 else "SB"
+    return bill_type, i // 2 + 1
+
+
+def _action_url_path(bill_type: str, bill_number: int) -> str:
+    return (
+        f"LAW0210W$BSIV.ActionQuery?P_BILL_NO1={bill_number}"
+        f"&P_BLTP_BILL_TYP_CD={bill_type}&Z_ACTION=Find&P_SESS=20231"
+    )
+
+
+class Corpus:
+    """
+    The pages of a synthetic legislative session, keyed by URL.
+
+    Parameters
+    ----------
+    n_bills: int
+        The number of bills in the session.
+        Default: 1300
+    hearings_per_bill: int
+        The maximum number of recorded hearings of a bill.
+        Default: 3
+    bills_per_meeting: int
+        The number of bills heard in the same committee meeting (and SLIQ video).
+        Default: 8
+    drafts_per_bill: int
+        The number of unintroduced bill drafts listed after the bills, per bill.
+        Default: 3
+    """
+
+    def __init__(
+        self,
+        n_bills: int = SESSION_BILLS,
+        hearings_per_bill: int = 3,
+        bills_per_meeting: int = 8,
+        drafts_per_bill: int = 3,
+    ):
+        rnd = random.Random(n_bills)
+        self.pages: Dict[str, str] = {}
+
+        bill_rows = []
+        # the agenda items of each meeting: (agenda_id, minutes into the meeting)
+        meetings: Dict[int, List[Tuple[str, int]]] = defaultdict(list)
+        meeting_dates: Dict[int, date] = {}
+        self.n_hearings = 0
+
+        for i in range(n_bills):
+            bill_type, bill_number = _bill_type_number(i)
+            action_url_path = _action_url_path(bill_type, bill_number)
+
+            action_rows = [
+                f"<tr><td>(H) Introduced</td><td>{SESSION_START.strftime('%m/%d/%Y')}</td><td></td><td></td><td></td><td></td></tr>"
+            ]
+            last_action_date = SESSION_START
+            for h in range(rnd.randint(0, hearings_per_bill)):
+                meeting = (i // bills_per_meeting) * hearings_per_bill + h
+                meeting_date = meeting_dates.setdefault(
+                    meeting, SESSION_START + timedelta(days=(meeting * 7) % 110)
+                )
+                last_action_date = max(last_action_date, meeting_date)
+                agenda_id = 200000 + i * hearings_per_bill + h
+                meetings[meeting].append((f"A{agenda_id}", len(meetings[meeting]) * 7))
+                # now and then two agenda items share a timestamp
+                if rnd.random() < 0.05 and len(meetings[meeting]) > 1:
+                    meetings[meeting][-1] = (f"A{agenda_id}", meetings[meeting][-2][1])
+
+                committee = COMMITTEES[meeting % len(COMMITTEES)]
+                video_url = (
+                    f"{SLIQ_APP_URL}/{meeting_date.strftime('%Y%m%d')}/-1/{meeting}"
+                )
+                action_rows.append(
+                    f"<tr><td>(H) Hearing</td><td>{meeting_date.strftime('%m/%d/%Y')}</td><td></td><td></td><td></td>"
+                    f'<td>{committee}&nbsp;<a href="{video_url}?agendaId={agenda_id}"><img src="http://laws.leg.mt.gov/images/video.png" BORDER=0></a></td></tr>'
+                )
+                action_rows.append(
+                    f"<tr><td>(H) Committee Executive Action--Bill Passed</td><td>{meeting_date.strftime('%m/%d/%Y')}</td><td>Y: 12 N: 3</td><td></td><td></td><td>{committee}</td></tr>"
+                )
+                self.n_hearings += 1
+
+            self.pages[f"{LAWS_APP_URL}{action_url_path}"] = (
+                "<html>\n<body>\n<table>\n"
+                + "\n".join(reversed(action_rows))
+                + "\n</table>\n</body>\n</html>"
+            )
+
+            bill_rows.append(
+                "<tr>\n"
+                f'<td><a href="{action_url_path}">{bill_type} {bill_number}</a>&nbsp&nbsp<a href="http://leg.mt.gov/bills/2023/billpdf/{bill_type}{bill_number:04d}.pdf"><img src="http://laws.leg.mt.gov/images/pdf.png" BORDER=0, TITLE="Current Text in .PDF format" /></a></td>\n'
+                f"<td>LC{i:04d}</td>\n"
+                "<td>|Llew  Jones&nbsp;(R) HD 18</td>\n"
+                "<td>|(H) Hearing</td>\n"
+                f"<td>{last_action_date.strftime('%m/%d/%Y')}</td>\n"
+                f"<td>Generally revise laws related to item {i}</td>\n"
+                "</tr>"
+            )
+
+        # The bill drafts that weren't introduced yet are listed in a third table
+        draft_date = SESSION_START.strftime("%m/%d/%Y")
+        draft_rows = [
+            '<tr valign="TOP"><td align="LEFT">'
+            f'<a href="LAW0210w$BSIV.ActionQuery?P_BILL_DFT_NO5=LC{i:04d}&Z_ACTION=Find&P_SESS=20231">LC{i:04d}</a></td>'
+            f'<td align="LEFT">{draft_date}</td><td align="LEFT">Laurie  Bishop (D) HD 60</td>'
+            f'<td align="LEFT">(C) Draft Request Received</td><td align="LEFT">{draft_date}</td>'
+            f'<td align="LEFT">Draft revising laws related to item {i}</td></tr>'
+            for i in range(n_bills, n_bills * (drafts_per_bill + 1))
+        ]
+
+        self.n_bills = n_bills
+        self.pages[LAWS_2023_ROOT_URL] = (
+            "<html>\n<head>\n<title>LAWS Bill Search Results Page</title>\n</head>\n<body>\n"
+            "<table><tr><td>Montana Legislature</td></tr></table>\n"
+            '<table  border="1">\n<tr>\n<th align="LEFT">Bill Type - Number</th>\n<th align="LEFT">LC Number</th>\n'
+            '<th align="LEFT">Primary Sponsor</th>\n<th align="LEFT">Status</th>\n<th align="LEFT">Status Date</th>\n'
+            '<th align="LEFT">Short Title</th>\n</tr>\n'
+            + "\n".join(bill_rows)
+            + '\n</table>\n<table border="1">\n<tr><th align="LEFT">LC Number</th></tr>\n'
+            + "\n".join(draft_rows)
+            + "\n</table>\n</body>\n</html>"
+        )
+
+        for meeting, agenda_items in meetings.items():
+            meeting_start = datetime.combine(
+                meeting_dates[meeting], datetime.min.time()
+            )
+            meeting_start += timedelta(hours=8)
+            agenda_tree = [{"id": "A0", "startTime": None, "text": "Call to order"}] + [
+                {
+                    "id": agenda_id,
+                    "startTime": (
+                        meeting_start + timedelta(minutes=minutes)
+                    ).isoformat()
+                    + ".000",
+                    "text": f"Hearing {agenda_id}",
+                }
+                for agenda_id, minutes in agenda_items
+            ]
+            video_url = f"{SLIQ_APP_URL}/{meeting_dates[meeting].strftime('%Y%m%d')}/-1/{meeting}"
+            media_info = [
+                {
+                    "Url": f"https://sg001-harmony.sliq.net/00309/Harmony/{meeting}.mp4",
+                    "AudioOnly": False,
+                }
+            ]
+            self.pages[video_url] = (
+                "<html>\n<body>\n<script>\n"
+                f"    var downloadMediaUrls = {json.dumps(media_info)};\n"
+                "    var options = {\n"
+                f"        AgendaTree:{json.dumps(agenda_tree)},\n"
+                "        Autoplay: false\n"
+                "    };\n"
+                "</script>\n</body>\n</html>"
+            )
+        self.n_videos = len(meetings)
+
+    def get(self, url: str) -> str:
+        # The SLIQ page doesn't depend on the agendaId
+        return self.pages.get(url) or self.pages[url.split("?agendaId=", 1)[0]]
+
+
+class CorpusAdapter(BaseAdapter):
+    """A transport adapter that answers every GET request from a Corpus."""
+
+    def __init__(self, corpus: Corpus):
+        super().__init__()
+        self.corpus = corpus
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        try:
+            response._content = self.corpus.get(request.url).encode("utf-8")
+            response.status_code = 200
+        except KeyError:
+            response._content = b""
+            response.status_code = 404
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Time the scraper stages offline against a synthetic session-sized corpus.
+
+Every stage is run against the pages of benchmarks/corpus.py, without any network
+access: get_laws_all_bills_html, get_active_bills_rows, row_to_bill, iter_bills (which
+replaces those three in the scraper), parse_action_row and the full get_events pipeline. For each stage the wall-clock time, the throughput and
+the peak memory (measured with tracemalloc in a separate run) are reported, and the
+results are written as JSON so they can be compared between commits.
+
+Usage (from the python/ directory):
+
+    python -m benchmarks.run --output benchmark-results.json
+"""
+
+import argparse
+from datetime import datetime
+import json
+import logging
+import platform
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+from unittest import mock
+
+import requests
+
+from cdp_montana_legislature_backend import scraper
+from cdp_montana_legislature_backend.actions import (
+    find_action_rows_with_recordings,
+    parse_action_row,
+)
+from cdp_montana_legislature_backend.bills import iter_bills
+from cdp_montana_legislature_backend.config import ScraperConfig
+
+from benchmarks.corpus import SESSION_BILLS, Corpus, CorpusAdapter
+
+
+def create_corpus_session(corpus: Corpus) -> requests.Session:
+    s = requests.Session()
+    adapter = CorpusAdapter(corpus)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+def measure(func: Callable[[], int], repeat: int) -> Dict[str, float]:
+    """
+    Run func, which returns the number of items it processed, and measure it.
+
+    The time is the best of `repeat` runs, the peak memory is measured in an extra run
+    because tracemalloc slows everything down.
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        n_items = func()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(seconds)
+    return {
+        "items": n_items,
+        "seconds": best,
+        "items_per_second": n_items / best if best > 0 else float("inf"),
+        "peak_memory_bytes": peak_bytes,
+    }
+
+
+def run_benchmarks(n_bills: int, max_workers: int, repeat: int) -> dict:
+    corpus = Corpus(n_bills)
+    s = create_corpus_session(corpus)
+
+    laws_all_bills_html = scraper.get_laws_all_bills_html(s, scraper.LAWS_2023_ROOT_URL)
+    active_bill_rows = scraper.get_active_bills_rows(laws_all_bills_html)
+    bills = [scraper.row_to_bill(row) for row in active_bill_rows]
+    bill_rows_with_recordings = [
+        bill_row
+        for bill in bills
+        for bill_row in find_action_rows_with_recordings(
+            corpus.get(bill.get_bill_actions_url())
+        )
+    ]
+
+    def get_events() -> int:
+        def create_session(config: ScraperConfig) -> requests.Session:
+            return create_corpus_session(corpus)
+
+        with mock.patch.object(scraper, "create_session", create_session):
+            return len(
+                scraper.get_events(
+                    datetime.min,
+                    datetime.max,
+                    max_workers=max_workers,
+                    http_cache_dir=None,
+                    state_file=None,
+                    shard_index=0,
+                    shard_count=1,
+                )
+            )
+
+    stages = {
+        "get_laws_all_bills_html": lambda: len(
+            scraper.get_laws_all_bills_html(s, scraper.LAWS_2023_ROOT_URL).find_all(
+                "tr"
+            )
+        ),
+        "get_active_bills_rows": lambda: len(
+            scraper.get_active_bills_rows(laws_all_bills_html)
+        ),
+        "row_to_bill": lambda: len(
+            [scraper.row_to_bill(row) for row in active_bill_rows]
+        ),
+        "iter_bills": lambda: len(
+            list(iter_bills(corpus.get(scraper.LAWS_2023_ROOT_URL)))
+        ),
+        "parse_action_row": lambda: len(
+            [parse_action_row(row) for row in bill_rows_with_recordings]
+        ),
+        "get_events": get_events,
+    }
+
+    results = {}
+    for name, func in stages.items():
+        results[name] = measure(func, repeat)
+        print(
+            f"{name:>24}: {results[name]['seconds'] * 1000:9.1f} ms "
+            f"{results[name]['items_per_second']:12.1f} items/s "
+            f"{results[name]['peak_memory_bytes'] / 2**20:9.1f} MiB peak "
+            f"({results[name]['items']} items)"
+        )
+
+    return {
+        "created": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "corpus": {
+            "bills": corpus.n_bills,
+            "hearings": corpus.n_hearings,
+            "videos": corpus.n_videos,
+        },
+        "max_workers": max_workers,
+        "stages": results,
+    }
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the MT Legislature scraper offline."
+    )
+    parser.add_argument(
+        "--bills",
+        type=int,
+        default=SESSION_BILLS,
+        help=f"Number of bills in the synthetic session. Default: {SESSION_BILLS}",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=ScraperConfig.max_workers,
+        help="Passed through to get_events.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Number of timed runs of each stage."
+    )
+    parser.add_argument(
+        "-o", "--output", help="Path of the JSON file to write the results to."
+    )
+    args = parser.parse_args(argv)
+
+    # The scraper logs every bill, which would dominate the timings
+    logging.disable(logging.CRITICAL)
+
+    results = run_benchmarks(args.bills, args.max_workers, args.repeat)
+
+    if args.output is not None:
+        with open(args.output, "w") as open_resource:
+            json.dump(results, open_resource, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from dataclasses import dataclass
+from datetime import date, datetime
+import html
+import re
+from typing import List
+
+# The LAWS bill actions page returns "invalid" HTML that can't be parsed as a whole, but
+# each action is on its own line, so the actions with a recording are found by searching
+# for lines linking to SLIQ.
+SLIQ_ROW_PATTERN = re.compile(".*sliq.*")
+# A tag (group 1: "/" for a closing tag, group 2: the tag name, group 3: the attributes),
+# a comment, or the text in between.
+TOKEN_PATTERN = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)([^>]*)>|<!--.*?-->|([^<]+|<)")
+HREF_PATTERN = re.compile(
+    r"""\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE
+)
+
+
+@dataclass
+class ActionRow:
+    """A row of the LAWS bill actions table."""
+
+    # The text of the first cell, e.g. "(H) Hearing"
+    action: str
+    # The date in the second cell
+    date: date
+    # The text of the last cell, e.g. "(H) Appropriations"
+    committee: str
+    # The links to SLIQ recordings in the last cell, in the order they appear
+    sliq_links: List[str]
+
+
+def find_action_rows_with_recordings(laws_bill_html: str) -> List[str]:
+    """Get the lines of the bill actions page that link to a SLIQ recording."""
+    return SLIQ_ROW_PATTERN.findall(laws_bill_html)
+
+
+def parse_action_row(bill_row: str) -> ActionRow:
+    """
+    Parse a line of the bill actions page into an ActionRow.
+
+    This reads the cells in a single pass over the tags in the line, instead of
+    building a BeautifulSoup tree for every row, and gives the same cell text and links
+    as BeautifulSoup's "html.parser": entities are decoded, and a <td> without a closing
+    tag contains the cells that follow it until the end of the row.
+    """
+    # The text and SLIQ links of each cell
+    cells_text: List[List[str]] = []
+    cells_links: List[List[str]] = []
+    # The indices of the cells that are still open
+    open_cells: List[int] = []
+
+    for match in TOKEN_PATTERN.finditer(bill_row):
+        is_closing, tag_name, attrs, text = match.groups()
+        if text is not None:
+            text = html.unescape(text)
+            for i in open_cells:
+                cells_text[i].append(text)
+            continue
+
+        if tag_name is None:
+            # a comment
+            continue
+
+        tag_name = tag_name.lower()
+        if tag_name == "td":
+            if is_closing:
+                if open_cells:
+                    open_cells.pop()
+            else:
+                open_cells.append(len(cells_text))
+                cells_text.append([])
+                cells_links.append([])
+        elif tag_name in ("tr", "table") and is_closing:
+            open_cells.clear()
+        elif tag_name == "a" and not is_closing:
+            href_match = HREF_PATTERN.search(attrs)
+            if href_match is not None:
+                href = html.unescape(
+                    next(g for g in href_match.groups() if g is not None)
+                )
+                if "sliq" in href:
+                    for i in open_cells:
+                        cells_links[i].append(href)
+
+    if len(cells_text) < 2:
+        raise ValueError(f"Expected at least two cells in the bill action: {bill_row}")
+
+    return ActionRow(
+        action="".join(cells_text[0]),
+        date=datetime.strptime("".join(cells_text[1]), "%m/%d/%Y").date(),
+        committee="".join(cells_text[-1]).strip(),
+        sliq_links=cells_links[-1],
+    )
@@ -0,0 +1,75 @@
+from datetime import date, datetime
+import re
+import unittest
+
+from bs4 import BeautifulSoup
+
+from cdp_montana_legislature_backend.actions import (
+    ActionRow,
+    find_action_rows_with_recordings,
+    parse_action_row,
+)
+
+SLIQ_URL = "https://sg001-harmony.sliq.net/00309/Harmony/en/PowerBrowser/PowerBrowserV2/20230117/-1/47163"
+
+BILL_ROWS = [
+    f'<tr><td>(H) Hearing</td><td>01/17/2023</td><td></td><td>(H) Appropriations <a href="{SLIQ_URL}?agendaId=242339"><img src="video.png"></a></td></tr>',
+    f'<tr><td>(S) Hearing</td><td>02/01/2023</td><td></td><td>(S) Finance &amp; Claims&nbsp;<a href="{SLIQ_URL}?agendaId=1&amp;x=2">Video</a> <a href="https://sg001-harmony.sliq.net/audio">Audio</a></td></tr>',
+    f"<TR><TD>(H) Hearing<TD>01/18/2023</TD><td></td><td>(H) Judiciary <A HREF='{SLIQ_URL}'>Video</A><a href=\"https://leg.mt.gov\">LAWS</a></td></TR>",
+    f"<tr><td>(H) Hearing</td><td>01/19/2023</td><td><!-- sliq --></td><td><a href={SLIQ_URL}?agendaId=3>1 < 2</a></td></tr>",
+    f'<tr><td>(H) Hearing</td><td>01/19/2023</td><td>(H) Taxation <a href="{SLIQ_URL}">',
+]
+
+
+def parse_action_row_with_beautifulsoup(bill_row: str) -> ActionRow:
+    """How the scraper used to parse the bill action rows."""
+    bill_cells = BeautifulSoup(bill_row, "html.parser").find_all("td")
+    return ActionRow(
+        action=bill_cells[0].text,
+        date=datetime.strptime(bill_cells[1].text, "%m/%d/%Y").date(),
+        committee=bill_cells[-1].text.strip(),
+        sliq_links=[
+            link["href"]
+            for link in bill_cells[-1].find_all("a", href=re.compile("sliq"))
+        ],
+    )
+
+
+class ActionsTestCase(unittest.TestCase):
+    def test_find_action_rows_with_recordings(self):
+        laws_bill_html = "\n".join(
+            [
+                "<table>",
+                BILL_ROWS[0],
+                "<tr><td>(H) Introduced</td><td>01/03/2023</td><td></td><td></td></tr>",
+                BILL_ROWS[1],
+                "</table>",
+            ]
+        )
+        self.assertEqual(
+            [BILL_ROWS[0], BILL_ROWS[1]],
+            find_action_rows_with_recordings(laws_bill_html),
+        )
+
+    def test_parse_action_row(self):
+        self.assertEqual(
+            ActionRow(
+                action="(H) Hearing",
+                date=date(2023, 1, 17),
+                committee="(H) Appropriations",
+                sliq_links=[f"{SLIQ_URL}?agendaId=242339"],
+            ),
+            parse_action_row(BILL_ROWS[0]),
+        )
+
+    def test_parse_action_row_matches_beautifulsoup(self):
+        for bill_row in BILL_ROWS:
+            with self.subTest(bill_row=bill_row):
+                self.assertEqual(
+                    parse_action_row_with_beautifulsoup(bill_row),
+                    parse_action_row(bill_row),
+                )
+
+    def test_parse_action_row_without_date_raises_valueerror(self):
+        with self.assertRaises(ValueError):
+            parse_action_row(f'<tr><td><a href="{SLIQ_URL}">Video</a></td></tr>')
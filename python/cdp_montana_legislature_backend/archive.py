@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import gzip
+import json
+import logging
+import os
+import threading
+from typing import Dict, Tuple
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from cdp_montana_legislature_backend.sliq import normalize_sliq_url
+
+# The responses of a run, one JSON object per line, in a single gzip stream so that the
+# parts the pages have in common (the LAWS and SLIQ page templates) are only stored once
+ARCHIVE_FILE_NAME = "pages.jsonl.gz"
+
+
+def get_archive_path(archive_dir: str) -> str:
+    return os.path.join(archive_dir, ARCHIVE_FILE_NAME)
+
+
+class RecordingHTTPAdapter(BaseAdapter):
+    """
+    A transport adapter that saves every response of another adapter to an archive.
+
+    The responses are recorded as the scraper saw them, including the ones served from
+    the HTTP cache. The body of a streamed response (e.g. the range request of the
+    media probe) isn't read, only its status and headers are recorded.
+
+    Parameters
+    ----------
+    adapter: BaseAdapter
+        The adapter that sends the requests.
+    archive_dir: str
+        The directory to write the archive to. Created if it doesn't exist, an archive
+        that is already there is replaced.
+    """
+
+    def __init__(self, adapter: BaseAdapter, archive_dir: str):
+        super().__init__()
+        self.adapter = adapter
+        self.archive_dir = archive_dir
+        self.n_responses = 0
+
+        os.makedirs(archive_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._archive = gzip.open(get_archive_path(archive_dir), "wt", encoding="utf-8")
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        response = self.adapter.send(request, **kwargs)
+        record = {
+            "method": request.method,
+            "url": request.url,
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            # latin-1 maps every byte to one character, so any body round-trips
+            "body": (
+                "" if kwargs.get("stream") else response.content.decode("latin-1")
+            ),
+        }
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            if not self._archive.closed:
+                self._archive.write(line)
+                self.n_responses += 1
+        return response
+
+    def close(self):
+        self.adapter.close()
+        with self._lock:
+            if not self._archive.closed:
+                self._archive.close()
+                logging.info(
+                    f"Recorded {self.n_responses} responses to {self.archive_dir}."
+                )
+
+
+class ReplayHTTPAdapter(BaseAdapter):
+    """
+    A transport adapter that answers the requests from an archive written by
+    RecordingHTTPAdapter, without any network access.
+
+    A request that wasn't recorded fails with a ConnectionError, like a request to a
+    server that is down. When a URL was requested more than once, the last response is
+    replayed. A SLIQ page is requested with the agendaId of whichever of the bills heard
+    in the meeting got to it first, which changes from run to run with concurrent
+    workers, so a SLIQ link that wasn't recorded is also looked up without its
+    agendaId.
+
+    Parameters
+    ----------
+    archive_dir: str
+        The directory the archive was recorded to.
+    """
+
+    def __init__(self, archive_dir: str):
+        super().__init__()
+        self.archive_dir = archive_dir
+        self._records: Dict[Tuple[str, str], dict] = {}
+        self._records_without_agenda_id: Dict[Tuple[str, str], dict] = {}
+        with gzip.open(
+            get_archive_path(archive_dir), "rt", encoding="utf-8"
+        ) as open_resource:
+            for line in open_resource:
+                record = json.loads(line)
+                self._records[(record["method"], record["url"])] = record
+                self._records_without_agenda_id[
+                    (record["method"], normalize_sliq_url(record["url"]))
+                ] = record
+        logging.info(f"Replaying {len(self._records)} responses from {archive_dir}.")
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        record = self._records.get(
+            (request.method, request.url)
+        ) or self._records_without_agenda_id.get(
+            (request.method, normalize_sliq_url(request.url))
+        )
+        if record is None:
+            raise requests.ConnectionError(
+                f"{request.method} {request.url} was not recorded in {self.archive_dir}.",
+                request=request,
+            )
+
+        response = requests.Response()
+        response.status_code = record["status_code"]
+        response.reason = record["reason"]
+        response.headers = CaseInsensitiveDict(record["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response._content = record["body"].encode("latin-1")
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        pass
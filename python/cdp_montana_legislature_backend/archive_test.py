@@ -0,0 +1,124 @@
+import gzip
+import logging
+import os
+import tempfile
+import unittest
+
+import requests
+from requests.adapters import BaseAdapter
+
+from cdp_montana_legislature_backend.archive import (
+    RecordingHTTPAdapter,
+    ReplayHTTPAdapter,
+    get_archive_path,
+)
+
+PAGES = {
+    "https://laws.leg.mt.gov/legprd/page": "<html>LAWS</html>".encode("utf-8"),
+    "https://sg001-harmony.sliq.net/page?agendaId=1": "<html>Sénat</html>".encode(
+        "latin-1"
+    ),
+    "https://sg001-harmony.sliq.net/video.mp4": b"\x00\x01\x02",
+}
+
+
+class PagesAdapter(BaseAdapter):
+    """Answers the requests from PAGES, and counts them."""
+
+    def __init__(self):
+        super().__init__()
+        self.n_requests = 0
+        self.closed = False
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        self.n_requests += 1
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.reason = "OK"
+        response.status_code = 200 if request.url in PAGES else 404
+        response.headers["Content-Type"] = "text/html; charset=ISO-8859-1"
+        response._content = PAGES.get(request.url, b"")
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        self.closed = True
+
+
+def create_session(adapter: BaseAdapter) -> requests.Session:
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+class ArchiveTestCase(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.archive_dir = os.path.join(self.tmp_dir.name, "archive")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def record(self, urls) -> PagesAdapter:
+        pages_adapter = PagesAdapter()
+        with create_session(RecordingHTTPAdapter(pages_adapter, self.archive_dir)) as s:
+            for url in urls:
+                s.get(url)
+        return pages_adapter
+
+    def test_replay_returns_recorded_responses(self):
+        urls = list(PAGES) + ["https://laws.leg.mt.gov/legprd/missing"]
+        pages_adapter = self.record(urls)
+        self.assertTrue(pages_adapter.closed)
+
+        with create_session(ReplayHTTPAdapter(self.archive_dir)) as s:
+            for url in urls:
+                response = s.get(url)
+                self.assertEqual(PAGES.get(url, b""), response.content)
+                self.assertEqual(404 if "missing" in url else 200, response.status_code)
+                self.assertEqual("ISO-8859-1", response.encoding)
+            self.assertEqual("<html>Sénat</html>", s.get(urls[1]).text)
+
+    def test_replay_of_request_that_was_not_recorded_raises_connectionerror(self):
+        self.record(list(PAGES)[:1])
+
+        with create_session(ReplayHTTPAdapter(self.archive_dir)) as s:
+            with self.assertRaises(requests.ConnectionError):
+                s.get(list(PAGES)[1])
+            # The method is part of the recorded request
+            with self.assertRaises(requests.ConnectionError):
+                s.head(list(PAGES)[0])
+
+    def test_body_of_streamed_response_is_not_recorded(self):
+        url = "https://sg001-harmony.sliq.net/video.mp4"
+        with create_session(
+            RecordingHTTPAdapter(PagesAdapter(), self.archive_dir)
+        ) as s:
+            with s.get(url, stream=True):
+                pass
+
+        with create_session(ReplayHTTPAdapter(self.archive_dir)) as s:
+            with s.get(url, stream=True) as response:
+                self.assertEqual(200, response.status_code)
+                self.assertEqual(b"", response.content)
+
+    def test_archive_is_compressed(self):
+        self.record(list(PAGES) * 50)
+
+        with open(get_archive_path(self.archive_dir), "rb") as open_resource:
+            data = open_resource.read()
+        self.assertLess(len(data), len(gzip.decompress(data)) / 10)
+
+    def test_replay_of_sliq_page_ignores_agenda_id(self):
+        self.record(["https://sg001-harmony.sliq.net/page?agendaId=1"])
+
+        with create_session(ReplayHTTPAdapter(self.archive_dir)) as s:
+            response = s.get("https://sg001-harmony.sliq.net/page?agendaId=2")
+            self.assertEqual(200, response.status_code)
+            self.assertEqual(
+                PAGES["https://sg001-harmony.sliq.net/page?agendaId=1"],
+                response.content,
+            )
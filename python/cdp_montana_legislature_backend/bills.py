@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from html.parser import HTMLParser
+import logging
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+STATUS_DATE_PATTERN = re.compile(r"\d{2}/\d{2}/\d{4}")
+# The all bills page is fed to the parser in chunks of this many characters, so parsing
+# stops soon after the bills table ends
+CHUNK_SIZE = 64 * 1024
+# The first table of the LAWS all bills page is in the header, the second one lists
+# the introduced bills (the third one lists the unintroduced bill drafts)
+BILLS_TABLE_INDEX = 1
+
+
+@dataclass(slots=True)
+class Bill:
+    type_number: str
+    short_title: str
+    action_url_path: str
+    # The date of the latest action on the bill, taken from the "Status Date" column
+    last_action_date: Optional[date] = None
+
+    def get_bill_actions_url(self) -> str:
+        return f"https://laws.leg.mt.gov/legprd/{self.action_url_path}"
+
+    def get_session(self) -> Optional[str]:
+        """Get the LAWS session code from the actions url, e.g. "20231"."""
+        return parse_qs(urlparse(self.action_url_path).query).get("P_SESS", [None])[0]
+
+    def get_key(self) -> str:
+        """Identify the bill across sessions, e.g. "20231 HB 2"."""
+        session = self.get_session()
+        return f"{session} {self.type_number}" if session else self.type_number
+
+
+def parse_status_date(status_date: str) -> Optional[date]:
+    """
+    Parse the "Status Date" of a bill, e.g. "01/17/2023", or "01/23/2023; 09:00 AM, Rm
+    350" when the latest action is a scheduled hearing.
+    """
+    status_date_match = STATUS_DATE_PATTERN.match(status_date.strip())
+    if status_date_match is None:
+        return None
+    return datetime.strptime(status_date_match.group(), "%m/%d/%Y").date()
+
+
+class _BillsTableParser(HTMLParser):
+    """
+    Collect the rows of the bills table of the LAWS all bills page as Bills.
+
+    Only the text of the cells and the first link of the rows of the bills table are
+    kept, the rest of the page is skipped without building any tree.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.bills: List[Bill] = []
+        self.done = False
+        self._n_tables = 0
+        # How deep in the bills table the parser is, 0 when outside of it
+        self._table_depth = 0
+        self._n_rows = 0
+        self._in_row = False
+        # The text of each cell of the row and the indices of the cells still open
+        self._cells: List[List[str]] = []
+        self._open_cells: List[int] = []
+        # The href and text of the first link of the row, and whether it is still open
+        self._link: Optional[Tuple[str, List[str]]] = None
+        self._in_link = False
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        if tag == "table":
+            if self._table_depth:
+                self._table_depth += 1
+            elif self._n_tables == BILLS_TABLE_INDEX:
+                self._table_depth = 1
+            self._n_tables += 1
+        elif not self._table_depth:
+            return
+        elif tag == "tr":
+            self._end_row()
+            self._in_row = True
+            self._cells = []
+            self._open_cells = []
+            self._link = None
+        elif not self._in_row:
+            return
+        elif tag == "td":
+            self._open_cells.append(len(self._cells))
+            self._cells.append([])
+        elif tag == "a" and self._link is None:
+            self._link = (dict(attrs).get("href") or "", [])
+            self._in_link = True
+
+    def handle_endtag(self, tag: str):
+        if not self._table_depth:
+            return
+        if tag == "table":
+            self._table_depth -= 1
+            if not self._table_depth:
+                self._end_row()
+                self.done = True
+        elif tag == "tr":
+            self._end_row()
+        elif tag == "td":
+            if self._open_cells:
+                self._open_cells.pop()
+        elif tag == "a":
+            self._in_link = False
+
+    def handle_data(self, data: str):
+        if not self._in_row:
+            return
+        for i in self._open_cells:
+            self._cells[i].append(data)
+        if self._in_link:
+            self._link[1].append(data)
+
+    def close(self):
+        super().close()
+        # The page ended inside the bills table
+        self._end_row()
+
+    def _end_row(self):
+        if not self._in_row:
+            return
+        self._in_row = False
+        self._in_link = False
+        self._n_rows += 1
+        # The table doesn't have a <thead>, its first row contains the column headers
+        if self._n_rows == 1:
+            return
+        if self._link is None:
+            raise ValueError(
+                f"Did not find an <a> in row {self._n_rows} of the bills table!"
+            )
+
+        href, link_text = self._link
+        # the last cell contains a short description of the bill, e.g. "General
+        # Appropriations Act", the one before it the date of the latest action
+        short_title = "".join(self._cells[-1]) if self._cells else ""
+        last_action_date = None
+        if len(self._cells) > 1:
+            last_action_date = parse_status_date("".join(self._cells[-2]))
+
+        bill = Bill("".join(link_text), short_title, href, last_action_date)
+        logging.debug(f"Found bill: {bill}.")
+        self.bills.append(bill)
+
+
+def iter_bills(laws_all_bills_html: Union[str, Iterable[str]]) -> Iterator[Bill]:
+    """
+    Parse the bills table of the LAWS all bills page, yielding the Bills row by row.
+
+    This gives the same Bills as building a BeautifulSoup tree of the page and calling
+    row_to_bill on the rows of its second table, but without the tree: the page is
+    tokenized by the same html.parser, only the cells of the bills table are kept, and
+    parsing stops at the end of the table (the unintroduced bill drafts that follow it
+    are about 80% of the page).
+
+    Parameters
+    ----------
+    laws_all_bills_html: Union[str, Iterable[str]]
+        The page, or its successive chunks, e.g. from Response.iter_content.
+
+    Returns
+    -------
+    bills: Iterator[Bill]
+        The bills, in the order of the table.
+    """
+    chunks = laws_all_bills_html
+    if isinstance(laws_all_bills_html, str):
+        chunks = (
+            laws_all_bills_html[i : i + CHUNK_SIZE]
+            for i in range(0, len(laws_all_bills_html), CHUNK_SIZE)
+        )
+
+    parser = _BillsTableParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from parser.bills
+        parser.bills.clear()
+        if parser.done:
+            return
+
+    parser.close()
+    yield from parser.bills
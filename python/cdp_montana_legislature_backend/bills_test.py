@@ -0,0 +1,103 @@
+from datetime import date
+import json
+import os
+import unittest
+
+from bs4 import BeautifulSoup
+
+from cdp_montana_legislature_backend import scraper
+from cdp_montana_legislature_backend.bills import Bill, iter_bills
+
+CASSETTE = os.path.join(
+    os.path.dirname(__file__),
+    "..",
+    "vcr",
+    "cassettes",
+    "ScraperTestCase.test_get_laws_all_bills_html.json",
+)
+
+ACTION_URL_PATH = "LAW0210W$BSIV.ActionQuery?P_BILL_NO1=2&P_BLTP_BILL_TYP_CD=HB&Z_ACTION=Find&P_SESS=20231"
+
+LAWS_ALL_BILLS_HTML = f"""<body>
+<table><tr><td><a href="#top">Header</a></td></tr></table>
+<table border="1">
+<tr><th>Bill Type - Number</th><th>Status Date</th><th>Short Title</th></tr>
+<tr><td><a href="{ACTION_URL_PATH}">HB 2</a>&nbsp&nbsp<a href="HB0002.pdf">PDF</a></td><td>01/23/2023; 09:00 AM, Rm 350</td><td>General Appropriations &amp; Stuff</td></tr>
+<TR><TD><A HREF="LAW0210W$BSIV.ActionQuery?P_BILL_NO1=3&P_SESS=20231">HB 3</A></TD><TD>pending</TD><TD>Supplemental</TD></TR>
+</table>
+<table><tr><td><a href="LC0001">LC0001</a></td><td>01/17/2023</td><td>A draft</td></tr></table>
+</body>"""
+
+
+def load_recorded_laws_all_bills_html() -> str:
+    with open(CASSETTE) as open_resource:
+        interactions = json.load(open_resource)["http_interactions"]
+    return interactions[0]["response"]["body"]["string"]
+
+
+class BillsTestCase(unittest.TestCase):
+    def test_iter_bills_parses_rows_of_second_table(self):
+        self.assertEqual(
+            [
+                Bill(
+                    "HB 2",
+                    "General Appropriations & Stuff",
+                    ACTION_URL_PATH,
+                    date(2023, 1, 23),
+                ),
+                Bill(
+                    "HB 3",
+                    "Supplemental",
+                    "LAW0210W$BSIV.ActionQuery?P_BILL_NO1=3&P_SESS=20231",
+                    None,
+                ),
+            ],
+            list(iter_bills(LAWS_ALL_BILLS_HTML)),
+        )
+
+    def test_iter_bills_parses_chunks(self):
+        # Split in the middle of tags, attributes and entities
+        chunks = [
+            LAWS_ALL_BILLS_HTML[i : i + 7]
+            for i in range(0, len(LAWS_ALL_BILLS_HTML), 7)
+        ]
+        self.assertEqual(
+            list(iter_bills(LAWS_ALL_BILLS_HTML)), list(iter_bills(iter(chunks)))
+        )
+
+    def test_iter_bills_stops_after_bills_table(self):
+        chunks_read = []
+
+        def chunks():
+            for line in LAWS_ALL_BILLS_HTML.splitlines(keepends=True):
+                chunks_read.append(line)
+                yield line
+
+        bills = list(iter_bills(chunks()))
+        self.assertEqual(2, len(bills))
+        self.assertNotIn("</body>", chunks_read)
+
+    def test_iter_bills_row_without_anchor_raises_valueerror(self):
+        with self.assertRaises(ValueError):
+            list(
+                iter_bills(
+                    "<table></table><table><tr></tr><tr><td>HB 1</td></tr></table>"
+                )
+            )
+
+    def test_iter_bills_matches_beautifulsoup_on_recorded_page(self):
+        laws_all_bills_html = load_recorded_laws_all_bills_html()
+        expected = [
+            scraper.row_to_bill(row)
+            for row in scraper.get_active_bills_rows(
+                BeautifulSoup(laws_all_bills_html, features="html.parser")
+            )
+        ]
+
+        self.assertEqual(476, len(expected))
+        self.assertEqual(expected, list(iter_bills(laws_all_bills_html)))
+
+    def test_bill_has_no_instance_dict(self):
+        bill = Bill("HB 2", "General Appropriations Act", ACTION_URL_PATH)
+        self.assertFalse(hasattr(bill, "__dict__"))
+        self.assertEqual("20231 HB 2", bill.get_key())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import date, datetime
+import logging
+import sqlite3
+import time
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bills (
+    key TEXT PRIMARY KEY,
+    session TEXT,
+    type_number TEXT NOT NULL,
+    short_title TEXT,
+    action_url_path TEXT,
+    last_action_date TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hearings (
+    external_source_id TEXT PRIMARY KEY,
+    bill_key TEXT NOT NULL,
+    session TEXT,
+    type_number TEXT NOT NULL,
+    hearing_date TEXT NOT NULL,
+    session_datetime TEXT NOT NULL,
+    title TEXT NOT NULL,
+    video_uri TEXT NOT NULL,
+    start_time TEXT,
+    end_time TEXT,
+    sliq_video_id TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hearings_bill_key ON hearings (bill_key);
+CREATE INDEX IF NOT EXISTS hearings_hearing_date ON hearings (hearing_date);
+CREATE INDEX IF NOT EXISTS hearings_sliq_video_id ON hearings (sliq_video_id);
+CREATE TABLE IF NOT EXISTS sliq_videos (
+    video_id TEXT PRIMARY KEY,
+    page_url TEXT NOT NULL,
+    media_url TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scrapes (
+    scope TEXT NOT NULL,
+    from_date TEXT NOT NULL,
+    to_date TEXT NOT NULL,
+    scraped_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scrapes_scope ON scrapes (scope, scraped_at);
+"""
+
+
+def get_sliq_video_id(sliq_link: str) -> str:
+    """Get the id of a SLIQ video from its link, e.g. "47163" for .../20230117/-1/47163."""
+    return urlparse(sliq_link).path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def get_scope(session: Optional[str], shard_index: int, shard_count: int) -> str:
+    """Identify the bills a gather run scraped, e.g. "20231 0/4"."""
+    return f"{session} {shard_index}/{shard_count}"
+
+
+class Catalog:
+    """
+    A SQLite catalog of the bills and hearings found by the scraper.
+
+    The hearings are indexed by bill, hearing date and SLIQ video id, and the catalog
+    remembers which date windows were scraped for each scope (session and shard), so a
+    window that was already scraped recently can be answered with a range scan of the
+    hearings instead of requesting every bill again.
+
+    Parameters
+    ----------
+    path: str
+        The path of the SQLite database, created if it doesn't exist.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # The catalog is only used by one thread at a time, but not always the one that
+        # opened it, e.g. when iter_events is consumed from another thread
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "Catalog":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def upsert_bill(
+        self,
+        key: str,
+        session: Optional[str],
+        type_number: str,
+        short_title: str,
+        action_url_path: str,
+        last_action_date: Optional[date],
+        hearings: Iterable[dict],
+    ):
+        """Insert or update a bill and the hearings found for it, in one transaction."""
+        now = time.time()
+        with self._connection:
+            self._connection.execute(
+                "INSERT INTO bills VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET"
+                " short_title = excluded.short_title,"
+                " action_url_path = excluded.action_url_path,"
+                " last_action_date = excluded.last_action_date,"
+                " updated_at = excluded.updated_at",
+                (
+                    key,
+                    session,
+                    type_number,
+                    short_title,
+                    action_url_path,
+                    last_action_date.isoformat() if last_action_date else None,
+                    now,
+                ),
+            )
+            for hearing in hearings:
+                video_id = get_sliq_video_id(hearing["external_source_id"])
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO hearings"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        hearing["external_source_id"],
+                        key,
+                        session,
+                        type_number,
+                        hearing["session_datetime"].date().isoformat(),
+                        hearing["session_datetime"].isoformat(),
+                        hearing["title"],
+                        hearing["video_uri"],
+                        hearing.get("start_time"),
+                        hearing.get("end_time"),
+                        video_id,
+                        now,
+                    ),
+                )
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO sliq_videos VALUES (?, ?, ?, ?)",
+                    (
+                        video_id,
+                        hearing["external_source_id"].split("?", 1)[0],
+                        hearing["video_uri"],
+                        now,
+                    ),
+                )
+
+    def record_scrape(self, scope: str, from_date: date, to_date: date):
+        """Remember that all hearings of the scope between the dates were scraped."""
+        with self._connection:
+            self._connection.execute(
+                "INSERT INTO scrapes VALUES (?, ?, ?, ?)",
+                (scope, from_date.isoformat(), to_date.isoformat(), time.time()),
+            )
+
+    def covers(
+        self, scope: str, from_date: date, to_date: date, max_age: float
+    ) -> bool:
+        """Whether the dates were scraped for the scope in the last max_age seconds."""
+        row = self._connection.execute(
+            "SELECT 1 FROM scrapes WHERE scope = ? AND scraped_at >= ?"
+            " AND from_date <= ? AND to_date >= ? LIMIT 1",
+            (scope, time.time() - max_age, from_date.isoformat(), to_date.isoformat()),
+        ).fetchone()
+        return row is not None
+
+    def get_hearings(
+        self, sessions: List[Optional[str]], from_date: date, to_date: date
+    ) -> List[Tuple[str, str, dict]]:
+        """
+        Get the key and the type and number of the bill and the hearing data of the
+        hearings of the sessions between the dates (inclusive), ordered by their start.
+        """
+        placeholders = ", ".join("?" for _ in sessions)
+        rows = self._connection.execute(
+            "SELECT bill_key, type_number, title, video_uri, external_source_id,"
+            " session_datetime, start_time, end_time FROM hearings"
+            " WHERE hearing_date BETWEEN ? AND ?"
+            f" AND session IN ({placeholders})"
+            " ORDER BY session_datetime, external_source_id",
+            (from_date.isoformat(), to_date.isoformat(), *sessions),
+        ).fetchall()
+
+        hearings = []
+        for (
+            bill_key,
+            type_number,
+            title,
+            video_uri,
+            external_source_id,
+            session_datetime,
+            start_time,
+            end_time,
+        ) in rows:
+            hearing = {
+                "title": title,
+                "video_uri": video_uri,
+                "external_source_id": external_source_id,
+                "session_datetime": datetime.fromisoformat(session_datetime),
+            }
+            if start_time is not None:
+                hearing["start_time"] = start_time
+            if end_time is not None:
+                hearing["end_time"] = end_time
+            hearings.append((bill_key, type_number, hearing))
+
+        logging.info(
+            f"Found {len(hearings)} hearings between {from_date} and {to_date} in the catalog."
+        )
+        return hearings
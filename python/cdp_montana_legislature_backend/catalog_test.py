@@ -0,0 +1,95 @@
+from datetime import date, datetime
+import logging
+import os
+import tempfile
+import unittest
+
+from cdp_montana_legislature_backend.catalog import (
+    Catalog,
+    get_scope,
+    get_sliq_video_id,
+)
+
+SLIQ_VIDEO_URL = "https://sg001-harmony.sliq.net/00309/Harmony/en/PowerBrowser/PowerBrowserV2/20230117/-1/47163"
+
+
+def get_hearing(day: int, agenda_id: int) -> dict:
+    return {
+        "title": "HB 2 - (H) Hearing - (H) Appropriations",
+        "video_uri": "https://sg001-harmony.sliq.net/00309/Harmony/video.mp4",
+        "external_source_id": f"{SLIQ_VIDEO_URL}?agendaId={agenda_id}",
+        "session_datetime": datetime(2023, 1, day, 8, 10),
+        "start_time": "0:10:00",
+        "end_time": "0:30:00",
+    }
+
+
+class CatalogTestCase(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.catalog = Catalog(os.path.join(self.tmp_dir.name, "catalog.sqlite"))
+
+    def tearDown(self):
+        self.catalog.close()
+        self.tmp_dir.cleanup()
+
+    def upsert(self, session: str, hearings):
+        self.catalog.upsert_bill(
+            f"{session} HB 2",
+            session,
+            "HB 2",
+            "General Appropriations Act",
+            "LAW0210W$BSIV.ActionQuery?P_BILL_NO1=2",
+            date(2023, 1, 20),
+            hearings,
+        )
+
+    def test_get_sliq_video_id(self):
+        self.assertEqual("47163", get_sliq_video_id(f"{SLIQ_VIDEO_URL}?agendaId=1"))
+
+    def test_hearings_are_queried_by_window_and_session(self):
+        self.upsert("20231", [get_hearing(17, 1), get_hearing(18, 2)])
+        self.upsert("20211", [get_hearing(17, 3)])
+
+        hearings = self.catalog.get_hearings(
+            ["20231"], date(2023, 1, 17), date(2023, 1, 17)
+        )
+        self.assertEqual([("20231 HB 2", "HB 2", get_hearing(17, 1))], hearings)
+
+        hearings = self.catalog.get_hearings(["20211", "20231"], date.min, date.max)
+        self.assertEqual(3, len(hearings))
+
+    def test_upsert_replaces_hearing(self):
+        self.upsert("20231", [get_hearing(17, 1)])
+        hearing = get_hearing(17, 1)
+        del hearing["end_time"]
+        self.upsert("20231", [hearing])
+
+        self.assertEqual(
+            [("20231 HB 2", "HB 2", hearing)],
+            self.catalog.get_hearings(["20231"], date.min, date.max),
+        )
+
+    def test_covers_only_scraped_windows(self):
+        scope = get_scope("20231", 0, 1)
+        self.assertFalse(
+            self.catalog.covers(scope, date(2023, 1, 1), date(2023, 1, 10), 3600)
+        )
+
+        self.catalog.record_scrape(scope, date(2023, 1, 1), date(2023, 1, 31))
+        self.assertTrue(
+            self.catalog.covers(scope, date(2023, 1, 1), date(2023, 1, 10), 3600)
+        )
+        self.assertFalse(
+            self.catalog.covers(scope, date(2022, 12, 31), date(2023, 1, 10), 3600)
+        )
+        self.assertFalse(
+            self.catalog.covers(
+                get_scope("20231", 1, 4), date(2023, 1, 1), date(2023, 1, 10), 3600
+            )
+        )
+        # too old
+        self.assertFalse(
+            self.catalog.covers(scope, date(2023, 1, 1), date(2023, 1, 10), -1)
+        )
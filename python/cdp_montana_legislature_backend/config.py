@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from dataclasses import dataclass, field, fields
+import json
+import logging
+import os
+from typing import List, Optional
+
+# The event gather pipeline only passes from_dt and to_dt to get_events, so the scraper
+# reads its own options from the "scraper" section of the pipeline config file.
+EVENT_GATHER_CONFIG_PATH_ENV = "CDP_EVENT_GATHER_CONFIG"
+DEFAULT_EVENT_GATHER_CONFIG_PATH = "event-gather-config.json"
+SCRAPER_CONFIG_KEY = "scraper"
+# Each option can also be set with an environment variable, e.g. CDP_SCRAPER_SHARD_INDEX,
+# which is how the event gather workflows pick their shard.
+SCRAPER_ENV_PREFIX = "CDP_SCRAPER_"
+# The LAWS session code: the year and 1 for the regular session, or 2, 3, ... for the
+# special sessions of that year
+DEFAULT_SESSION = "20231"
+
+
+@dataclass
+class ScraperConfig:
+    """
+    Options for the MT Legislature scraper.
+
+    Parameters
+    ----------
+    sessions: List[str]
+        The LAWS codes of the sessions to scrape, e.g. ["20211", "20231"]. The bills of
+        all sessions are scraped concurrently by the same workers. A single code is
+        also accepted, e.g. CDP_SCRAPER_SESSIONS=20211.
+        Default: ["20231"] (the 2023 regular session)
+    max_workers: int
+        The number of LAWS bill action pages (and their SLIQ pages) to scrape
+        concurrently. Set to 1 to scrape the bills one at a time.
+        Default: 8
+    http_cache_dir: Optional[str]
+        Directory to keep the LAWS and SLIQ responses in between runs. Responses are
+        revalidated with their ETag / Last-Modified headers when the server sends them.
+        Default: None (don't cache responses on disk)
+    http_cache_ttl: float
+        Number of seconds a cached response without an ETag or Last-Modified header
+        is used without asking the server again.
+        Default: 3600
+    http_cache_max_bytes: int
+        The size limit of the on-disk response cache. The least recently used responses
+        are removed first.
+        Default: 536870912 (512 MiB)
+    state_file: Optional[str]
+        Path to a JSON file to keep the gather state in between runs. Bills whose
+        recordings haven't changed since the previous run are skipped, and recordings
+        that were already turned into events are not ingested again.
+        Default: None (process every bill on every run)
+    prune_by_last_action: bool
+        Don't request the actions page of bills whose latest action (the "Status Date"
+        in the LAWS bill list) is before the start of the gather window.
+        Default: True
+    shard_index: int
+        The shard of the bills to scrape, from 0 to shard_count - 1. Each bill belongs
+        to exactly one shard, based on a stable hash of its type and number, so
+        several pipelines can split the bills between them without scraping (and
+        transcribing) the same hearing twice.
+        Default: 0
+    shard_count: int
+        The number of shards the bills are split into.
+        Default: 1 (scrape all bills)
+    http_timeout: float
+        Seconds to wait for a LAWS or SLIQ server to accept a connection or send data.
+        Default: 60
+    http_retries: int
+        The number of times a request that timed out, failed to connect or got a 5xx or
+        429 response is retried, with an exponential backoff.
+        Default: 4
+    http_backoff: float
+        Seconds to wait before the first retry of a request, doubled for every
+        following retry.
+        Default: 1
+    http_max_concurrency_per_host: int
+        The maximum number of requests to the same host in flight at once.
+        Default: 8
+    http_max_requests_per_second_per_host: Optional[float]
+        The maximum rate of requests to the same host. The rate is also lowered while a
+        host answers 429 or 503.
+        Default: None (only limited when a host pushes back)
+    ingested_source_ids: Optional[str]
+        URL or local path of a JSON list of the external source ids of the events
+        already in the database, e.g. the get_event_source_ids API or the manifest.json
+        of the event source id snapshot. Hearings that were already ingested are dropped before their SLIQ
+        page is requested, so they aren't transcribed again.
+        Default: None (don't check for ingested events)
+    probe_media: bool
+        Send a HEAD (or single byte range) request to the media of every hearing before
+        turning it into an event, to check its status, size and type. The results are
+        cached by URL for the run.
+        Default: False (trust the media URLs of the SLIQ pages)
+    drop_unreachable_media: bool
+        With probe_media, drop the hearings whose media is unreachable (an error
+        status, an empty body, or a web page) so the event gather pipeline doesn't
+        start transcribing them. They are tried again on the next run. When False,
+        unreachable media is only logged and counted in the metrics.
+        Default: True
+    catalog_file: Optional[str]
+        Path to a SQLite catalog of the bills and hearings found by the scraper,
+        indexed by bill, hearing date and SLIQ video id. A date window that a previous
+        run scraped completely in the last catalog_max_age seconds is answered from the
+        catalog instead of requesting the bills again. A window isn't recorded while
+        any of its recordings are still waiting for an agendaId. The catalog is a local
+        file: it is only reused by runs on the same machine (e.g. repeated CLI runs),
+        the event gather workflows run on a fresh runner every time.
+        Default: None (don't keep a catalog)
+    catalog_max_age: float
+        Number of seconds a scraped window in the catalog is used for. Recordings get
+        their agendaId (and so become events) some time after the hearing, so the
+        catalog shouldn't be trusted for long.
+        Default: 3600
+    record_dir: Optional[str]
+        Directory to record every LAWS and SLIQ response of the run to, as a gzip
+        compressed archive that replay_dir can re-run the scraper from.
+        Default: None (don't record the responses)
+    replay_dir: Optional[str]
+        Directory of an archive written with record_dir to answer all requests from,
+        without any network access. Requests that weren't recorded fail like requests
+        to a server that is down.
+        Default: None (request the LAWS and SLIQ servers)
+    metrics_file: Optional[str]
+        Path to a JSON Lines file the metrics of the run (time spent in each stage,
+        pages, bytes, hearings and dropped events, and per-host HTTP metrics) are
+        appended to, one line per run. The metrics are always logged as a table at the
+        end of the run.
+        Default: None (only log the metrics)
+    profile_file: Optional[str]
+        Path to write a cProfile profile of the run to, for `python -m pstats` or
+        snakeviz. Profiling runs the scraper with max_workers=1, as cProfile only sees
+        one thread.
+        Default: None (don't profile)
+    """
+
+    sessions: List[str] = field(default_factory=lambda: [DEFAULT_SESSION])
+    max_workers: int = 8
+    http_cache_dir: Optional[str] = None
+    http_cache_ttl: float = 3600
+    http_cache_max_bytes: int = 512 * 1024 * 1024
+    state_file: Optional[str] = None
+    prune_by_last_action: bool = True
+    shard_index: int = 0
+    shard_count: int = 1
+    http_timeout: float = 60
+    http_retries: int = 4
+    http_backoff: float = 1
+    http_max_concurrency_per_host: int = 8
+    http_max_requests_per_second_per_host: Optional[float] = None
+    ingested_source_ids: Optional[str] = None
+    probe_media: bool = False
+    drop_unreachable_media: bool = True
+    catalog_file: Optional[str] = None
+    catalog_max_age: float = 3600
+    record_dir: Optional[str] = None
+    replay_dir: Optional[str] = None
+    metrics_file: Optional[str] = None
+    profile_file: Optional[str] = None
+
+
+def load_scraper_config(
+    config_file: Optional[str] = None, **overrides
+) -> ScraperConfig:
+    """
+    Load the scraper options from the event gather config file, the CDP_SCRAPER_*
+    environment variables and the overrides, in that order of precedence.
+
+    Parameters
+    ----------
+    config_file: Optional[str]
+        Path to the event gather config JSON file. If not set the path is read from the
+        CDP_EVENT_GATHER_CONFIG environment variable, falling back to
+        event-gather-config.json in the current working directory.
+    **overrides
+        Values that take precedence over the ones in the config file. Unknown options
+        are ignored.
+
+    Returns
+    -------
+    config: ScraperConfig
+        The resolved scraper options.
+    """
+    if config_file is None:
+        config_file = os.environ.get(
+            EVENT_GATHER_CONFIG_PATH_ENV, DEFAULT_EVENT_GATHER_CONFIG_PATH
+        )
+
+    options = {}
+    if os.path.isfile(config_file):
+        with open(config_file) as open_resource:
+            options.update(json.load(open_resource).get(SCRAPER_CONFIG_KEY) or {})
+    else:
+        logging.debug(
+            f"No config file at {config_file}, using default scraper options."
+        )
+
+    known_options = {f.name for f in fields(ScraperConfig)}
+    for name in known_options:
+        env_value = os.environ.get(f"{SCRAPER_ENV_PREFIX}{name.upper()}")
+        if env_value is not None:
+            # Environment variables are JSON encoded like the config file, anything
+            # that isn't valid JSON is used as a plain string (e.g. a path).
+            try:
+                options[name] = json.loads(env_value)
+            except ValueError:
+                options[name] = env_value
+
+    options.update(overrides)
+
+    for name in set(options) - known_options:
+        logging.warning(f"Ignoring unknown scraper option: {name}.")
+
+    config = ScraperConfig(
+        **{name: value for name, value in options.items() if name in known_options}
+    )
+    if isinstance(config.sessions, (str, int)):
+        config.sessions = [config.sessions]
+    config.sessions = [str(session) for session in config.sessions]
+    if not config.sessions:
+        raise ValueError("At least one session must be scraped.")
+    if config.record_dir is not None and config.replay_dir is not None:
+        raise ValueError("Only one of record_dir and replay_dir can be set.")
+    if not 0 <= config.shard_index < config.shard_count:
+        raise ValueError(
+            f"shard_index must be between 0 and shard_count - 1 ({config.shard_count - 1}), got {config.shard_index}."
+        )
+
+    return config
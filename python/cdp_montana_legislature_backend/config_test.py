@@ -0,0 +1,77 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from cdp_montana_legislature_backend.config import ScraperConfig, load_scraper_config
+
+
+class ConfigTestCase(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config_file = os.path.join(self.tmp_dir.name, "event-gather-config.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_config(self, config: dict):
+        with open(self.config_file, "w") as open_resource:
+            json.dump(config, open_resource)
+
+    def test_missing_config_file_returns_defaults(self):
+        config = load_scraper_config(self.config_file)
+        self.assertEqual(ScraperConfig(), config)
+
+    def test_config_file_without_scraper_section_returns_defaults(self):
+        self.write_config({"gcs_bucket_name": None})
+        config = load_scraper_config(self.config_file)
+        self.assertEqual(ScraperConfig(), config)
+
+    def test_scraper_section_is_read_from_config_file(self):
+        self.write_config({"scraper": {"max_workers": 3}})
+        config = load_scraper_config(self.config_file)
+        self.assertEqual(3, config.max_workers)
+
+    def test_overrides_take_precedence_over_config_file(self):
+        self.write_config({"scraper": {"max_workers": 3}})
+        config = load_scraper_config(self.config_file, max_workers=1)
+        self.assertEqual(1, config.max_workers)
+
+    def test_unknown_options_are_ignored(self):
+        self.write_config({"scraper": {"not_an_option": True}})
+        config = load_scraper_config(self.config_file, also_not_an_option=1)
+        self.assertEqual(ScraperConfig(), config)
+
+    def test_environment_variables_take_precedence_over_config_file(self):
+        self.write_config({"scraper": {"shard_index": 0, "http_cache_dir": None}})
+        with mock.patch.dict(
+            os.environ,
+            {
+                "CDP_SCRAPER_SHARD_INDEX": "2",
+                "CDP_SCRAPER_SHARD_COUNT": "4",
+                "CDP_SCRAPER_HTTP_CACHE_DIR": "/tmp/http-cache",
+            },
+        ):
+            config = load_scraper_config(self.config_file)
+            self.assertEqual(2, config.shard_index)
+            self.assertEqual(4, config.shard_count)
+            self.assertEqual("/tmp/http-cache", config.http_cache_dir)
+
+            config = load_scraper_config(self.config_file, shard_index=1)
+            self.assertEqual(1, config.shard_index)
+
+    def test_shard_index_out_of_range_raises_valueerror(self):
+        with self.assertRaises(ValueError):
+            load_scraper_config(self.config_file, shard_index=4, shard_count=4)
+
+    def test_single_session_is_accepted(self):
+        with mock.patch.dict(os.environ, {"CDP_SCRAPER_SESSIONS": "20211"}):
+            config = load_scraper_config(self.config_file)
+        self.assertEqual(["20211"], config.sessions)
+
+    def test_no_session_raises(self):
+        with self.assertRaises(ValueError):
+            load_scraper_config(self.config_file, sessions=[])
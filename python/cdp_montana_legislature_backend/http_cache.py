@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from cdp_montana_legislature_backend.http_client import ThrottledHTTPAdapter
+
+
+class CachingHTTPAdapter(ThrottledHTTPAdapter):
+    """
+    A transport adapter that keeps the responses to GET requests in a directory on disk.
+
+    If the server sent an ETag or Last-Modified header with the response, a cached
+    response is revalidated with a conditional request and served from disk when the
+    server answers 304 Not Modified. Responses without validators are served from disk
+    as long as they are younger than `ttl` seconds. When the cache grows larger than
+    `max_bytes` the least recently used responses are removed. The requests that do go
+    to the server get the timeouts, retries and limits of ThrottledHTTPAdapter.
+
+    Parameters
+    ----------
+    cache_dir: str
+        The directory to store the responses in. Created if it doesn't exist.
+    ttl: float
+        Number of seconds a response without an ETag or Last-Modified header is
+        considered fresh.
+    max_bytes: int
+        The maximum size of the cached response bodies.
+    **kwargs
+        Passed through to ThrottledHTTPAdapter.
+    """
+
+    def __init__(self, cache_dir: str, ttl: float, max_bytes: int, **kwargs):
+        super().__init__(**kwargs)
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # Size of each cached body, keyed by cache key
+        self._sizes: Dict[str, int] = {}
+        for name in os.listdir(cache_dir):
+            if name.endswith(".body"):
+                key = name[: -len(".body")]
+                self._sizes[key] = os.path.getsize(self._body_path(key))
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.body")
+
+    def _load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._meta_path(key)) as open_resource:
+                meta = json.load(open_resource)
+            with open(self._body_path(key), "rb") as open_resource:
+                meta["content"] = open_resource.read()
+        except (OSError, ValueError):
+            return None
+
+        return meta
+
+    def _store(self, key: str, response: requests.Response):
+        meta = {
+            "url": response.url,
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "stored_at": time.time(),
+        }
+        for path, data, mode in [
+            (self._body_path(key), response.content, "wb"),
+            (self._meta_path(key), json.dumps(meta), "w"),
+        ]:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, mode) as open_resource:
+                open_resource.write(data)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._sizes[key] = len(response.content)
+        self._evict()
+
+    def _touch(self, key: str):
+        # The modification time of the meta file is used to find the least recently
+        # used responses.
+        try:
+            os.utime(self._meta_path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        with self._lock:
+            total = sum(self._sizes.values())
+            if total <= self.max_bytes:
+                return
+
+            def last_used(key: str) -> float:
+                try:
+                    return os.path.getmtime(self._meta_path(key))
+                except OSError:
+                    return 0
+
+            for key in sorted(self._sizes, key=last_used):
+                if total <= self.max_bytes:
+                    break
+                total -= self._sizes.pop(key)
+                for path in [self._meta_path(key), self._body_path(key)]:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def _build_cached_response(
+        self, request: requests.PreparedRequest, meta: dict
+    ) -> requests.Response:
+        response = requests.Response()
+        response.status_code = meta["status_code"]
+        response.reason = meta["reason"]
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = meta["url"]
+        response.request = request
+        response.connection = self
+        response._content = meta["content"]
+        return response
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        key = hashlib.sha256(request.url.encode("utf-8")).hexdigest()
+        cached = self._load(key)
+
+        if cached is not None:
+            headers = CaseInsensitiveDict(cached["headers"])
+            etag = headers.get("ETag")
+            last_modified = headers.get("Last-Modified")
+            if etag is None and last_modified is None:
+                if time.time() - cached["stored_at"] < self.ttl:
+                    with self._lock:
+                        self.hits += 1
+                    self._touch(key)
+                    return self._build_cached_response(request, cached)
+            else:
+                if etag is not None:
+                    request.headers["If-None-Match"] = etag
+                if last_modified is not None:
+                    request.headers["If-Modified-Since"] = last_modified
+
+        response = super().send(request, **kwargs)
+
+        if cached is not None and response.status_code == 304:
+            with self._lock:
+                self.revalidated += 1
+            response.close()
+            self._touch(key)
+            return self._build_cached_response(request, cached)
+
+        with self._lock:
+            self.misses += 1
+        if response.status_code == 200 and not kwargs.get("stream"):
+            self._store(key, response)
+
+        return response
+
+    def log_stats(self):
+        logging.info(
+            f"HTTP cache: {self.hits} hits, {self.revalidated} revalidated, "
+            f"{self.misses} misses."
+        )
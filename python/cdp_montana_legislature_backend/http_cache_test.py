@@ -0,0 +1,99 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import tempfile
+import threading
+import unittest
+
+import requests
+
+from cdp_montana_legislature_backend.http_cache import CachingHTTPAdapter
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path.startswith("/etag"):
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = b"with etag"
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+        else:
+            body = f"no validators {self.path}".encode("utf-8")
+            self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CachingHTTPAdapterTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        Handler.requests_seen.clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def create_session(self, ttl=3600, max_bytes=1024 * 1024) -> requests.Session:
+        adapter = CachingHTTPAdapter(self.tmp_dir.name, ttl=ttl, max_bytes=max_bytes)
+        s = requests.Session()
+        s.mount("http://", adapter)
+        return s
+
+    def test_response_with_etag_is_revalidated(self):
+        self.create_session().get(f"{self.base_url}/etag")
+        s = self.create_session()
+        response = s.get(f"{self.base_url}/etag")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("with etag", response.text)
+        self.assertEqual(
+            [("/etag", None), ("/etag", '"v1"')],
+            Handler.requests_seen,
+        )
+        self.assertEqual(1, s.get_adapter(self.base_url).revalidated)
+
+    def test_response_without_validators_is_fresh_until_ttl(self):
+        self.create_session().get(f"{self.base_url}/plain")
+        s = self.create_session()
+        response = s.get(f"{self.base_url}/plain")
+
+        self.assertEqual("no validators /plain", response.text)
+        self.assertEqual(1, len(Handler.requests_seen))
+        self.assertEqual(1, s.get_adapter(self.base_url).hits)
+
+    def test_response_without_validators_is_refetched_after_ttl(self):
+        self.create_session().get(f"{self.base_url}/plain")
+        self.create_session(ttl=0).get(f"{self.base_url}/plain")
+        self.assertEqual(2, len(Handler.requests_seen))
+
+    def test_least_recently_used_responses_are_evicted(self):
+        # each body is 20 bytes, so only two fit
+        s = self.create_session(max_bytes=40)
+        for path in ["/a", "/b", "/c", "/a"]:
+            s.get(f"{self.base_url}{path}")
+
+        self.assertEqual(
+            ["/a", "/b", "/c", "/a"],
+            [path for path, _ in Handler.requests_seen],
+        )
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager
+import logging
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+
+# 429 Too Many Requests and 503 Service Unavailable also slow down the requests to the host
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+THROTTLE_STATUS_CODES = {429, 503}
+# Only requests that can safely be sent twice are retried
+RETRY_METHODS = {"GET", "HEAD"}
+# When a host pushes back, requests to it are spaced by at least this many seconds, up
+# to the maximum
+THROTTLE_MIN_INTERVAL = 0.1
+THROTTLE_MAX_INTERVAL = 10.0
+
+
+class HostLimiter:
+    """
+    Limit the number of concurrent requests to a host and the rate they are sent at.
+
+    The rate adapts to the host: every throttle() (the host answered 429 or 503)
+    doubles the time between requests, and every relax() (a successful response) brings
+    it back down towards the configured rate.
+
+    Parameters
+    ----------
+    max_concurrency: int
+        The maximum number of requests to the host in flight at once.
+    max_requests_per_second: Optional[float]
+        The maximum rate of requests to the host.
+        Default: None (only limited when the host pushes back)
+    """
+
+    def __init__(
+        self, max_concurrency: int, max_requests_per_second: Optional[float] = None
+    ):
+        self._semaphore = threading.BoundedSemaphore(max(max_concurrency, 1))
+        self._lock = threading.Lock()
+        self._base_interval = (
+            1 / max_requests_per_second if max_requests_per_second else 0.0
+        )
+        self.interval = self._base_interval
+        self._next_request_time = 0.0
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Wait until a request to the host may be sent, and hold a slot while it is."""
+        with self._semaphore:
+            with self._lock:
+                now = time.monotonic()
+                request_time = max(now, self._next_request_time)
+                self._next_request_time = request_time + self.interval
+            if request_time > now:
+                time.sleep(request_time - now)
+            yield
+
+    def throttle(self):
+        with self._lock:
+            self.interval = min(
+                max(self.interval * 2, THROTTLE_MIN_INTERVAL), THROTTLE_MAX_INTERVAL
+            )
+
+    def relax(self):
+        with self._lock:
+            if self.interval > self._base_interval:
+                self.interval = max(self.interval * 0.9, self._base_interval)
+                if self.interval < THROTTLE_MIN_INTERVAL:
+                    self.interval = self._base_interval
+
+
+class HTTPMetrics:
+    """Thread-safe counters of the requests sent to each host."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, dict] = {}
+
+    def _host(self, host: str) -> dict:
+        return self._hosts.setdefault(
+            host,
+            {"requests": 0, "retries": 0, "errors": 0, "bytes": 0, "latencies": []},
+        )
+
+    def record_response(self, host: str, seconds: float, n_bytes: int):
+        with self._lock:
+            stats = self._host(host)
+            stats["requests"] += 1
+            stats["bytes"] += n_bytes
+            stats["latencies"].append(seconds)
+
+    def record_retry(self, host: str):
+        with self._lock:
+            self._host(host)["retries"] += 1
+
+    def record_error(self, host: str):
+        with self._lock:
+            self._host(host)["errors"] += 1
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        The metrics of each host: number of requests, retries, errors (requests that
+        failed without a response) and bytes received, and the mean, median, 95th
+        percentile and max latency in seconds.
+        """
+        with self._lock:
+            summary = {}
+            for host, stats in self._hosts.items():
+                latencies: List[float] = sorted(stats["latencies"])
+                summary[host] = {
+                    "requests": stats["requests"],
+                    "retries": stats["retries"],
+                    "errors": stats["errors"],
+                    "bytes": stats["bytes"],
+                    "latency_mean": (
+                        sum(latencies) / len(latencies) if latencies else 0.0
+                    ),
+                    "latency_p50": (
+                        latencies[len(latencies) // 2] if latencies else 0.0
+                    ),
+                    "latency_p95": (
+                        latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+                    ),
+                    "latency_max": latencies[-1] if latencies else 0.0,
+                }
+            return summary
+
+    def log_stats(self):
+        for host, stats in self.summary().items():
+            logging.info(
+                f"HTTP {host}: {stats['requests']} requests, {stats['retries']} retries, "
+                f"{stats['errors']} errors, {stats['bytes'] / 2**20:.1f} MiB, "
+                f"latency mean {stats['latency_mean']:.3f}s "
+                f"p95 {stats['latency_p95']:.3f}s max {stats['latency_max']:.3f}s."
+            )
+
+
+class ThrottledHTTPAdapter(HTTPAdapter):
+    """
+    A transport adapter with timeouts, retries and per-host limits.
+
+    Every request gets a timeout if the caller didn't set one. GET and HEAD requests
+    that time out, fail to connect or get a 5xx or 429 response are retried with an
+    exponential backoff (or after the Retry-After of the response). The requests to each
+    host are limited by a HostLimiter, and the latency, retries and bytes of each host
+    are recorded in `metrics`. urllib3 already keeps a connection pool per host, of
+    `pool_maxsize` connections.
+
+    Parameters
+    ----------
+    timeout: float
+        Seconds to wait for the server to accept the connection or send data.
+        Default: 60
+    retries: int
+        The number of times a failed request is retried.
+        Default: 4
+    backoff: float
+        Seconds to wait before the first retry, doubled for every following retry.
+        Default: 1
+    max_concurrency_per_host: int
+        The maximum number of requests to a host in flight at once.
+        Default: 8
+    max_requests_per_second_per_host: Optional[float]
+        The maximum rate of requests to a host.
+        Default: None (only limited when the host answers 429 or 503)
+    metrics: Optional[HTTPMetrics]
+        Where to record the metrics, to share them between adapters.
+        Default: None (a new HTTPMetrics)
+    **kwargs
+        Passed through to requests.adapters.HTTPAdapter.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 60,
+        retries: int = 4,
+        backoff: float = 1,
+        max_concurrency_per_host: int = 8,
+        max_requests_per_second_per_host: Optional[float] = None,
+        metrics: Optional[HTTPMetrics] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_concurrency_per_host = max_concurrency_per_host
+        self.max_requests_per_second_per_host = max_requests_per_second_per_host
+        self.metrics = metrics if metrics is not None else HTTPMetrics()
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._limiters_lock = threading.Lock()
+
+    def get_limiter(self, host: str) -> HostLimiter:
+        with self._limiters_lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = HostLimiter(
+                    self.max_concurrency_per_host,
+                    self.max_requests_per_second_per_host,
+                )
+            return limiter
+
+    def _retry_delay(
+        self, attempt: int, response: Optional[requests.Response]
+    ) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after is not None and retry_after.isdigit():
+                return min(float(retry_after), THROTTLE_MAX_INTERVAL * 6)
+        # Jitter keeps the workers that failed together from retrying together
+        return self.backoff * 2**attempt * random.uniform(0.5, 1.5)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        host = urlparse(request.url).netloc
+        limiter = self.get_limiter(host)
+        retries = self.retries if request.method in RETRY_METHODS else 0
+
+        attempt = 0
+        while True:
+            response = None
+            with limiter.slot():
+                start = time.perf_counter()
+                try:
+                    response = super().send(request, **kwargs)
+                    # Read the body while holding the slot so the latency includes it
+                    n_bytes = 0 if kwargs.get("stream") else len(response.content)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    self.metrics.record_error(host)
+                    if attempt >= retries:
+                        raise
+                    logging.warning(f"Retrying {request.url} after error: {e}")
+                else:
+                    self.metrics.record_response(
+                        host, time.perf_counter() - start, n_bytes
+                    )
+
+            if response is not None:
+                if response.status_code in THROTTLE_STATUS_CODES:
+                    limiter.throttle()
+                elif response.status_code < 400:
+                    limiter.relax()
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= retries:
+                    return response
+                logging.warning(
+                    f"Retrying {request.url} after status {response.status_code}."
+                )
+                response.close()
+
+            self.metrics.record_retry(host)
+            time.sleep(self._retry_delay(attempt, response))
+            attempt += 1
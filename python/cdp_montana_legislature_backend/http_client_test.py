@@ -0,0 +1,142 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from cdp_montana_legislature_backend.http_client import (
+    HostLimiter,
+    ThrottledHTTPAdapter,
+)
+
+
+class Handler(BaseHTTPRequestHandler):
+    # The number of requests seen for each path
+    counts = {}
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            count = self.counts[self.path] = self.counts.get(self.path, 0) + 1
+            Handler.in_flight += 1
+            Handler.max_in_flight = max(Handler.max_in_flight, Handler.in_flight)
+        try:
+            if self.path.startswith("/flaky") and count <= 2:
+                status, body = 503, b""
+            elif self.path.startswith("/broken"):
+                status, body = 500, b""
+            else:
+                if self.path.startswith("/slow"):
+                    time.sleep(0.05 if count > 1 else 0.5)
+                if self.path.startswith("/pause"):
+                    time.sleep(0.05)
+                status, body = 200, b"ok"
+        finally:
+            # Done before the response is sent: once the client has it, it can send its
+            # next request before this thread runs again
+            with self.lock:
+                Handler.in_flight -= 1
+
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThrottledHTTPAdapterTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.host = f"127.0.0.1:{cls.server.server_port}"
+        cls.base_url = f"http://{cls.host}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        Handler.counts.clear()
+        Handler.max_in_flight = 0
+
+    def create_session(self, **kwargs) -> requests.Session:
+        self.adapter = ThrottledHTTPAdapter(backoff=0.01, **kwargs)
+        s = requests.Session()
+        s.mount("http://", self.adapter)
+        return s
+
+    def test_5xx_is_retried(self):
+        response = self.create_session().get(f"{self.base_url}/flaky")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(3, Handler.counts["/flaky"])
+        stats = self.adapter.metrics.summary()[self.host]
+        self.assertEqual(3, stats["requests"])
+        self.assertEqual(2, stats["retries"])
+        self.assertEqual(2, stats["bytes"])
+
+    def test_last_response_is_returned_after_retries(self):
+        response = self.create_session(retries=2).get(f"{self.base_url}/broken")
+
+        self.assertEqual(500, response.status_code)
+        self.assertEqual(3, Handler.counts["/broken"])
+
+    def test_timeout_is_retried(self):
+        response = self.create_session(timeout=0.2).get(f"{self.base_url}/slow")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, Handler.counts["/slow"])
+        stats = self.adapter.metrics.summary()[self.host]
+        self.assertEqual(1, stats["errors"])
+        self.assertEqual(1, stats["retries"])
+
+    def test_connection_error_is_raised_after_retries(self):
+        s = self.create_session(retries=1)
+        with self.assertRaises(requests.ConnectionError):
+            # Nothing listens on port 1
+            s.get("http://127.0.0.1:1/")
+
+    def test_concurrency_per_host_is_limited(self):
+        s = self.create_session(max_concurrency_per_host=2, pool_maxsize=8)
+        with ThreadPoolExecutor(8) as executor:
+            list(
+                executor.map(
+                    lambda i: s.get(f"{self.base_url}/pause/{i}", timeout=5), range(8)
+                )
+            )
+
+        self.assertEqual(2, Handler.max_in_flight)
+
+
+class HostLimiterTestCase(unittest.TestCase):
+    def test_rate_is_limited(self):
+        limiter = HostLimiter(max_concurrency=4, max_requests_per_second=50)
+        start = time.monotonic()
+        for _ in range(6):
+            with limiter.slot():
+                pass
+
+        # The first request goes right away, the others are 20ms apart
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_throttle_slows_down_and_relax_recovers(self):
+        limiter = HostLimiter(max_concurrency=4)
+        self.assertEqual(0, limiter.interval)
+
+        limiter.throttle()
+        limiter.throttle()
+        self.assertGreater(limiter.interval, 0)
+
+        for _ in range(100):
+            limiter.relax()
+        self.assertEqual(0, limiter.interval)
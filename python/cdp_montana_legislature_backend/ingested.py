@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+from bisect import bisect_left
+import gzip
+import hashlib
+import json
+import logging
+import os
+from typing import Iterable, Optional
+from urllib.parse import urljoin
+
+import requests
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _source_id_key(external_source_id: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(external_source_id.encode("utf-8"), digest_size=8).digest(),
+        "big",
+    )
+
+
+class IngestedSourceIds:
+    """
+    The external source ids of the events that are already in the database.
+
+    The ids are SLIQ links of about 120 characters, and a session has thousands of
+    them, so only a sorted array of their 64 bit hashes is kept: 8 bytes per id, looked
+    up with a binary search. The chance of a new hearing colliding with an ingested one
+    is negligible at this size.
+
+    Parameters
+    ----------
+    external_source_ids: Iterable[Optional[str]]
+        The external source ids, events without one (None) are ignored.
+    """
+
+    def __init__(self, external_source_ids: Iterable[Optional[str]]):
+        self._keys = array(
+            "Q",
+            sorted(
+                {
+                    _source_id_key(external_source_id)
+                    for external_source_id in external_source_ids
+                    if external_source_id is not None
+                }
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, external_source_id: str) -> bool:
+        key = _source_id_key(external_source_id)
+        i = bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+
+def _parse_json(data: bytes):
+    if data.startswith(GZIP_MAGIC):
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+def _to_ingested_source_ids(items) -> IngestedSourceIds:
+    # e.g. a page of the get_event_source_ids API, whose events are under "events", would
+    # otherwise be read as the list of its keys and silently drop nothing
+    if not isinstance(items, list):
+        raise ValueError(
+            f"Expected a JSON list of external source ids, got a {type(items).__name__}."
+        )
+
+    return IngestedSourceIds(
+        item.get("external_source_id") if isinstance(item, dict) else item
+        for item in items
+    )
+
+
+def _is_snapshot_manifest(data) -> bool:
+    """Whether the JSON is the manifest.json of the event source id snapshot."""
+    return isinstance(data, dict) and {"version", "name", "etag"} <= data.keys()
+
+
+def parse_ingested_source_ids(data: bytes) -> IngestedSourceIds:
+    """
+    Parse a JSON list of external source ids, optionally gzip compressed.
+
+    The items are either the external source ids, or objects with an
+    "external_source_id" like the get_event_source_ids API response and the event
+    source id snapshot. Raises a ValueError if the JSON isn't a list.
+    """
+    return _to_ingested_source_ids(_parse_json(data))
+
+
+def _read_source(source: str, s: requests.Session) -> bytes:
+    if source.startswith(("http://", "https://")):
+        response = s.get(source)
+        response.raise_for_status()
+        return response.content
+
+    with open(source, "rb") as open_resource:
+        return open_resource.read()
+
+
+def load_ingested_source_ids(source: str, s: requests.Session) -> IngestedSourceIds:
+    """
+    Load the external source ids of the ingested events from a URL or a local file.
+
+    Parameters
+    ----------
+    source: str
+        An http(s) URL, e.g. of the get_event_source_ids API or the manifest.json of
+        the event source id snapshot, or the path of a local JSON file. The snapshot a
+        manifest points to is read from next to the manifest.
+    s: requests.Session
+        Session used to request the URLs.
+
+    Returns
+    -------
+    ingested: IngestedSourceIds
+        The external source ids of the ingested events.
+
+    Raises
+    ------
+    ValueError
+        If the JSON is neither a list of external source ids nor a snapshot manifest.
+    """
+    data = _parse_json(_read_source(source, s))
+    if _is_snapshot_manifest(data):
+        # The name of the snapshot is relative to the bucket, like in api/main.py
+        snapshot_name = data["name"].split("/")[-1]
+        if source.startswith(("http://", "https://")):
+            snapshot_source = urljoin(source, snapshot_name)
+        else:
+            snapshot_source = os.path.join(os.path.dirname(source), snapshot_name)
+        logging.info(f"Reading snapshot {snapshot_source} of manifest {source}...")
+        data = _parse_json(_read_source(snapshot_source, s))
+
+    ingested = _to_ingested_source_ids(data)
+    logging.info(f"Loaded {len(ingested)} ingested external source ids from {source}.")
+    return ingested
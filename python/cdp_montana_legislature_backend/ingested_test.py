@@ -0,0 +1,117 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from cdp_montana_legislature_backend.ingested import (
+    IngestedSourceIds,
+    load_ingested_source_ids,
+    parse_ingested_source_ids,
+)
+
+SLIQ_URL = "https://sg001-harmony.sliq.net/00309/Harmony/en/PowerBrowser/PowerBrowserV2/20230117/-1/47163"
+
+
+class IngestedSourceIdsTestCase(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+    def test_contains_only_ingested_ids(self):
+        ingested = IngestedSourceIds(
+            [f"{SLIQ_URL}?agendaId={i}" for i in range(1000)] + [None]
+        )
+        self.assertEqual(1000, len(ingested))
+        for i in range(1000):
+            self.assertIn(f"{SLIQ_URL}?agendaId={i}", ingested)
+        for i in range(1000, 2000):
+            self.assertNotIn(f"{SLIQ_URL}?agendaId={i}", ingested)
+
+    def test_empty(self):
+        self.assertNotIn(SLIQ_URL, IngestedSourceIds([]))
+
+    def test_parse_api_response(self):
+        data = json.dumps(
+            [
+                {"event_id": "a", "external_source_id": f"{SLIQ_URL}?agendaId=1"},
+                {"event_id": "b", "external_source_id": None},
+            ]
+        ).encode("utf-8")
+        ingested = parse_ingested_source_ids(data)
+        self.assertEqual(1, len(ingested))
+        self.assertIn(f"{SLIQ_URL}?agendaId=1", ingested)
+
+    def test_parse_gzip_compressed_list_of_ids(self):
+        data = gzip.compress(json.dumps([f"{SLIQ_URL}?agendaId=1"]).encode("utf-8"))
+        self.assertIn(f"{SLIQ_URL}?agendaId=1", parse_ingested_source_ids(data))
+
+    def test_load_from_local_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "ingested.json")
+            with open(path, "w") as open_resource:
+                json.dump([f"{SLIQ_URL}?agendaId=1"], open_resource)
+
+            ingested = load_ingested_source_ids(path, s=None)
+
+        self.assertIn(f"{SLIQ_URL}?agendaId=1", ingested)
+
+    def test_parse_json_object_raises_valueerror(self):
+        for data in [
+            # The manifest of the event source id snapshot
+            {
+                "version": 1,
+                "created": "2023-01-17T08:00:05+00:00",
+                "name": "event-source-ids/v1/20230117T080005Z.json.gz",
+                "events": 1,
+                "etag": "abc",
+            },
+            # A page of the get_event_source_ids API
+            {
+                "events": [
+                    {"event_id": "a", "external_source_id": f"{SLIQ_URL}?agendaId=1"}
+                ],
+                "since": None,
+                "next_page_token": None,
+            },
+        ]:
+            with self.subTest(keys=list(data)):
+                with self.assertRaises(ValueError):
+                    parse_ingested_source_ids(json.dumps(data).encode("utf-8"))
+
+    def test_load_follows_snapshot_manifest(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            snapshot_dir = os.path.join(tmp_dir, "event-source-ids", "v1")
+            os.makedirs(snapshot_dir)
+            with open(
+                os.path.join(snapshot_dir, "20230117T080005Z.json.gz"), "wb"
+            ) as f:
+                f.write(
+                    gzip.compress(
+                        json.dumps(
+                            [
+                                {
+                                    "event_id": "a",
+                                    "external_source_id": f"{SLIQ_URL}?agendaId=1",
+                                }
+                            ]
+                        ).encode("utf-8")
+                    )
+                )
+            manifest_path = os.path.join(snapshot_dir, "manifest.json")
+            with open(manifest_path, "w") as open_resource:
+                json.dump(
+                    {
+                        "version": 1,
+                        "created": "2023-01-17T08:00:05+00:00",
+                        "name": "event-source-ids/v1/20230117T080005Z.json.gz",
+                        "events": 1,
+                        "etag": "abc",
+                    },
+                    open_resource,
+                )
+
+            ingested = load_ingested_source_ids(manifest_path, s=None)
+
+        self.assertEqual(1, len(ingested))
+        self.assertIn(f"{SLIQ_URL}?agendaId=1", ingested)
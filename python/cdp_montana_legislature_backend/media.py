@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import Future
+from dataclasses import dataclass
+import logging
+import re
+import threading
+from typing import Dict, Optional
+
+import requests
+
+from cdp_montana_legislature_backend.metrics import RunMetrics
+
+# Servers that don't answer HEAD requests are asked for the first byte instead
+HEAD_NOT_SUPPORTED_STATUS_CODES = {403, 405, 501}
+# e.g. "bytes 0-0/1234567"
+CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+\d+-\d+/(\d+)")
+
+
+@dataclass
+class MediaInfo:
+    """What a pre-flight request found out about a media URL."""
+
+    url: str
+    # Whether the media can be downloaded: a successful response that isn't empty and
+    # isn't a web page
+    reachable: bool
+    # The status of the last response, None if no response was received
+    status_code: Optional[int] = None
+    # The size of the media in bytes, if the server sent it
+    content_length: Optional[int] = None
+    content_type: Optional[str] = None
+    # Why the media isn't reachable
+    error: Optional[str] = None
+
+
+def _get_content_length(response: requests.Response) -> Optional[int]:
+    content_range = CONTENT_RANGE_PATTERN.match(
+        response.headers.get("Content-Range", "")
+    )
+    if content_range is not None:
+        return int(content_range.group(1))
+    content_length = response.headers.get("Content-Length")
+    if content_length is not None and content_length.isdigit():
+        return int(content_length)
+    return None
+
+
+def probe_media(s: requests.Session, url: str) -> MediaInfo:
+    """
+    Check that a media URL can be downloaded without downloading it.
+
+    A HEAD request is sent first. If the server doesn't support it, the first byte of
+    the media is requested with a Range header instead, and the response body isn't
+    read.
+
+    Parameters
+    ----------
+    s: requests.Session
+        Session used to send the requests.
+    url: str
+        The media URL, e.g. the "Url" of the SLIQ downloadMediaUrls.
+
+    Returns
+    -------
+    media: MediaInfo
+        The status, size and type of the media, and whether it is reachable.
+    """
+    try:
+        response = s.head(url, allow_redirects=True)
+        if response.status_code in HEAD_NOT_SUPPORTED_STATUS_CODES:
+            with s.get(url, headers={"Range": "bytes=0-0"}, stream=True) as response:
+                pass
+    except requests.RequestException as e:
+        return MediaInfo(url, False, error=str(e))
+
+    media = MediaInfo(
+        url,
+        False,
+        status_code=response.status_code,
+        content_length=_get_content_length(response),
+        content_type=response.headers.get("Content-Type"),
+    )
+    if response.status_code >= 400:
+        media.error = f"Status {response.status_code}"
+    elif media.content_length == 0:
+        media.error = "Empty media"
+    elif media.content_type is not None and media.content_type.startswith("text/"):
+        # e.g. an HTML error page served with a 200
+        media.error = f"Not media: {media.content_type}"
+    else:
+        media.reachable = True
+    return media
+
+
+class MediaProbe:
+    """
+    Pre-flight the media of the hearings once per gather run.
+
+    Several hearings of a committee meeting share the same video, so the results are
+    cached by URL. Like SliqPageCache, the probe is safe to share between threads: if
+    several threads ask for the same URL at once, only one of them sends the requests.
+
+    Parameters
+    ----------
+    s: requests.Session
+        Session used to send the requests.
+    metrics: Optional[RunMetrics]
+        Where to record the time spent probing and the number of unreachable media.
+        Default: None (don't record them)
+    drop_unreachable: bool
+        Whether the hearings with unreachable media should be dropped, or only flagged
+        in the logs and metrics.
+        Default: True
+    """
+
+    def __init__(
+        self,
+        s: requests.Session,
+        metrics: Optional[RunMetrics] = None,
+        drop_unreachable: bool = True,
+    ):
+        self._session = s
+        self._metrics = metrics if metrics is not None else RunMetrics()
+        self.drop_unreachable = drop_unreachable
+        self._lock = threading.Lock()
+        self._media: Dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, url: str) -> MediaInfo:
+        with self._lock:
+            media = self._media.get(url)
+            is_owner = media is None
+            if is_owner:
+                media = self._media[url] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if is_owner:
+            try:
+                logging.info(f"Probing media: {url}...")
+                with self._metrics.span("probe_media"):
+                    result = probe_media(self._session, url)
+            except Exception as e:
+                # Like SliqPageCache, don't keep failures around so that another bill can
+                # try again, and don't leave the threads waiting for this probe hanging.
+                with self._lock:
+                    del self._media[url]
+                media.set_exception(e)
+                return media.result()
+
+            self._metrics.count("media_probed")
+            if result.reachable:
+                logging.debug(
+                    f"Media {url}: {result.content_type}, {result.content_length} bytes."
+                )
+            else:
+                self._metrics.count("media_unreachable")
+                logging.warning(f"Media {url} is unreachable: {result.error}")
+            media.set_result(result)
+
+        return media.result()
+
+    def log_stats(self):
+        unreachable = sum(
+            1
+            for media in self._media.values()
+            if media.done() and not media.result().reachable
+        )
+        logging.info(
+            f"Media probe: {self.hits} hits, {self.misses} misses, "
+            f"{unreachable} of {len(self._media)} media unreachable."
+        )
@@ -0,0 +1,162 @@
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from cdp_montana_legislature_backend.http_client import ThrottledHTTPAdapter
+from cdp_montana_legislature_backend import media as media_module
+from cdp_montana_legislature_backend.media import MediaInfo, MediaProbe, probe_media
+
+VIDEO_LENGTH = 123456
+
+
+class Handler(BaseHTTPRequestHandler):
+    """A stand-in for the SLIQ media server."""
+
+    # The requests seen for each path, e.g. ("HEAD", None) or ("GET", "bytes=0-0")
+    requests = {}
+    lock = threading.Lock()
+
+    def record(self):
+        with self.lock:
+            self.requests.setdefault(self.path, []).append(
+                (self.command, self.headers.get("Range"))
+            )
+
+    def do_HEAD(self):
+        self.record()
+        if self.path.startswith("/no-head"):
+            self.send_response(405)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path.startswith("/missing"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path.startswith("/empty"):
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path.startswith("/error-page"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", "512")
+            self.end_headers()
+        else:
+            if self.path.startswith("/pause"):
+                time.sleep(0.05)
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(VIDEO_LENGTH))
+            self.end_headers()
+
+    def do_GET(self):
+        self.record()
+        self.send_response(206)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Range", f"bytes 0-0/{VIDEO_LENGTH}")
+        self.send_header("Content-Length", "1")
+        self.end_headers()
+        self.wfile.write(b"\x00")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MediaProbeTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        Handler.requests.clear()
+        self.session = requests.Session()
+        self.session.mount("http://", ThrottledHTTPAdapter(retries=0))
+
+    def test_probe_media_records_length_and_type(self):
+        media = probe_media(self.session, f"{self.base_url}/video.mp4")
+
+        self.assertTrue(media.reachable)
+        self.assertEqual(200, media.status_code)
+        self.assertEqual(VIDEO_LENGTH, media.content_length)
+        self.assertEqual("video/mp4", media.content_type)
+        self.assertEqual([("HEAD", None)], Handler.requests["/video.mp4"])
+
+    def test_probe_media_falls_back_to_range_request(self):
+        media = probe_media(self.session, f"{self.base_url}/no-head/video.mp4")
+
+        self.assertTrue(media.reachable)
+        self.assertEqual(206, media.status_code)
+        self.assertEqual(VIDEO_LENGTH, media.content_length)
+        self.assertEqual(
+            [("HEAD", None), ("GET", "bytes=0-0")],
+            Handler.requests["/no-head/video.mp4"],
+        )
+
+    def test_probe_media_unreachable(self):
+        for path in ["/missing.mp4", "/empty.mp4", "/error-page.mp4"]:
+            with self.subTest(path=path):
+                media = probe_media(self.session, f"{self.base_url}{path}")
+                self.assertFalse(media.reachable)
+                self.assertIsNotNone(media.error)
+
+    def test_probe_media_connection_error_is_unreachable(self):
+        # Nothing listens on port 1
+        media = probe_media(self.session, "http://127.0.0.1:1/video.mp4")
+
+        self.assertFalse(media.reachable)
+        self.assertIsNone(media.status_code)
+        self.assertIsNotNone(media.error)
+
+    def test_probe_is_cached_per_url(self):
+        probe = MediaProbe(self.session)
+        probe.probe(f"{self.base_url}/video.mp4")
+        probe.probe(f"{self.base_url}/missing.mp4")
+        self.assertTrue(probe.probe(f"{self.base_url}/video.mp4").reachable)
+        self.assertFalse(probe.probe(f"{self.base_url}/missing.mp4").reachable)
+
+        self.assertEqual(1, len(Handler.requests["/video.mp4"]))
+        self.assertEqual(1, len(Handler.requests["/missing.mp4"]))
+        self.assertEqual((2, 2), (probe.hits, probe.misses))
+
+    def test_probe_once_when_shared_between_threads(self):
+        probe = MediaProbe(self.session)
+        urls = [f"{self.base_url}/pause/{i % 4}.mp4" for i in range(16)]
+        with ThreadPoolExecutor(8) as executor:
+            media = list(executor.map(probe.probe, urls))
+
+        self.assertTrue(all(m.reachable for m in media))
+        self.assertEqual(
+            [1, 1, 1, 1],
+            [len(Handler.requests[f"/pause/{i}.mp4"]) for i in range(4)],
+        )
+
+    def test_probe_that_raises_is_not_cached(self):
+        probe = MediaProbe(self.session)
+        url = f"{self.base_url}/video.mp4"
+        with mock.patch.object(media_module, "probe_media", side_effect=ValueError()):
+            with ThreadPoolExecutor(4) as executor:
+                futures = [executor.submit(probe.probe, url) for _ in range(4)]
+                for future in futures:
+                    # Neither the owner nor the threads waiting for it hang
+                    with self.assertRaises(ValueError):
+                        future.result(timeout=5)
+
+        with mock.patch.object(
+            media_module, "probe_media", return_value=MediaInfo(url, True, 200)
+        ):
+            self.assertTrue(probe.probe(url).reachable)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import json
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+import requests
+
+from cdp_montana_legislature_backend.http_client import HTTPMetrics
+
+
+class RunMetrics:
+    """
+    Thread-safe timing spans and counters of a gather run.
+
+    A span is the time spent in a stage of the scraper, e.g. "fetch_actions" or
+    "parse_action_row". The time of a stage is summed over all the workers, so with
+    several workers the stages add up to more than the wall-clock time of the run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.started = datetime.now(timezone.utc)
+        # count, total seconds and max seconds of each stage
+        self._spans: Dict[str, list] = {}
+        self._counters: Dict[str, int] = {}
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(stage, time.perf_counter() - start)
+
+    def add_span(self, stage: str, seconds: float):
+        with self._lock:
+            span = self._spans.setdefault(stage, [0, 0.0, 0.0])
+            span[0] += 1
+            span[1] += seconds
+            span[2] = max(span[2], seconds)
+
+    def count(self, counter: str, n: int = 1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + n
+
+    def fetch(self, s: requests.Session, url: str, stage: str) -> str:
+        """
+        Get the text of a page, in a span of the stage, and count the page.
+
+        Raises a requests.HTTPError if the page is an error response, e.g. the last 503
+        of a page that is still failing after the retries.
+        """
+        with self.span(stage):
+            response = s.get(url)
+            response.raise_for_status()
+            text = response.text
+        self.count("pages_fetched")
+        self.count("bytes_fetched", len(response.content))
+        return text
+
+    def summary(self, http_metrics: Optional[HTTPMetrics] = None) -> dict:
+        """
+        The metrics as a JSON serializable dict: the start time and wall-clock seconds of
+        the run, the calls, total, mean and max seconds of each stage, the counters, and
+        the HTTP metrics of each host if given.
+        """
+        with self._lock:
+            summary = {
+                "started": self.started.isoformat(),
+                "wall_seconds": time.perf_counter() - self._start,
+                "stages": {
+                    stage: {
+                        "calls": calls,
+                        "seconds": total,
+                        "mean_seconds": total / calls,
+                        "max_seconds": max_seconds,
+                    }
+                    for stage, (calls, total, max_seconds) in self._spans.items()
+                },
+                "counters": dict(self._counters),
+            }
+        if http_metrics is not None:
+            summary["hosts"] = http_metrics.summary()
+        return summary
+
+
+def format_summary(summary: dict) -> str:
+    """Format the RunMetrics summary as tables of the stages, counters and hosts."""
+    lines = [
+        f"Gather run metrics ({summary['wall_seconds']:.1f}s wall-clock)",
+        f"{'Stage':<24}{'Calls':>8}{'Total s':>10}{'Mean ms':>10}{'Max ms':>10}",
+    ]
+    for stage, span in sorted(
+        summary["stages"].items(), key=lambda item: -item[1]["seconds"]
+    ):
+        lines.append(
+            f"{stage:<24}{span['calls']:>8}{span['seconds']:>10.2f}"
+            f"{span['mean_seconds'] * 1000:>10.1f}{span['max_seconds'] * 1000:>10.1f}"
+        )
+
+    lines.append(f"{'Counter':<24}{'Value':>8}")
+    for counter, value in sorted(summary["counters"].items()):
+        lines.append(f"{counter:<24}{value:>8}")
+
+    if summary.get("hosts"):
+        lines.append(
+            f"{'Host':<32}{'Requests':>9}{'Retries':>8}{'Errors':>7}{'MiB':>8}"
+            f"{'p50 ms':>8}{'p95 ms':>8}"
+        )
+        for host, stats in sorted(summary["hosts"].items()):
+            lines.append(
+                f"{host:<32}{stats['requests']:>9}{stats['retries']:>8}"
+                f"{stats['errors']:>7}{stats['bytes'] / 2**20:>8.1f}"
+                f"{stats['latency_p50'] * 1000:>8.0f}"
+                f"{stats['latency_p95'] * 1000:>8.0f}"
+            )
+
+    return "\n".join(lines)
+
+
+def append_metrics_file(path: str, summary: dict):
+    """
+    Append the summary to a JSON Lines file, one line per run, so the metrics of the
+    runs can be compared over time.
+    """
+    with open(path, "a") as open_resource:
+        open_resource.write(json.dumps(summary) + "\n")
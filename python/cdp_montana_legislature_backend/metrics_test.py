@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+import unittest
+
+from cdp_montana_legislature_backend.http_client import HTTPMetrics
+from cdp_montana_legislature_backend.metrics import (
+    RunMetrics,
+    append_metrics_file,
+    format_summary,
+)
+
+
+class RunMetricsTestCase(unittest.TestCase):
+    def test_spans_and_counters_are_summarized(self):
+        metrics = RunMetrics()
+        for _ in range(3):
+            with metrics.span("parse_action_row"):
+                pass
+        metrics.add_span("fetch_actions", 0.5)
+        metrics.add_span("fetch_actions", 1.5)
+        metrics.count("events")
+        metrics.count("bytes_fetched", 1024)
+
+        summary = metrics.summary()
+        self.assertEqual(3, summary["stages"]["parse_action_row"]["calls"])
+        self.assertEqual(
+            {"calls": 2, "seconds": 2.0, "mean_seconds": 1.0, "max_seconds": 1.5},
+            summary["stages"]["fetch_actions"],
+        )
+        self.assertEqual({"events": 1, "bytes_fetched": 1024}, summary["counters"])
+        self.assertNotIn("hosts", summary)
+
+    def test_span_is_recorded_when_stage_raises(self):
+        metrics = RunMetrics()
+        with self.assertRaises(ValueError):
+            with metrics.span("parse_action_row"):
+                raise ValueError()
+
+        self.assertEqual(1, metrics.summary()["stages"]["parse_action_row"]["calls"])
+
+    def test_summary_is_formatted_and_appended_as_json_lines(self):
+        metrics = RunMetrics()
+        metrics.add_span("fetch_sliq", 0.25)
+        metrics.count("events_dropped", 2)
+        http_metrics = HTTPMetrics()
+        http_metrics.record_response("laws.leg.mt.gov", 0.1, 2048)
+        summary = metrics.summary(http_metrics)
+
+        table = format_summary(summary)
+        self.assertIn("fetch_sliq", table)
+        self.assertIn("events_dropped", table)
+        self.assertIn("laws.leg.mt.gov", table)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "metrics.jsonl")
+            append_metrics_file(path, summary)
+            append_metrics_file(path, summary)
+            with open(path) as open_resource:
+                lines = open_resource.read().splitlines()
+
+        self.assertEqual(2, len(lines))
+        self.assertEqual(summary, json.loads(lines[0]))
@@ -2,38 +2,83 @@
 # -*- coding: utf-8 -*-
 # flake8: noqa
 
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import cProfile
+from dataclasses import replace
+import hashlib
 import logging
 from datetime import datetime, date
-from typing import List
-from bs4 import BeautifulSoup, Tag
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
 import requests
 import re
-import json
 
 from urllib.parse import urlparse, parse_qs
-from cdp_backend.pipeline.ingestion_models import Body
-from cdp_backend.pipeline.ingestion_models import EventIngestionModel
-from cdp_backend.pipeline.ingestion_models import Session
 
-# MT Legislature 2023 Regular Session
-LAWS_2023_ROOT_URL = (
-    "https://laws.leg.mt.gov/legprd/LAW0217W$BAIV.return_all_bills?P_SESS=20231"
+from cdp_montana_legislature_backend.actions import (
+    find_action_rows_with_recordings,
+    parse_action_row,
+)
+from cdp_montana_legislature_backend.archive import (
+    RecordingHTTPAdapter,
+    ReplayHTTPAdapter,
+)
+from cdp_montana_legislature_backend.bills import Bill, iter_bills, parse_status_date
+from cdp_montana_legislature_backend.catalog import Catalog, get_scope
+from cdp_montana_legislature_backend.config import (
+    DEFAULT_SESSION,
+    ScraperConfig,
+    load_scraper_config,
+)
+from cdp_montana_legislature_backend.http_cache import CachingHTTPAdapter
+from cdp_montana_legislature_backend.http_client import ThrottledHTTPAdapter
+from cdp_montana_legislature_backend.media import MediaProbe
+from cdp_montana_legislature_backend.metrics import (
+    RunMetrics,
+    append_metrics_file,
+    format_summary,
+)
+from cdp_montana_legislature_backend.sliq import SliqPageCache
+from cdp_montana_legislature_backend.ingested import (
+    IngestedSourceIds,
+    load_ingested_source_ids,
+)
+from cdp_montana_legislature_backend.state import GatherState, fingerprint_rows
+
+# BeautifulSoup is only used by the functions that parse the bill list into a tree,
+# which the scraper doesn't call anymore, and the CDP ingestion models only when the
+# first event is created, so neither is imported with the module.
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, Tag
+    from cdp_backend.pipeline.ingestion_models import EventIngestionModel
+
+# The list of all bills of a session, e.g. P_SESS=20231 for the 2023 Regular Session
+LAWS_ALL_BILLS_URL = (
+    "https://laws.leg.mt.gov/legprd/LAW0217W$BAIV.return_all_bills?P_SESS={session}"
 )
+# MT Legislature 2023 Regular Session
+LAWS_2023_ROOT_URL = LAWS_ALL_BILLS_URL.format(session=DEFAULT_SESSION)
 
+T = TypeVar("T")
+R = TypeVar("R")
 
-@dataclass
-class Bill:
-    type_number: str
-    short_title: str
-    action_url_path: str
 
-    def get_bill_actions_url(self) -> str:
-        return f"https://laws.leg.mt.gov/legprd/{self.action_url_path}"
+def get_laws_all_bills_url(session: str) -> str:
+    return LAWS_ALL_BILLS_URL.format(session=session)
 
 
-def row_to_bill(row: Tag) -> Bill:
+def row_to_bill(row: "Tag") -> Bill:
     """Convert a table row (as a Tag) in the LAWS search results bills table to a Bill."""
+    from bs4 import Tag
 
     try:
         assert row.name == "tr"
@@ -53,258 +98,734 @@ def row_to_bill(row: Tag) -> Bill:
     # LAW0210W$BSIV.ActionQuery?P_BILL_NO1=2&P_BLTP_BILL_TYP_CD=HB&Z_ACTION=Find&P_SESS=20231
     # because the url path is relative in this tag we must prefix it with the LAWS application
     bill_action_url_path = bill_link.attrs["href"]
+    bill_cells = row.find_all("td")
     # the last <td> in this row contains a short description of the bill, e.g.
     # "General Appropriations Act"
-    short_title = row.find_all("td")[-1].text
+    short_title = bill_cells[-1].text
+    # the <td> before it contains the date of the latest action
+    last_action_date = None
+    if len(bill_cells) > 1:
+        last_action_date = parse_status_date(bill_cells[-2].text)
 
-    bill = Bill(bill_type_number, short_title, bill_action_url_path)
+    bill = Bill(bill_type_number, short_title, bill_action_url_path, last_action_date)
     logging.debug(f"Found bill: {bill}.")
     return bill
 
 
-def get_active_bills_rows(laws_all_bills_html: BeautifulSoup) -> List[Tag]:
+def prune_bills(bills: List[Bill], from_dt: datetime) -> List[Bill]:
+    """
+    Remove the bills that can't have a hearing on or after from_dt.
+
+    A hearing is an action on the bill, so a bill whose latest action happened before
+    from_dt can't have had a hearing since. Bills without a last action date are kept.
+    """
+    if from_dt is None:
+        return bills
+
+    pruned_bills = [
+        bill
+        for bill in bills
+        if bill.last_action_date is None or bill.last_action_date >= from_dt.date()
+    ]
+    logging.info(
+        f"Skipping {len(bills) - len(pruned_bills)} of {len(bills)} bills without an action since {from_dt}."
+    )
+    return pruned_bills
+
+
+def get_bill_shard(bill: Bill, shard_count: int) -> int:
+    """Get the shard a bill belongs to, which is stable between runs and machines."""
+    digest = hashlib.sha1(bill.type_number.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def shard_bills(bills: List[Bill], shard_index: int, shard_count: int) -> List[Bill]:
+    """Keep only the bills that belong to the shard at shard_index."""
+    if shard_count == 1:
+        return bills
+
+    sharded_bills = [
+        bill for bill in bills if get_bill_shard(bill, shard_count) == shard_index
+    ]
+    logging.info(
+        f"Scraping {len(sharded_bills)} of {len(bills)} bills in shard {shard_index + 1} of {shard_count}."
+    )
+    return sharded_bills
+
+
+def get_active_bills_rows(laws_all_bills_html: "BeautifulSoup") -> List["Tag"]:
     # The first table on the LAWS Bill Search Result page is in the header. The second table contains
     # the listing of the active bills.
-    all_bills_table: Tag = laws_all_bills_html.find_all("table")[1]
+    all_bills_table: "Tag" = laws_all_bills_html.find_all("table")[1]
     # This <table> doesn't have a <th>, so we get all <tr> and skip the first row
     # which contains the column headers.
-    all_bills_table_rows: List[Tag] = all_bills_table.find_all("tr")[1:]
+    all_bills_table_rows: List["Tag"] = all_bills_table.find_all("tr")[1:]
     logging.debug(f"Found {len(all_bills_table_rows)} bills.")
     return all_bills_table_rows
 
 
-def get_laws_all_bills_html(s: requests.Session, laws_root_url: str) -> BeautifulSoup:
-    """Starting from the root url, request the page and hand-off to BeautifulSoup for parsing."""
+def get_laws_all_bills_text(
+    s: requests.Session, laws_root_url: str, metrics: Optional[RunMetrics] = None
+) -> str:
+    """Request the LAWS all bills page at the root url."""
+    if metrics is None:
+        metrics = RunMetrics()
+
     logging.info(f"Loading bills from {laws_root_url}…")
-    laws_all_bills_html = BeautifulSoup(
-        s.get(laws_root_url).text, features="html.parser"
-    )
+    return metrics.fetch(s, laws_root_url, "fetch_bill_list")
+
+
+def get_laws_all_bills_html(
+    s: requests.Session, laws_root_url: str, metrics: Optional[RunMetrics] = None
+) -> "BeautifulSoup":
+    """Starting from the root url, request the page and hand-off to BeautifulSoup for parsing."""
+    from bs4 import BeautifulSoup
+
+    if metrics is None:
+        metrics = RunMetrics()
+
+    laws_all_bills_text = get_laws_all_bills_text(s, laws_root_url, metrics)
+    with metrics.span("parse_bill_list"):
+        laws_all_bills_html = BeautifulSoup(laws_all_bills_text, features="html.parser")
     return laws_all_bills_html
 
 
-def get_events(
+def get_session_bills(
+    s: requests.Session, session: str, metrics: Optional[RunMetrics] = None
+) -> List[Bill]:
+    """Get the bills of a LAWS session, e.g. "20231"."""
+    if metrics is None:
+        metrics = RunMetrics()
+
+    laws_all_bills_text = get_laws_all_bills_text(
+        s, get_laws_all_bills_url(session), metrics
+    )
+    # Only the bills table is parsed, without building a tree of the whole page
+    with metrics.span("parse_bill_list"):
+        bills = list(iter_bills(laws_all_bills_text))
+    logging.info(f"Found {len(bills)} bills in session {session}.")
+    return bills
+
+
+def create_session(config: ScraperConfig) -> requests.Session:
+    """
+    Create the session used for all LAWS and SLIQ requests of a gather run.
+
+    All requests get the timeouts, retries and per-host limits of ThrottledHTTPAdapter,
+    whose `metrics` are logged at the end of the run. With config.record_dir the
+    responses are also saved to an archive, and with config.replay_dir they are all
+    answered from one instead of the network.
+    """
+    # Size the connection pool so that each worker can keep its connection alive.
+    pool_maxsize = max(config.max_workers, 1)
+    adapter_kwargs = dict(
+        timeout=config.http_timeout,
+        retries=config.http_retries,
+        backoff=config.http_backoff,
+        max_concurrency_per_host=config.http_max_concurrency_per_host,
+        max_requests_per_second_per_host=config.http_max_requests_per_second_per_host,
+        pool_maxsize=pool_maxsize,
+    )
+    if config.replay_dir is not None:
+        adapter = ReplayHTTPAdapter(config.replay_dir)
+    elif config.http_cache_dir is not None:
+        adapter = CachingHTTPAdapter(
+            config.http_cache_dir,
+            ttl=config.http_cache_ttl,
+            max_bytes=config.http_cache_max_bytes,
+            **adapter_kwargs,
+        )
+    else:
+        adapter = ThrottledHTTPAdapter(**adapter_kwargs)
+    if config.record_dir is not None:
+        adapter = RecordingHTTPAdapter(adapter, config.record_dir)
+
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+def get_bill_hearings(
+    s: requests.Session,
+    bill: Bill,
     from_dt: datetime,
     to_dt: datetime,
-    **kwargs,
-) -> List[EventIngestionModel]:
+    sliq_pages: Optional[SliqPageCache] = None,
+    state: Optional[GatherState] = None,
+    ingested: Optional[IngestedSourceIds] = None,
+    media_probe: Optional[MediaProbe] = None,
+    metrics: Optional[RunMetrics] = None,
+    unresolved_links: Optional[List[str]] = None,
+) -> List[dict]:
     """
-    Get all events for the provided timespan.
+    Go to the LAWS actions page for a bill and gather the hearings with an associated
+    recording that occured in the provided timespan.
 
     Parameters
     ----------
+    s: requests.Session
+        Session used to request the LAWS and SLIQ pages.
+    bill: Bill
+        The bill to gather hearings for.
     from_dt: datetime
         Datetime to start event gather from.
     to_dt: datetime
         Datetime to end event gather at.
+    sliq_pages: Optional[SliqPageCache]
+        Cache of the SLIQ pages shared between the bills of a gather run.
+        Default: None (only cache the SLIQ pages for this bill)
+    state: Optional[GatherState]
+        What the previous gather runs learned about the bills. The bill is skipped if
+        its recordings haven't changed since then and recordings that were already
+        turned into events are not ingested again. The state is updated with the
+        results for this bill.
+        Default: None (process all recordings of the bill)
+    ingested: Optional[IngestedSourceIds]
+        The external source ids of the events already in the database. Recordings that
+        were already ingested are skipped.
+        Default: None (process all recordings of the bill)
+    media_probe: Optional[MediaProbe]
+        Pre-flight of the media of the hearings, shared between the bills of a gather
+        run. When it drops unreachable media, the audio recording is used instead if
+        there is one, and otherwise the recording is tried again on the next run.
+        Default: None (trust the media URLs of the SLIQ pages)
+    metrics: Optional[RunMetrics]
+        Where to record the time spent in each stage and the pages fetched.
+        Default: None (don't record them)
+    unresolved_links: Optional[List[str]]
+        If given, the SLIQ links of the hearings in the timespan that couldn't be turned
+        into events yet (e.g. no agendaId, no end time or unreachable media) are
+        appended to it.
+        Default: None
 
     Returns
     -------
-    events: List[EventIngestionModel]
-        All events gathered that occured in the provided time range.
-
-    Notes
-    -----
-    As the implementer of the get_events function, you can choose to ignore
-    the from_dt and to_dt parameters. However, they are useful for manually
-    kicking off pipelines from GitHub Actions UI.
+    hearings: List[dict]
+        The hearing data for each recording found, in the order they appear on the
+        actions page.
     """
+    if metrics is None:
+        metrics = RunMetrics()
+    if sliq_pages is None:
+        sliq_pages = SliqPageCache(s, metrics)
 
-    logging.info("Starting MT Legislature Scraper.")
+    hearings = []
+    logging.info(f"[{bill.type_number}] Starting ingestion.")
 
-    with requests.Session() as s:
-        laws_all_bills_html = get_laws_all_bills_html(s, LAWS_2023_ROOT_URL)
-        active_bill_rows = get_active_bills_rows(laws_all_bills_html)
-        bills = [row_to_bill(t) for t in active_bill_rows]
+    logging.info(
+        f"[{bill.type_number}] Getting LAWS bill url: {bill.get_bill_actions_url()}..."
+    )
+    laws_bill_html = metrics.fetch(s, bill.get_bill_actions_url(), "fetch_actions")
+    # We use regex search on the full html instead of going through BeautifulSoup due to "invalid" HTML returned by
+    # the server that can't be parsed by BeautifulSoup.
+    with metrics.span("find_action_rows"):
+        bill_rows_with_recordings = find_action_rows_with_recordings(laws_bill_html)
 
-    event_data = []
-    # Go to each LAWS bill URL and find bill actions that have associated recordings.
-    for bill in bills:
-        logging.info(f"[{bill.type_number}] Starting ingestion.")
+    if not bill_rows_with_recordings:
+        logging.info(
+            f"[{bill.type_number}] No bills found with recordings, no events will be ingested."
+        )
 
+    fingerprint = fingerprint_rows(bill_rows_with_recordings)
+    if state is not None and state.is_unchanged(bill.get_key(), fingerprint):
         logging.info(
-            f"[{bill.type_number}] Getting LAWS bill url: {bill.get_bill_actions_url()}..."
+            f"[{bill.type_number}] Recordings unchanged since the last run, no events will be ingested."
         )
-        laws_bill_html = requests.get(bill.get_bill_actions_url()).text
-        # We use regex search on the full html instead of going through BeautifulSoup due to "invalid" HTML returned by
-        # the server that can't be parsed by BeautifulSoup.
-        bill_rows_with_recordings = re.findall(".*sliq.*", laws_bill_html)
+        return hearings
 
-        if not bill_rows_with_recordings:
-            logging.info(
-                f"[{bill.type_number}] No bills found with recordings, no events will be ingested."
-            )
+    resolved_links = (
+        state.resolved_links(bill.get_key()) if state is not None else set()
+    )
+    newly_resolved_links = []
+    pending_links = []
 
-        for bill_row in bill_rows_with_recordings:
-            parsed_bill_row = BeautifulSoup(bill_row, "html.parser")
-            bill_cells = parsed_bill_row.find_all("td")
-            hearing_date_str = bill_cells[1].text
-            hearing_date = datetime.strptime(hearing_date_str, "%m/%d/%Y").date()
+    for bill_row in bill_rows_with_recordings:
+        with metrics.span("parse_action_row"):
+            action_row = parse_action_row(bill_row)
+        hearing_date = action_row.date
 
-            is_hearing_after_specified_start = (
-                from_dt is None or hearing_date >= from_dt.date()
-            )
-            is_hearing_before_specified_end = (
-                to_dt is None or hearing_date <= to_dt.date()
-            )
+        is_hearing_after_specified_start = (
+            from_dt is None or hearing_date >= from_dt.date()
+        )
+        is_hearing_before_specified_end = to_dt is None or hearing_date <= to_dt.date()
 
-            if is_hearing_after_specified_start and is_hearing_before_specified_end:
-                sliq_links = bill_cells[-1].find_all("a", href=re.compile("sliq"))
-                if not sliq_links:
-                    logging.info(
-                        f"[{bill.type_number}] No sliq_links found, no events will be ingested."
-                    )
+        if is_hearing_after_specified_start and is_hearing_before_specified_end:
+            sliq_links = action_row.sliq_links
+            if not sliq_links:
+                logging.info(
+                    f"[{bill.type_number}] No sliq_links found, no events will be ingested."
+                )
 
-                hearing_data = {}
-                last_link_added = False
-                # Of the recordings available for this action, prefer using the video over the audio if video exists.
-                # If it doesn't exist, use the audio.
-                for link in sliq_links:
-                    sliq_link = link["href"]
-                    logging.info(
-                        f"[{bill.type_number}] Getting page from: {sliq_link}..."
-                    )
-                    sliq_html = requests.get(sliq_link).text
+            if resolved_links.intersection(sliq_links):
+                logging.info(
+                    f"[{bill.type_number}] Recording {sliq_links} was ingested in a previous run, no events will be ingested."
+                )
+                continue
 
-                    media_info_regex = re.search("downloadMediaUrls = (.*);", sliq_html)
-                    # No media is on the page as far as we are concerned
-                    if media_info_regex is None:
+            if ingested is not None and any(link in ingested for link in sliq_links):
+                logging.info(
+                    f"[{bill.type_number}] Recording {sliq_links} is already in the database, no events will be ingested."
+                )
+                newly_resolved_links.extend(sliq_links)
+                continue
+
+            # The index in `hearings` of the hearing added for this action, if any
+            hearing_index = None
+            # Of the recordings available for this action, prefer using the video over the audio if video exists.
+            # If it doesn't exist, use the audio.
+            for sliq_link in sliq_links:
+                logging.info(f"[{bill.type_number}] Getting SLIQ page: {sliq_link}...")
+                sliq_page = sliq_pages.get(sliq_link)
+
+                # No media is on the page as far as we are concerned
+                if sliq_page.media_info is None:
+                    continue
+
+                parsed_media_info = sliq_page.media_info
+                is_video = parsed_media_info["AudioOnly"] is False
+
+                if hearing_index is None or is_video:
+                    # Built anew for each link, so that a link that is skipped doesn't change the
+                    # hearing of a link that was already added
+                    hearing_data = {}
+                    bill_action = action_row.action
+                    title = bill.type_number + " - " + bill_action
+                    committee = action_row.committee
+                    if not committee == "":
+                        title += " - " + committee
+                    hearing_data["title"] = title
+                    hearing_data["video_uri"] = parsed_media_info["Url"]
+                    # The `external_source_id` will be used by the Capitol Tracker frontend to correlate the bill to
+                    # the CDP event ID.
+                    hearing_data["external_source_id"] = sliq_link
+
+                    # Get the start and end time positions for the videos
+                    agenda = sliq_page.agenda
+                    if agenda is None:
+                        logging.warning(
+                            f"[{bill.type_number}] No AgendaTree found in {sliq_link}, no events will be ingested."
+                        )
                         continue
-
-                    media_info = media_info_regex.groups()[0]
-                    parsed_media_info = json.loads(media_info)[0]
-                    is_video = parsed_media_info["AudioOnly"] is False
-
-                    if not last_link_added or is_video:
-                        bill_action = bill_cells[0].text
-                        title = bill.type_number + " - " + bill_action
-                        committee = bill_cells[-1].text.strip()
-                        if not committee == "":
-                            title += " - " + committee
-                        hearing_data["title"] = title
-                        hearing_data["video_uri"] = parsed_media_info["Url"]
-                        # The `external_source_id` will be used by the Capitol Tracker frontend to correlate the bill to
-                        # the CDP event ID.
-                        hearing_data["external_source_id"] = sliq_link
-
-                        # Get the start and end time positions for the videos
-                        event_info_text = re.search(
-                            "AgendaTree:(.*),", sliq_html
-                        ).groups()[0]
-                        event_info_json = json.loads(event_info_text)
-                        parsed_url = urlparse(sliq_link)
-                        # If there is no `agendaId` in the url, we are assuming timestamps haven't been added yet. For 10 more days,
-                        # we will continue to try to scrape this video again until there are timestamps.
-                        if "agendaId" in parse_qs(parsed_url.query):
-                            agenda_id = "A" + parse_qs(parsed_url.query)["agendaId"][0]
-                            agenda_indices = [
-                                i
-                                for i, d in enumerate(event_info_json)
-                                if agenda_id in d.values()
-                            ]
-                            # Even when agendaId is present in the query params it might not be present
-                            # in the AgendaTree parsed from the SLIQ page. In that case, we will skip over
-                            # this bill row since we don't know a time-range to constrain the transcript generation
-                            if len(agenda_indices) > 0:
-                                agenda_index = agenda_indices[0]
-                            else:
-                                logging.warn(
-                                    f"agenda_id: {agenda_id} not found in AgendaTree from url: {sliq_link}."
-                                )
-                                continue
-
-                            logging.debug(
-                                f"[{bill.type_number}] agendaId={agenda_id}, agenda_index={agenda_index}"
+                    parsed_url = urlparse(sliq_link)
+                    # If there is no `agendaId` in the url, we are assuming timestamps haven't been added yet. For 10 more days,
+                    # we will continue to try to scrape this video again until there are timestamps.
+                    if "agendaId" in parse_qs(parsed_url.query):
+                        agenda_id = "A" + parse_qs(parsed_url.query)["agendaId"][0]
+                        agenda_index = agenda.index_of(agenda_id)
+                        # Even when agendaId is present in the query params it might not be present
+                        # in the AgendaTree parsed from the SLIQ page. In that case, we will skip over
+                        # this bill row since we don't know a time-range to constrain the transcript generation
+                        if agenda_index is None:
+                            logging.warn(
+                                f"agenda_id: {agenda_id} not found in AgendaTree from url: {sliq_link}."
                             )
-                            logging.debug(
-                                f"[{bill.type_number}] event_info_json={event_info_json}"
+                            continue
+
+                        logging.debug(
+                            f"[{bill.type_number}] agendaId={agenda_id}, agenda_index={agenda_index}"
+                        )
+                        logging.debug(
+                            f"[{bill.type_number}] agenda_tree={agenda.agenda_tree}"
+                        )
+
+                        first_agenda_item_time = agenda.first_start_time
+                        start_datetime = agenda.start_datetime(agenda_index)
+                        if start_datetime is None:
+                            logging.warning(
+                                f"agenda_id: {agenda_id} has no startTime in AgendaTree from url: {sliq_link}."
                             )
+                            continue
+                        hearing_data["session_datetime"] = start_datetime
 
-                            # the first agenda item in the tree might not contain a timestamp so we need to iterate
-                            # the agenda tree until we find the first occurence of startTime
-                            first_agenda_item_datetime_str = next(
-                                a["startTime"]
-                                for a in event_info_json
-                                if a["startTime"]
-                            ).split(".", 1)[0]
-                            first_agenda_item_time = datetime.strptime(
-                                first_agenda_item_datetime_str, "%Y-%m-%dT%H:%M:%S"
-                            ).time()
-
-                            start_datetime_str = event_info_json[agenda_index][
-                                "startTime"
-                            ].split(".", 1)[0]
-                            start_datetime = datetime.strptime(
-                                start_datetime_str, "%Y-%m-%dT%H:%M:%S"
-                            )
-                            hearing_data["session_datetime"] = start_datetime
-
-                            end_time = None
-                            agenda_len = len(event_info_json)
-
-                            # Occasionally the timestamps will be the same for various agenda items, i.e., the hearings for
-                            # two different bills share the same timestamp. In the 2021 legislative session, out of 1312 bills,
-                            # this only happened with 13 hearings. This loggingic jumps to the next timestamp if the one directly
-                            # after the one the agenda item is targeting is the same, and keeps going until it finds a different
-                            # timestamp.
-                            for i in range(1, agenda_len + 1):
-                                if agenda_len > agenda_index + i:
-                                    end_datetime_str = event_info_json[
-                                        agenda_index + i
-                                    ]["startTime"].split(".", 1)[0]
-                                    end_time = datetime.strptime(
-                                        end_datetime_str, "%Y-%m-%dT%H:%M:%S"
-                                    ).time()
-
-                                if end_time == start_datetime.time():
-                                    continue
-                                else:
-                                    break
-
-                            hearing_data["start_time"] = str(
-                                datetime.combine(date.min, start_datetime.time())
-                                - datetime.combine(date.min, first_agenda_item_time)
+                        end_time = agenda.end_time(agenda_index)
+                        # The last agenda item has no end until the next item is timestamped,
+                        # an event can't be created for it yet so the link stays pending
+                        if end_time is None:
+                            logging.info(
+                                f"[{bill.type_number}] agenda_id: {agenda_id} has no end time yet in {sliq_link}, no events will be ingested."
                             )
-                            if end_time is not None:
-                                hearing_data["end_time"] = str(
-                                    datetime.combine(date.min, end_time)
-                                    - datetime.combine(date.min, first_agenda_item_time)
+                            continue
+
+                        hearing_data["start_time"] = str(
+                            datetime.combine(date.min, start_datetime.time())
+                            - datetime.combine(date.min, first_agenda_item_time)
+                        )
+                        hearing_data["end_time"] = str(
+                            datetime.combine(date.min, end_time)
+                            - datetime.combine(date.min, first_agenda_item_time)
+                        )
+
+                        if media_probe is not None:
+                            media = media_probe.probe(hearing_data["video_uri"])
+                            if not media.reachable and media_probe.drop_unreachable:
+                                logging.warning(
+                                    f"[{bill.type_number}] Media of {sliq_link} is unreachable, no events will be ingested."
                                 )
+                                continue
 
-                            last_link_added = True
-                            event_data.append(hearing_data)
+                        if hearing_index is None:
+                            hearing_index = len(hearings)
+                            hearings.append(hearing_data)
+                            metrics.count("hearings_found")
                         else:
-                            logging.info(
-                                f"[{bill.type_number}] agendaId not found in {sliq_link}, no events will be ingested."
-                            )
+                            # The video replaces the audio added for this action
+                            hearings[hearing_index] = hearing_data
+                    else:
+                        logging.info(
+                            f"[{bill.type_number}] agendaId not found in {sliq_link}, no events will be ingested."
+                        )
+
+            if hearing_index is not None:
+                newly_resolved_links.extend(sliq_links)
             else:
+                pending_links.extend(sliq_links)
+                if unresolved_links is not None:
+                    unresolved_links.extend(sliq_links)
+        else:
+            # Hearings after the gather window can still be ingested by a later run.
+            if not is_hearing_before_specified_end:
+                pending_links.extend(action_row.sliq_links)
+            logging.info(
+                f"[{bill.type_number}] No hearing in {from_dt} and {to_dt}, no events will be ingested."
+            )
+
+    if state is not None:
+        state.update(bill.get_key(), fingerprint, newly_resolved_links, pending_links)
+
+    return hearings
+
+
+def create_ingestion_model(e: dict) -> Optional["EventIngestionModel"]:
+    """Convert the hearing data to an EventIngestionModel, or None if it is incomplete."""
+    from cdp_backend.pipeline.ingestion_models import Body
+    from cdp_backend.pipeline.ingestion_models import EventIngestionModel
+    from cdp_backend.pipeline.ingestion_models import Session
+
+    try:
+        return EventIngestionModel(
+            body=Body(name=e["title"]),
+            sessions=[
+                Session(
+                    video_uri=e["video_uri"],
+                    video_start_time=e["start_time"],
+                    video_end_time=e["end_time"],
+                    session_datetime=e["session_datetime"],
+                    session_index=0,
+                ),
+            ],
+            external_source_id=e["external_source_id"],
+        )
+    except Exception as exc:
+        logging.warning(
+            f"Unable to format event data to EventIngestionModel from: {e}",
+            exc_info=exc,
+        )
+
+
+def map_in_order(
+    func: Callable[[T], R], items: Iterable[T], max_workers: int
+) -> Iterator[R]:
+    """
+    Like map, but calls func on up to max_workers items concurrently.
+
+    The results are yielded in the order of the items. At most twice max_workers items
+    are in flight at any time, so results don't pile up when the consumer is slower
+    than the workers.
+    """
+    if max_workers <= 1:
+        yield from map(func, items)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight: Deque[Future] = deque()
+        for item in items:
+            in_flight.append(executor.submit(func, item))
+            if len(in_flight) >= 2 * max_workers:
+                yield in_flight.popleft().result()
+
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def iter_events(
+    from_dt: datetime,
+    to_dt: datetime,
+    **kwargs,
+) -> Iterator["EventIngestionModel"]:
+    """
+    Yield the events for the provided timespan as soon as each one is scraped.
+
+    The events are yielded in the same order as get_events returns them, but the
+    caller can start processing the first hearing while the remaining bills are
+    scraped, and the scraped events don't have to be held in memory.
+
+    Parameters
+    ----------
+    from_dt: datetime
+        Datetime to start event gather from.
+    to_dt: datetime
+        Datetime to end event gather at.
+    **kwargs
+        Overrides for the scraper options, see ScraperConfig.
+
+    Yields
+    ------
+    event: EventIngestionModel
+        Each event gathered that occured in the provided time range.
+
+    Notes
+    -----
+    The gather state (see ScraperConfig.state_file) is only saved once all events were
+    yielded, so stopping early doesn't mark the events that weren't yielded as ingested.
+    The same goes for the metrics summary, which is logged (and appended to
+    ScraperConfig.metrics_file) at the end of the run.
+    """
+
+    logging.info("Starting MT Legislature Scraper.")
+
+    config = load_scraper_config(**kwargs)
+    metrics = RunMetrics()
+
+    profiler = None
+    if config.profile_file is not None:
+        # cProfile only sees the thread it is enabled in
+        if config.max_workers > 1:
+            logging.warning("Profiling the scraper with max_workers=1.")
+            config = replace(config, max_workers=1)
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    sessions = list(dict.fromkeys(config.sessions))
+    from_date = from_dt.date() if from_dt is not None else date.min
+    to_date = to_dt.date() if to_dt is not None else date.max
+    catalog = Catalog(config.catalog_file) if config.catalog_file is not None else None
+    scopes = [
+        get_scope(session, config.shard_index, config.shard_count)
+        for session in sessions
+    ]
+    http_metrics = None
+
+    def crawl(
+        s: requests.Session,
+        state: Optional[GatherState],
+        ingested: Optional[IngestedSourceIds],
+        media_probe: Optional[MediaProbe],
+    ) -> Iterator[dict]:
+        # The bill lists of the sessions are loaded concurrently, then the bills of all
+        # sessions are scraped by the same workers, sharing the connections and caches.
+        bills = [
+            bill
+            for session_bills in map_in_order(
+                lambda session: get_session_bills(s, session, metrics),
+                sessions,
+                config.max_workers,
+            )
+            for bill in session_bills
+        ]
+        if config.prune_by_last_action:
+            bills = prune_bills(bills, from_dt)
+        bills = shard_bills(bills, config.shard_index, config.shard_count)
+        metrics.count("bills", len(bills))
+
+        sliq_pages = SliqPageCache(s, metrics)
+        failed_bills = []
+        # The links of the hearings in the window that are still pending, e.g. dropped
+        # by the media probe, which a later run has to scrape again
+        unresolved_links = []
+
+        # Go to each LAWS bill URL and find bill actions that have associated recordings.
+        # The bills are fetched concurrently but the results are yielded in the order of
+        # the bills so that the events are the same as a sequential run.
+        def gather(bill: Bill) -> List[dict]:
+            try:
+                return get_bill_hearings(
+                    s,
+                    bill,
+                    from_dt,
+                    to_dt,
+                    sliq_pages=sliq_pages,
+                    state=state,
+                    ingested=ingested,
+                    media_probe=media_probe,
+                    metrics=metrics,
+                    unresolved_links=unresolved_links,
+                )
+            except requests.RequestException as e:
+                # A page of this bill that still fails after the retries, or answers
+                # with an error status, fails the bill: its gather state isn't updated
+                # so it is tried again on the next run, and the window isn't recorded
+                # as scraped in the catalog.
+                logging.error(
+                    f"[{bill.type_number}] Failed to gather hearings, no events will be ingested: {e}"
+                )
+                metrics.count("bills_failed")
+                failed_bills.append(bill)
+                return []
+
+        for bill, hearings in zip(
+            bills, map_in_order(gather, bills, config.max_workers)
+        ):
+            if catalog is not None:
+                with metrics.span("catalog_upsert"):
+                    catalog.upsert_bill(
+                        bill.get_key(),
+                        bill.get_session(),
+                        bill.type_number,
+                        bill.short_title,
+                        bill.action_url_path,
+                        bill.last_action_date,
+                        hearings,
+                    )
+            yield from hearings
+
+        sliq_pages.log_stats()
+        # A window is only answered from the catalog if every bill was scraped and
+        # every hearing in it was turned into an event
+        if catalog is not None and not failed_bills and not unresolved_links:
+            for scope in scopes:
+                catalog.record_scrape(scope, from_date, to_date)
+        elif catalog is not None:
+            logging.info(
+                f"{len(failed_bills)} bills failed and {len(unresolved_links)} recordings are pending, the window won't be answered from the catalog."
+            )
+
+    def from_catalog(
+        state: Optional[GatherState],
+        ingested: Optional[IngestedSourceIds],
+        media_probe: Optional[MediaProbe],
+    ) -> Iterator[dict]:
+        logging.info(
+            f"The catalog covers {from_date} to {to_date}, the bills are not requested again."
+        )
+        with metrics.span("catalog_query"):
+            catalog_hearings = catalog.get_hearings(sessions, from_date, to_date)
+        for bill_key, type_number, hearing in catalog_hearings:
+            # The catalog can be shared by the runs of several shards
+            if config.shard_count > 1 and config.shard_index != get_bill_shard(
+                Bill(type_number, "", ""), config.shard_count
+            ):
+                continue
+
+            # The hearings are dropped like get_bill_hearings drops them when crawling
+            sliq_link = hearing["external_source_id"]
+            if state is not None and sliq_link in state.resolved_links(bill_key):
+                continue
+            if ingested is not None and sliq_link in ingested:
                 logging.info(
-                    f"[{bill.type_number}] No hearing in {from_dt} and {to_dt}, no events will be ingested."
+                    f"[{type_number}] Recording {sliq_link} is already in the database, no events will be ingested."
+                )
+                if state is not None:
+                    state.resolve(bill_key, [sliq_link])
+                continue
+            if media_probe is not None:
+                media = media_probe.probe(hearing["video_uri"])
+                if not media.reachable and media_probe.drop_unreachable:
+                    logging.warning(
+                        f"[{type_number}] Media of {sliq_link} is unreachable, no events will be ingested."
+                    )
+                    continue
+
+            if state is not None:
+                state.resolve(bill_key, [sliq_link])
+            yield hearing
+
+    with create_session(config) as s:
+        state = (
+            GatherState.load(config.state_file)
+            if config.state_file is not None
+            else None
+        )
+        ingested = None
+        if config.ingested_source_ids is not None:
+            try:
+                ingested = load_ingested_source_ids(config.ingested_source_ids, s)
+            except Exception as e:
+                # Transcribing a hearing twice is better than missing it
+                logging.warning(
+                    f"Unable to load the ingested external source ids, already ingested hearings won't be dropped: {e}"
                 )
+        media_probe = (
+            MediaProbe(s, metrics, drop_unreachable=config.drop_unreachable_media)
+            if config.probe_media
+            else None
+        )
+
+        if catalog is not None and all(
+            catalog.covers(scope, from_date, to_date, config.catalog_max_age)
+            for scope in scopes
+        ):
+            hearings = from_catalog(state, ingested, media_probe)
+        else:
+            hearings = crawl(s, state, ingested, media_probe)
 
-    def create_ingestion_model(e):
         try:
-            return EventIngestionModel(
-                body=Body(name=e["title"]),
-                sessions=[
-                    Session(
-                        video_uri=e["video_uri"],
-                        video_start_time=e["start_time"],
-                        video_end_time=e["end_time"],
-                        session_datetime=e["session_datetime"],
-                        session_index=0,
-                    ),
-                ],
-                external_source_id=e["external_source_id"],
-            )
-        except Exception as exc:
-            logging.warning(
-                f"Unable to format event data to EventIngestionModel from: {e}",
-                exc_info=exc,
-            )
+            for hearing in hearings:
+                with metrics.span("create_ingestion_model"):
+                    event = create_ingestion_model(hearing)
+                if event is None:
+                    metrics.count("events_dropped")
+                    continue
+                metrics.count("events")
+                yield event
+        finally:
+            if catalog is not None:
+                catalog.close()
+
+        if media_probe is not None:
+            media_probe.log_stats()
+        adapter = s.get_adapter(LAWS_2023_ROOT_URL)
+        if isinstance(adapter, RecordingHTTPAdapter):
+            adapter = adapter.adapter
+        if isinstance(adapter, CachingHTTPAdapter):
+            adapter.log_stats()
+        if isinstance(adapter, ThrottledHTTPAdapter):
+            http_metrics = adapter.metrics
+            http_metrics.log_stats()
+
+    if state is not None:
+        state.save(config.state_file)
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(config.profile_file)
+        logging.info(f"Wrote profile to {config.profile_file}.")
+
+    summary = metrics.summary(http_metrics)
+    logging.info(format_summary(summary))
+    if config.metrics_file is not None:
+        append_metrics_file(config.metrics_file, summary)
 
-    events = [
-        event for event in map(create_ingestion_model, event_data) if event is not None
-    ]
+
+def get_events(
+    from_dt: datetime,
+    to_dt: datetime,
+    **kwargs,
+) -> List["EventIngestionModel"]:
+    """
+    Get all events for the provided timespan.
+
+    Parameters
+    ----------
+    from_dt: datetime
+        Datetime to start event gather from.
+    to_dt: datetime
+        Datetime to end event gather at.
+    **kwargs
+        Overrides for the scraper options, see ScraperConfig.
+
+    Returns
+    -------
+    events: List[EventIngestionModel]
+        All events gathered that occured in the provided time range.
+
+    Notes
+    -----
+    As the implementer of the get_events function, you can choose to ignore
+    the from_dt and to_dt parameters. However, they are useful for manually
+    kicking off pipelines from GitHub Actions UI.
+    """
+    events = list(iter_events(from_dt, to_dt, **kwargs))
     logging.info(f"Found {len(events)} to be ingested.")
 
     for i, e in enumerate(events):
@@ -313,6 +834,31 @@ def get_events(
     return events
 
 
+def write_events_ndjson(events: Iterable["EventIngestionModel"], open_resource) -> int:
+    """
+    Write the events as newline delimited JSON, one event per line, as they come.
+
+    Parameters
+    ----------
+    events: Iterable[EventIngestionModel]
+        The events, e.g. from iter_events.
+    open_resource
+        The text file to write to, e.g. sys.stdout.
+
+    Returns
+    -------
+    n_events: int
+        The number of events written.
+    """
+    n_events = 0
+    for event in events:
+        open_resource.write(event.to_json() + "\n")
+        # Let a reader of the output start on each event as soon as it is scraped
+        open_resource.flush()
+        n_events += 1
+    return n_events
+
+
 if __name__ == "__main__":
     import argparse
 
@@ -334,6 +880,43 @@ if __name__ == "__main__":
         ),
     )
 
+    parser.add_argument(
+        "-s",
+        "--sessions",
+        nargs="+",
+        help=(
+            "The LAWS codes of the sessions to scrape, e.g. 20211 20231. If not set"
+            " the sessions of the scraper config are used."
+        ),
+    )
+
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument(
+        "--record",
+        metavar="DIR",
+        help=(
+            "Save every LAWS and SLIQ response of the run to a compressed archive in"
+            " this directory."
+        ),
+    )
+    archive.add_argument(
+        "--replay",
+        metavar="DIR",
+        help=(
+            "Answer every request from the archive recorded in this directory, without"
+            " any network access."
+        ),
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        help=(
+            "Write the events to this path as newline delimited JSON as soon as each"
+            " one is scraped, or to stdout with -."
+        ),
+    )
+
     parser.add_argument(
         "--log", help="Sets the logging level, e.g. INFO, DEBUG; see logging module."
     )
@@ -365,4 +948,23 @@ if __name__ == "__main__":
 
     logging.debug(f"Using arguments: from_dt={from_dt}, to_dt={to_dt}")
 
-    get_events(from_dt, to_dt)
+    kwargs = {}
+    if args.sessions is not None:
+        kwargs["sessions"] = args.sessions
+    if args.record is not None:
+        kwargs["record_dir"] = args.record
+    if args.replay is not None:
+        kwargs["replay_dir"] = args.replay
+
+    if args.output is None:
+        get_events(from_dt, to_dt, **kwargs)
+    elif args.output == "-":
+        import sys
+
+        write_events_ndjson(iter_events(from_dt, to_dt, **kwargs), sys.stdout)
+    else:
+        with open(args.output, "w") as open_resource:
+            n_events = write_events_ndjson(
+                iter_events(from_dt, to_dt, **kwargs), open_resource
+            )
+        logging.info(f"Wrote {n_events} events to {args.output}.")
@@ -1,8 +1,85 @@
 from betamax.fixtures import unittest
 from bs4 import BeautifulSoup
+from datetime import date, datetime
 import logging
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from unittest import mock
+
+import requests
 
 import cdp_montana_legislature_backend.scraper as scraper
+from cdp_montana_legislature_backend import media
+from cdp_montana_legislature_backend.archive import RecordingHTTPAdapter
+from cdp_montana_legislature_backend.ingested import IngestedSourceIds
+from cdp_montana_legislature_backend.state import GatherState
+
+SLIQ_VIDEO_URL = "https://sg001-harmony.sliq.net/00309/Harmony/en/PowerBrowser/PowerBrowserV2/20230117/-1/47163"
+
+BILL_ACTIONS_HTML = f"""<html>
+<table>
+<tr><td><b>Action</b></td><td><b>Date</b></td><td><b>Votes</b></td><td><b>Committee</b></td></tr>
+<tr><td>(H) Hearing</td><td>01/17/2023</td><td></td><td>(H) Appropriations <a href="{SLIQ_VIDEO_URL}?agendaId=242339"><img src="video.png"></a></td></tr>
+<tr><td>(H) Hearing</td><td>01/18/2023</td><td></td><td>(H) Judiciary <a href="{SLIQ_VIDEO_URL}"><img src="video.png"></a></td></tr>
+<tr><td>(H) Introduced</td><td>01/03/2023</td><td></td><td></td></tr>
+</table>
+</html>"""
+
+SLIQ_HTML = """<script>
+    var downloadMediaUrls = [{"Url":"https://sg001-harmony.sliq.net/00309/Harmony/video.mp4","AudioOnly":false}];
+    var options = {
+        AgendaTree:[{"id":"A1","startTime":null},{"id":"A2","startTime":"2023-01-17T08:00:00.000"},{"id":"A242339","startTime":"2023-01-17T08:10:00.000"},{"id":"A4","startTime":"2023-01-17T08:10:00.000"},{"id":"A5","startTime":"2023-01-17T08:30:00.500"}],
+        Other: 1
+    };
+</script>"""
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.content = text.encode("utf-8")
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """Serves the bill actions page and SLIQ page above and records the requests."""
+
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url: str):
+        self.urls.append(url)
+        return FakeResponse(SLIQ_HTML if "sliq" in url else BILL_ACTIONS_HTML)
+
+
+class FakeAdapter(requests.adapters.BaseAdapter):
+    """Serves the bill list, bill actions page and SLIQ page above."""
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.status_code = 200
+        if "return_all_bills" in request.url:
+            text = (
+                "<body><table></table><table><tr></tr>"
+                '<tr><td><a href="LAW0210W$BSIV.ActionQuery?P_BILL_NO1=2&P_BLTP_BILL_TYP_CD=HB&Z_ACTION=Find&P_SESS=20231">HB 2</a></td><td>Bill 2</td></tr>'
+                "</table></body>"
+            )
+        else:
+            text = SLIQ_HTML if "sliq" in request.url else BILL_ACTIONS_HTML
+        response._content = text.encode("utf-8")
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
 
 
 class ScraperTestCase(unittest.BetamaxTestCase):
@@ -75,3 +152,520 @@ class ScraperTestCase(unittest.BetamaxTestCase):
             "Feed bill to fund 68th legislative session and prepare for 2025",
             bill.short_title,
         )
+
+    def test_row_to_bill_returns_bill_with_expected_last_action_date(self):
+        html = BeautifulSoup(
+            '<tr>\n<td><a href="LAW0210W$BSIV.ActionQuery?P_BILL_NO1=1&P_BLTP_BILL_TYP_CD=HB&Z_ACTION=Find&P_SESS=20231">HB 1</a></td>\n<td>LC0001</td>\n<td>|Llew  Jones&nbsp;(R) HD 18</td>\n<td>|(S) 3rd Reading Concurred</td>\n<td>01/17/2023</td>\n<td>Feed bill to fund 68th legislative session and prepare for 2025</td>\n</tr>',
+            features="html.parser",
+        )
+        bill = scraper.row_to_bill(next(html.children))  # type: ignore
+        self.assertEqual(date(2023, 1, 17), bill.last_action_date)
+
+    def test_row_to_bill_parses_last_action_date_of_scheduled_hearing(self):
+        html = BeautifulSoup(
+            '<tr>\n<td><a href="LAW0210W$BSIV.ActionQuery?P_BILL_NO1=2&P_BLTP_BILL_TYP_CD=HB&Z_ACTION=Find&P_SESS=20231">HB 2</a></td>\n<td>LC0002</td>\n<td>|Llew  Jones&nbsp;(R) HD 18</td>\n<td>|(H) Hearing -- (H) Joint Appropriations Subcommittee on General Government</td>\n<td>01/23/2023; 09:00 AM, Rm 350</td>\n<td>General Appropriations Act</td>\n</tr>',
+            features="html.parser",
+        )
+        bill = scraper.row_to_bill(next(html.children))  # type: ignore
+        self.assertEqual(date(2023, 1, 23), bill.last_action_date)
+
+    def test_prune_bills_removes_bills_without_action_in_window(self):
+        bills = [
+            scraper.Bill("HB 1", "", "", date(2023, 1, 9)),
+            scraper.Bill("HB 2", "", "", date(2023, 1, 10)),
+            scraper.Bill("HB 3", "", "", None),
+        ]
+        pruned_bills = scraper.prune_bills(bills, datetime(2023, 1, 10, 12))
+        self.assertEqual(["HB 2", "HB 3"], [b.type_number for b in pruned_bills])
+
+    def test_shard_bills_partitions_bills(self):
+        bills = [scraper.Bill(f"HB {i}", "", "") for i in range(1, 101)]
+        shards = [scraper.shard_bills(bills, i, 4) for i in range(4)]
+
+        self.assertEqual(
+            sorted(b.type_number for b in bills),
+            sorted(b.type_number for shard in shards for b in shard),
+        )
+        self.assertTrue(all(shard for shard in shards))
+        # the shard of a bill doesn't depend on the other bills
+        self.assertEqual(shards[1][:1], scraper.shard_bills(shards[1][:1], 1, 4))
+
+    def test_get_events_concurrent_matches_sequential_order(self):
+        html = (
+            "<body><table></table><table><tr></tr>"
+            + "".join(
+                f'<tr><td><a href="LAW0210W$BSIV.ActionQuery?P_BILL_NO1={i}&P_BLTP_BILL_TYP_CD=HB&Z_ACTION=Find&P_SESS=20231">HB {i}</a></td><td>Bill {i}</td></tr>'
+                for i in range(1, 21)
+            )
+            + "</table></body>"
+        )
+
+        def get_bill_hearings(s, bill, from_dt, to_dt, **kwargs):
+            # finish the bills out of order
+            time.sleep(random.uniform(0, 0.01))
+            return [
+                {
+                    "title": f"{bill.type_number} - Hearing {i}",
+                    "video_uri": "https://sg001-harmony.sliq.net/00309/Harmony/video.mp4",
+                    "external_source_id": f"https://sg001-harmony.sliq.net/{bill.type_number}/{i}",
+                    "session_datetime": datetime(2023, 1, 17, 8, 0),
+                    "start_time": "0:00:00",
+                    "end_time": "0:10:00",
+                }
+                for i in range(2)
+            ]
+
+        with mock.patch.object(
+            scraper, "get_laws_all_bills_text", return_value=html
+        ), mock.patch.object(
+            scraper, "get_bill_hearings", side_effect=get_bill_hearings
+        ):
+            sequential = scraper.get_events(datetime.min, datetime.max, max_workers=1)
+            concurrent = scraper.get_events(datetime.min, datetime.max, max_workers=4)
+
+        self.assertEqual(40, len(sequential))
+        self.assertEqual(
+            [e.external_source_id for e in sequential],
+            [e.external_source_id for e in concurrent],
+        )
+
+    def test_get_events_scrapes_all_sessions(self):
+        def get_laws_all_bills_text(s, url, metrics=None):
+            session = url.split("P_SESS=")[1]
+            return (
+                "<body><table></table><table><tr></tr>"
+                + "".join(
+                    f'<tr><td><a href="LAW0210W$BSIV.ActionQuery?P_BILL_NO1={i}&P_BLTP_BILL_TYP_CD=HB&Z_ACTION=Find&P_SESS={session}">HB {i}</a></td><td>Bill {i}</td></tr>'
+                    for i in range(1, 4)
+                )
+                + "</table></body>"
+            )
+
+        def get_bill_hearings(s, bill, from_dt, to_dt, **kwargs):
+            return [
+                {
+                    "title": f"{bill.type_number} - Hearing",
+                    "video_uri": "https://sg001-harmony.sliq.net/00309/Harmony/video.mp4",
+                    "external_source_id": bill.get_key(),
+                    "session_datetime": datetime(2023, 1, 17, 8, 0),
+                    "start_time": "0:00:00",
+                    "end_time": "0:10:00",
+                }
+            ]
+
+        with mock.patch.object(
+            scraper, "get_laws_all_bills_text", side_effect=get_laws_all_bills_text
+        ), mock.patch.object(
+            scraper, "get_bill_hearings", side_effect=get_bill_hearings
+        ):
+            events = scraper.get_events(
+                datetime.min, datetime.max, sessions=["20211", "20231"], max_workers=4
+            )
+
+        self.assertEqual(
+            [
+                f"{session} HB {i}"
+                for session in ["20211", "20231"]
+                for i in range(1, 4)
+            ],
+            [e.external_source_id for e in events],
+        )
+
+    def test_get_events_answers_scraped_window_from_catalog(self):
+        html = (
+            "<body><table></table><table><tr></tr>"
+            '<tr><td><a href="LAW0210W$BSIV.ActionQuery?P_BILL_NO1=2&P_BLTP_BILL_TYP_CD=HB&Z_ACTION=Find&P_SESS=20231">HB 2</a></td><td>Bill 2</td></tr>'
+            "</table></body>"
+        )
+
+        def get_bill_hearings(s, bill, from_dt, to_dt, **kwargs):
+            return [
+                {
+                    "title": f"{bill.type_number} - Hearing {day}",
+                    "video_uri": "https://sg001-harmony.sliq.net/00309/Harmony/video.mp4",
+                    "external_source_id": f"{SLIQ_VIDEO_URL}?agendaId={day}",
+                    "session_datetime": datetime(2023, 1, day, 8, 0),
+                    "start_time": "0:00:00",
+                    "end_time": "0:10:00",
+                }
+                for day in range(17, 20)
+                if from_dt.date() <= date(2023, 1, day) <= to_dt.date()
+            ]
+
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(
+            scraper, "get_laws_all_bills_text", return_value=html
+        ), mock.patch.object(
+            scraper, "get_bill_hearings", side_effect=get_bill_hearings
+        ) as mock_get_bill_hearings:
+            catalog_file = os.path.join(tmp_dir, "catalog.sqlite")
+            scraped = scraper.get_events(
+                datetime(2023, 1, 1), datetime(2023, 1, 31), catalog_file=catalog_file
+            )
+            from_catalog = scraper.get_events(
+                datetime(2023, 1, 18), datetime(2023, 1, 18), catalog_file=catalog_file
+            )
+            self.assertEqual(1, mock_get_bill_hearings.call_count)
+
+            # A window outside of the scraped one is scraped again
+            scraper.get_events(
+                datetime(2023, 1, 18), datetime(2023, 2, 28), catalog_file=catalog_file
+            )
+            self.assertEqual(2, mock_get_bill_hearings.call_count)
+
+        self.assertEqual(3, len(scraped))
+        self.assertEqual(
+            [f"{SLIQ_VIDEO_URL}?agendaId=18"],
+            [e.external_source_id for e in from_catalog],
+        )
+        self.assertEqual(scraped[1], from_catalog[0])
+
+    def test_get_events_from_catalog_drops_ingested_hearings(self):
+        # The window of the hearing with an agendaId, the other one is still pending
+        from_dt, to_dt = datetime(2023, 1, 17), datetime(2023, 1, 17, 23, 59)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            catalog_file = os.path.join(tmp_dir, "catalog.sqlite")
+            state_file = os.path.join(tmp_dir, "gather-state.json")
+            ingested_file = os.path.join(tmp_dir, "ingested.json")
+            with open(ingested_file, "w") as open_resource:
+                json.dump([], open_resource)
+
+            def create_session(config):
+                s = requests.Session()
+                s.mount("https://", FakeAdapter())
+                return s
+
+            def get_events():
+                return scraper.get_events(
+                    from_dt,
+                    to_dt,
+                    catalog_file=catalog_file,
+                    ingested_source_ids=ingested_file,
+                )
+
+            with mock.patch.object(scraper, "create_session", create_session):
+                scraped = get_events()
+                # The hearing was ingested since the window was scraped
+                self.assertEqual(1, len(scraped))
+                with open(ingested_file, "w") as open_resource:
+                    json.dump([scraped[0].external_source_id], open_resource)
+                with mock.patch.object(
+                    scraper, "get_bill_hearings"
+                ) as mock_get_bill_hearings:
+                    self.assertEqual([], get_events())
+                    self.assertEqual(0, mock_get_bill_hearings.call_count)
+
+                    # A hearing answered from the catalog is resolved in the gather state
+                    kwargs = dict(catalog_file=catalog_file, state_file=state_file)
+                    from_catalog = scraper.get_events(from_dt, to_dt, **kwargs)
+                    again = scraper.get_events(from_dt, to_dt, **kwargs)
+                    self.assertEqual(0, mock_get_bill_hearings.call_count)
+
+        self.assertEqual(scraped, from_catalog)
+        self.assertEqual([], again)
+
+    def test_get_events_doesnt_answer_window_with_pending_hearings_from_catalog(self):
+        def create_session(config):
+            s = requests.Session()
+            s.mount("https://", FakeAdapter())
+            return s
+
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(
+            scraper, "create_session", create_session
+        ), mock.patch.object(
+            scraper, "get_bill_hearings", wraps=scraper.get_bill_hearings
+        ) as mock_get_bill_hearings:
+            catalog_file = os.path.join(tmp_dir, "catalog.sqlite")
+            for _ in range(2):
+                scraper.get_events(
+                    datetime.min, datetime.max, catalog_file=catalog_file
+                )
+
+        # The hearing of 01/18 has no agendaId yet, so the window is scraped again
+        self.assertEqual(2, mock_get_bill_hearings.call_count)
+
+    def test_get_events_fails_bill_with_error_response(self):
+        class UnavailableActionsAdapter(FakeAdapter):
+            def send(self, request, **kwargs):
+                response = super().send(request, **kwargs)
+                if "ActionQuery" in request.url:
+                    response.status_code = 503
+                    response._content = b"<html>Service Unavailable</html>"
+                return response
+
+        def create_session(adapter):
+            s = requests.Session()
+            s.mount("https://", adapter)
+            return s
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            catalog_file = os.path.join(tmp_dir, "catalog.sqlite")
+            with mock.patch.object(
+                scraper,
+                "create_session",
+                lambda config: create_session(UnavailableActionsAdapter()),
+            ):
+                failed = scraper.get_events(
+                    datetime.min, datetime.max, catalog_file=catalog_file
+                )
+            # The window isn't answered from the catalog, the bill is scraped again
+            with mock.patch.object(
+                scraper, "create_session", lambda config: create_session(FakeAdapter())
+            ):
+                scraped = scraper.get_events(
+                    datetime.min, datetime.max, catalog_file=catalog_file
+                )
+
+        self.assertEqual([], failed)
+        self.assertEqual(
+            [f"{SLIQ_VIDEO_URL}?agendaId=242339"],
+            [e.external_source_id for e in scraped],
+        )
+
+    def test_bill_key_includes_session(self):
+        self.assertEqual("20231", self.get_bill().get_session())
+        self.assertEqual("20231 HB 2", self.get_bill().get_key())
+        self.assertEqual("HB 2", scraper.Bill("HB 2", "", "").get_key())
+
+    def get_bill(self) -> scraper.Bill:
+        return scraper.Bill(
+            "HB 2",
+            "General Appropriations Act",
+            "LAW0210W$BSIV.ActionQuery?P_BILL_NO1=2&P_BLTP_BILL_TYP_CD=HB&Z_ACTION=Find&P_SESS=20231",
+        )
+
+    def test_get_bill_hearings_returns_hearing_with_timestamps(self):
+        hearings = scraper.get_bill_hearings(
+            FakeSession(), self.get_bill(), datetime.min, datetime.max
+        )
+        self.assertEqual(1, len(hearings))
+        self.assertEqual(
+            {
+                "title": "HB 2 - (H) Hearing - (H) Appropriations",
+                "video_uri": "https://sg001-harmony.sliq.net/00309/Harmony/video.mp4",
+                "external_source_id": f"{SLIQ_VIDEO_URL}?agendaId=242339",
+                "session_datetime": datetime(2023, 1, 17, 8, 10),
+                "start_time": "0:10:00",
+                "end_time": "0:30:00",
+            },
+            hearings[0],
+        )
+
+    def test_get_bill_hearings_filters_by_hearing_date(self):
+        hearings = scraper.get_bill_hearings(
+            FakeSession(),
+            self.get_bill(),
+            datetime(2023, 1, 18),
+            datetime(2023, 1, 31),
+        )
+        self.assertEqual([], hearings)
+
+    def test_get_bill_hearings_skips_bills_unchanged_since_last_run(self):
+        state = GatherState()
+        scraper.get_bill_hearings(
+            FakeSession(), self.get_bill(), datetime.min, datetime.max, state=state
+        )
+        # The hearing without an agendaId is still pending
+        s = FakeSession()
+        hearings = scraper.get_bill_hearings(
+            s, self.get_bill(), datetime.min, datetime.max, state=state
+        )
+        self.assertEqual([], hearings)
+        self.assertEqual([SLIQ_VIDEO_URL], s.urls[1:])
+
+        # Once nothing is pending the SLIQ pages aren't requested anymore
+        state.update("20231 HB 2", state._bills["20231 HB 2"]["fingerprint"], [], [])
+        s = FakeSession()
+        hearings = scraper.get_bill_hearings(
+            s, self.get_bill(), datetime.min, datetime.max, state=state
+        )
+        self.assertEqual([], hearings)
+        self.assertEqual(1, len(s.urls))
+
+    def test_get_bill_hearings_keeps_last_agenda_item_pending(self):
+        class LastAgendaItemSession(FakeSession):
+            def get(self, url: str):
+                response = super().get(url)
+                if "sliq" not in url:
+                    response = FakeResponse(
+                        response.text.replace("agendaId=242339", "agendaId=5")
+                    )
+                return response
+
+        state = GatherState()
+        hearings = scraper.get_bill_hearings(
+            LastAgendaItemSession(),
+            self.get_bill(),
+            datetime.min,
+            datetime.max,
+            state=state,
+        )
+
+        # The hearing has no end time until the next agenda item is timestamped
+        self.assertEqual([], hearings)
+        self.assertEqual(set(), state.resolved_links("20231 HB 2"))
+        self.assertIn(
+            f"{SLIQ_VIDEO_URL}?agendaId=5", state._bills["20231 HB 2"]["pending"]
+        )
+
+    def test_get_bill_hearings_drops_ingested_hearings(self):
+        s = FakeSession()
+        hearings = scraper.get_bill_hearings(
+            s,
+            self.get_bill(),
+            datetime.min,
+            datetime.max,
+            ingested=IngestedSourceIds([f"{SLIQ_VIDEO_URL}?agendaId=242339"]),
+        )
+        self.assertEqual([], hearings)
+        # The SLIQ page of the ingested hearing isn't requested
+        self.assertEqual([SLIQ_VIDEO_URL], s.urls[1:])
+
+    def test_get_bill_hearings_drops_unreachable_media(self):
+        video_uri = "https://sg001-harmony.sliq.net/00309/Harmony/video.mp4"
+        state = GatherState()
+        media_probe = media.MediaProbe(FakeSession())
+        with mock.patch.object(
+            media,
+            "probe_media",
+            return_value=media.MediaInfo(video_uri, False, 404, error="Status 404"),
+        ) as mock_probe_media:
+            hearings = scraper.get_bill_hearings(
+                FakeSession(),
+                self.get_bill(),
+                datetime.min,
+                datetime.max,
+                state=state,
+                media_probe=media_probe,
+            )
+
+        self.assertEqual([], hearings)
+        self.assertEqual(1, mock_probe_media.call_count)
+        # The recording is tried again on the next run
+        self.assertIn(
+            f"{SLIQ_VIDEO_URL}?agendaId=242339", state._bills["20231 HB 2"]["pending"]
+        )
+
+    def test_get_bill_hearings_flags_unreachable_media(self):
+        video_uri = "https://sg001-harmony.sliq.net/00309/Harmony/video.mp4"
+        media_probe = media.MediaProbe(FakeSession(), drop_unreachable=False)
+        with mock.patch.object(
+            media,
+            "probe_media",
+            return_value=media.MediaInfo(video_uri, False, 404, error="Status 404"),
+        ):
+            hearings = scraper.get_bill_hearings(
+                FakeSession(),
+                self.get_bill(),
+                datetime.min,
+                datetime.max,
+                media_probe=media_probe,
+            )
+
+        self.assertEqual(1, len(hearings))
+
+    def test_get_bill_hearings_keeps_audio_when_video_is_unreachable(self):
+        audio_link = f"{SLIQ_VIDEO_URL}?agendaId=242339&audio=1"
+        video_link = f"{SLIQ_VIDEO_URL}?agendaId=242339"
+        audio_uri = "https://sg001-harmony.sliq.net/00309/Harmony/audio.mp3"
+        video_uri = "https://sg001-harmony.sliq.net/00309/Harmony/video.mp4"
+
+        class AudioFirstSession(FakeSession):
+            def get(self, url: str):
+                self.urls.append(url)
+                if "audio=1" in url:
+                    return FakeResponse(
+                        SLIQ_HTML.replace(video_uri, audio_uri).replace(
+                            '"AudioOnly":false', '"AudioOnly":true'
+                        )
+                    )
+                if "sliq" in url:
+                    return FakeResponse(SLIQ_HTML)
+                return FakeResponse(
+                    BILL_ACTIONS_HTML.replace(
+                        f'<a href="{video_link}">',
+                        f'<a href="{audio_link}"></a><a href="{video_link}">',
+                    )
+                )
+
+        def probe_media(s, url):
+            if url == video_uri:
+                return media.MediaInfo(url, False, 404, error="Status 404")
+            return media.MediaInfo(url, True, 200)
+
+        with mock.patch.object(media, "probe_media", probe_media):
+            hearings = scraper.get_bill_hearings(
+                AudioFirstSession(),
+                self.get_bill(),
+                datetime.min,
+                datetime.max,
+                media_probe=media.MediaProbe(FakeSession()),
+            )
+
+        self.assertEqual(1, len(hearings))
+        self.assertEqual(audio_uri, hearings[0]["video_uri"])
+        self.assertEqual(audio_link, hearings[0]["external_source_id"])
+
+    def test_get_events_replays_recorded_run(self):
+        def create_session(config):
+            s = requests.Session()
+            s.mount("https://", RecordingHTTPAdapter(FakeAdapter(), config.record_dir))
+            return s
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with mock.patch.object(scraper, "create_session", create_session):
+                recorded = scraper.get_events(
+                    datetime.min, datetime.max, record_dir=tmp_dir, max_workers=1
+                )
+            # Nothing but the archive answers the requests of the replay
+            replayed = scraper.get_events(
+                datetime.min, datetime.max, replay_dir=tmp_dir, max_workers=1
+            )
+
+        self.assertEqual(1, len(recorded))
+        self.assertEqual(recorded, replayed)
+
+    def test_write_events_ndjson(self):
+        events = [
+            scraper.create_ingestion_model(
+                {
+                    "title": f"HB {i} - (H) Hearing",
+                    "video_uri": "https://sg001-harmony.sliq.net/00309/Harmony/video.mp4",
+                    "external_source_id": f"{SLIQ_VIDEO_URL}?agendaId={i}",
+                    "session_datetime": datetime(2023, 1, 17, 8, 0),
+                    "start_time": "0:00:00",
+                    "end_time": "0:10:00",
+                }
+            )
+            for i in range(3)
+        ]
+        output = io.StringIO()
+
+        self.assertEqual(3, scraper.write_events_ndjson(iter(events), output))
+        lines = output.getvalue().splitlines()
+        self.assertEqual(
+            [e.external_source_id for e in events],
+            [json.loads(line)["external_source_id"] for line in lines],
+        )
+
+    def test_map_in_order_keeps_order(self):
+        def slow_square(i):
+            time.sleep(random.uniform(0, 0.005))
+            return i * i
+
+        self.assertEqual(
+            [i * i for i in range(50)],
+            list(scraper.map_in_order(slow_square, range(50), max_workers=8)),
+        )
+
+    def test_map_in_order_bounds_items_in_flight(self):
+        pulled = []
+
+        def items():
+            for i in range(100):
+                pulled.append(i)
+                yield i
+
+        results = scraper.map_in_order(lambda i: i, items(), max_workers=4)
+        self.assertEqual(0, next(results))
+        self.assertLessEqual(len(pulled), 8)
+        results.close()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime, time
+import json
+import logging
+import re
+import threading
+from typing import Dict, Hashable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import requests
+
+from cdp_montana_legislature_backend.metrics import RunMetrics
+
+DOWNLOAD_MEDIA_URLS_PATTERN = re.compile("downloadMediaUrls = (.*);")
+AGENDA_TREE_PATTERN = re.compile("AgendaTree:(.*),")
+AGENDA_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def parse_agenda_time(start_time: str) -> datetime:
+    """Parse an agenda item startTime, e.g. "2023-01-17T08:00:05.123", ignoring fractions of seconds."""
+    return datetime.strptime(start_time.split(".", 1)[0], AGENDA_TIME_FORMAT)
+
+
+class AgendaIndex:
+    """
+    The AgendaTree of a SLIQ video, indexed for looking up the time range of an item.
+
+    The start times are parsed once, and the end time of every item is computed once, so
+    looking up the agenda item of each bill heard in the video doesn't have to scan and
+    parse the agenda tree again.
+
+    Parameters
+    ----------
+    agenda_tree: List[dict]
+        The AgendaTree JSON from the SLIQ page, each item with an "id" (e.g. "A242339")
+        and a "startTime" (e.g. "2023-01-17T08:00:05.123", or null if the item doesn't
+        have a timestamp).
+    """
+
+    def __init__(self, agenda_tree: List[dict]):
+        self.agenda_tree = agenda_tree
+
+        # The index of the first agenda item with a value (usually the "id") equal to the key
+        self._indices: Dict[Hashable, int] = {}
+        for i, item in enumerate(agenda_tree):
+            for value in item.values():
+                if isinstance(value, Hashable):
+                    self._indices.setdefault(value, i)
+
+        self._start_datetimes: List[Optional[datetime]] = [
+            parse_agenda_time(item["startTime"]) if item.get("startTime") else None
+            for item in agenda_tree
+        ]
+        # the first agenda item in the tree might not contain a timestamp so we need to find
+        # the first occurence of startTime
+        self.first_start_time: Optional[time] = next(
+            (dt.time() for dt in self._start_datetimes if dt is not None), None
+        )
+
+        # Occasionally the timestamps will be the same for various agenda items, i.e., the hearings for
+        # two different bills share the same timestamp. In the 2021 legislative session, out of 1312 bills,
+        # this only happened with 13 hearings. An agenda item ends at the next timestamp that is different
+        # from its own. If all following timestamps are the same as its own, it ends at the last one, and
+        # the last agenda item doesn't have an end time.
+        # The end times are filled in from the back, so each item only has to look at the next item with a
+        # timestamp: if that one starts at the same time, both end at the same time.
+        self._end_times: List[Optional[time]] = [None] * len(agenda_tree)
+        next_timed_index = None
+        for i in reversed(range(len(agenda_tree))):
+            start_datetime = self._start_datetimes[i]
+            if start_datetime is None:
+                continue
+
+            if next_timed_index is not None:
+                next_time = self._start_datetimes[next_timed_index].time()
+                if next_time != start_datetime.time():
+                    self._end_times[i] = next_time
+                else:
+                    # either the next different timestamp or the last timestamp
+                    next_end_time = self._end_times[next_timed_index]
+                    self._end_times[i] = (
+                        next_end_time if next_end_time is not None else next_time
+                    )
+            next_timed_index = i
+
+    def __len__(self) -> int:
+        return len(self.agenda_tree)
+
+    def index_of(self, agenda_id: str) -> Optional[int]:
+        """Get the index of the first agenda item with the agenda_id, e.g. "A242339"."""
+        return self._indices.get(agenda_id)
+
+    def start_datetime(self, index: int) -> Optional[datetime]:
+        return self._start_datetimes[index]
+
+    def end_time(self, index: int) -> Optional[time]:
+        return self._end_times[index]
+
+
+@dataclass
+class SliqPage:
+    """The data scraped from a SLIQ media page."""
+
+    # The first entry of `downloadMediaUrls`, e.g. {"Url": "...", "AudioOnly": false, ...}
+    media_info: Optional[dict]
+    # The agenda items for the video, each with an "id" and a "startTime"
+    agenda: Optional[AgendaIndex]
+
+
+def normalize_sliq_url(sliq_link: str) -> str:
+    """
+    Remove the `agendaId` from a SLIQ link.
+
+    Every bill heard in a meeting links to the same SLIQ media page, only the agendaId
+    in the query params differs between them.
+    """
+    parsed_url = urlparse(sliq_link)
+    query = [(k, v) for k, v in parse_qsl(parsed_url.query) if k != "agendaId"]
+    return urlunparse(parsed_url._replace(query=urlencode(query)))
+
+
+def parse_sliq_page(sliq_html: str, metrics: Optional[RunMetrics] = None) -> SliqPage:
+    """
+    Extract the media info and agenda tree JSON from a SLIQ page.
+
+    The time spent in the regex search, JSON decoding and agenda indexing is recorded
+    in the metrics, if given.
+    """
+    if metrics is None:
+        metrics = RunMetrics()
+
+    with metrics.span("sliq_regex"):
+        media_info_regex = DOWNLOAD_MEDIA_URLS_PATTERN.search(sliq_html)
+        agenda_tree_regex = AGENDA_TREE_PATTERN.search(sliq_html)
+
+    media_info = None
+    agenda_tree = None
+    with metrics.span("sliq_json"):
+        if media_info_regex is not None:
+            media_info = json.loads(media_info_regex.groups()[0])[0]
+        if agenda_tree_regex is not None:
+            agenda_tree = json.loads(agenda_tree_regex.groups()[0])
+
+    agenda = None
+    if agenda_tree is not None:
+        with metrics.span("index_agenda"):
+            agenda = AgendaIndex(agenda_tree)
+
+    return SliqPage(media_info, agenda)
+
+
+class SliqPageCache:
+    """
+    Fetch and parse each SLIQ media page once per gather run.
+
+    Many bills are heard in the same committee meeting and so share the same SLIQ
+    video. The pages are cached by their link without the `agendaId`. The cache is safe
+    to share between threads: if several threads ask for the same page at once, only
+    one of them fetches it and the others wait for the result.
+
+    Parameters
+    ----------
+    s: requests.Session
+        Session used to request the SLIQ pages.
+    metrics: Optional[RunMetrics]
+        Where to record the time spent fetching and parsing the pages.
+        Default: None (don't record them)
+    """
+
+    def __init__(self, s: requests.Session, metrics: Optional[RunMetrics] = None):
+        self._session = s
+        self._metrics = metrics if metrics is not None else RunMetrics()
+        self._lock = threading.Lock()
+        self._pages: Dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sliq_link: str) -> SliqPage:
+        key = normalize_sliq_url(sliq_link)
+        with self._lock:
+            page = self._pages.get(key)
+            is_owner = page is None
+            if is_owner:
+                page = self._pages[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if is_owner:
+            try:
+                logging.info(f"Getting page from: {sliq_link}...")
+                sliq_html = self._metrics.fetch(self._session, sliq_link, "fetch_sliq")
+                page.set_result(parse_sliq_page(sliq_html, self._metrics))
+            except Exception as e:
+                # Don't keep failures around so that another bill can try again.
+                with self._lock:
+                    del self._pages[key]
+                page.set_exception(e)
+
+        return page.result()
+
+    def log_stats(self):
+        logging.info(
+            f"SLIQ page cache: {self.hits} hits, {self.misses} misses, "
+            f"{len(self._pages)} pages."
+        )
@@ -0,0 +1,159 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import logging
+import random
+import threading
+import time
+import unittest
+
+from cdp_montana_legislature_backend.sliq import (
+    AgendaIndex,
+    SliqPageCache,
+    normalize_sliq_url,
+    parse_sliq_page,
+)
+
+SLIQ_HTML = """
+<script>
+    var downloadMediaUrls = [{"Url":"https://sg001-harmony.sliq.net/00309/Harmony/video.mp4","AudioOnly":false}];
+    var options = {
+        AgendaTree:[{"id":"A1","startTime":null},{"id":"A2","startTime":"2023-01-17T08:00:05.123"}],
+        Other: 1
+    };
+</script>
+"""
+
+
+def find_end_time_by_scanning(agenda_tree, agenda_index):
+    """How the scraper used to find the end time of an agenda item."""
+    start_time = datetime.strptime(
+        agenda_tree[agenda_index]["startTime"].split(".", 1)[0], "%Y-%m-%dT%H:%M:%S"
+    ).time()
+    end_time = None
+    agenda_len = len(agenda_tree)
+    for i in range(1, agenda_len + 1):
+        if agenda_len > agenda_index + i:
+            end_time = datetime.strptime(
+                agenda_tree[agenda_index + i]["startTime"].split(".", 1)[0],
+                "%Y-%m-%dT%H:%M:%S",
+            ).time()
+
+        if end_time == start_time:
+            continue
+        else:
+            break
+    return end_time
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.content = text.encode("utf-8")
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, text: str = SLIQ_HTML):
+        self.text = text
+        self.urls = []
+        self.lock = threading.Lock()
+
+    def get(self, url: str):
+        with self.lock:
+            self.urls.append(url)
+        time.sleep(0.01)
+        return FakeResponse(self.text)
+
+
+class SliqTestCase(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+    def test_normalize_sliq_url_removes_agenda_id(self):
+        self.assertEqual(
+            "https://sg001-harmony.sliq.net/00309/Harmony/en/PowerBrowser/PowerBrowserV2/20230117/-1/47163",
+            normalize_sliq_url(
+                "https://sg001-harmony.sliq.net/00309/Harmony/en/PowerBrowser/PowerBrowserV2/20230117/-1/47163?agendaId=242339"
+            ),
+        )
+
+    def test_normalize_sliq_url_keeps_other_query_params(self):
+        self.assertEqual(
+            "https://sg001-harmony.sliq.net/00309/Harmony?viewMode=2",
+            normalize_sliq_url(
+                "https://sg001-harmony.sliq.net/00309/Harmony?agendaId=1&viewMode=2"
+            ),
+        )
+
+    def test_parse_sliq_page(self):
+        page = parse_sliq_page(SLIQ_HTML)
+        self.assertFalse(page.media_info["AudioOnly"])
+        self.assertEqual(1, page.agenda.index_of("A2"))
+
+    def test_parse_sliq_page_without_media(self):
+        page = parse_sliq_page("<html></html>")
+        self.assertIsNone(page.media_info)
+        self.assertIsNone(page.agenda)
+
+    def test_cache_fetches_each_video_once(self):
+        s = FakeSession()
+        cache = SliqPageCache(s)
+        cache.get("https://sg001-harmony.sliq.net/00309/Harmony/1?agendaId=1")
+        cache.get("https://sg001-harmony.sliq.net/00309/Harmony/1?agendaId=2")
+        cache.get("https://sg001-harmony.sliq.net/00309/Harmony/2?agendaId=3")
+        self.assertEqual(2, len(s.urls))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, cache.misses)
+
+    def test_cache_fetches_once_when_shared_between_threads(self):
+        s = FakeSession()
+        cache = SliqPageCache(s)
+        links = [
+            f"https://sg001-harmony.sliq.net/00309/Harmony/1?agendaId={i}"
+            for i in range(16)
+        ]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            pages = list(executor.map(cache.get, links))
+        self.assertEqual(1, len(s.urls))
+        self.assertTrue(all(page is pages[0] for page in pages))
+
+    def test_agenda_index_looks_up_items(self):
+        agenda = AgendaIndex(
+            [
+                {"id": "A1", "startTime": None},
+                {"id": "A2", "startTime": "2023-01-17T08:00:05.123"},
+                {"id": "A3", "startTime": "2023-01-17T08:10:00"},
+            ]
+        )
+        self.assertEqual(2, agenda.index_of("A3"))
+        self.assertIsNone(agenda.index_of("A4"))
+        self.assertEqual(datetime(2023, 1, 17, 8, 0, 5).time(), agenda.first_start_time)
+        self.assertIsNone(agenda.start_datetime(0))
+        self.assertEqual(datetime(2023, 1, 17, 8, 10), agenda.start_datetime(2))
+        self.assertEqual(datetime(2023, 1, 17, 8, 10).time(), agenda.end_time(1))
+        self.assertIsNone(agenda.end_time(2))
+
+    def test_agenda_index_end_times_match_scanning(self):
+        random.seed(0)
+        start = datetime(2023, 1, 17, 8, 0)
+        for _ in range(200):
+            # few distinct timestamps so that many items share the same one
+            minutes = sorted(
+                random.choice(range(5)) for _ in range(random.randint(1, 8))
+            )
+            agenda_tree = [
+                {
+                    "id": f"A{i}",
+                    "startTime": (start + timedelta(minutes=m)).isoformat() + ".500",
+                }
+                for i, m in enumerate(minutes)
+            ]
+            agenda = AgendaIndex(agenda_tree)
+            for i in range(len(agenda_tree)):
+                self.assertEqual(
+                    find_end_time_by_scanning(agenda_tree, i),
+                    agenda.end_time(i),
+                    agenda_tree,
+                )
@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Publish the event_id to external_source_id mapping as a precomputed snapshot.
+
+The snapshot is the JSON array served by the get_event_source_ids Cloud Function
+(api/main.py), gzip compressed, so the function can serve it without reading every
+event from Firestore. Each snapshot is stored under a versioned name, and a small
+manifest points to the latest one:
+
+    event-source-ids/v1/manifest.json
+    event-source-ids/v1/20230117T080005Z-1f2e3d4c.json.gz
+
+Run it after the event gather pipeline (from the python/ directory):
+
+    python -m cdp_montana_legislature_backend.snapshot event-gather-config.json
+"""
+
+from abc import ABC, abstractmethod
+import argparse
+from datetime import datetime, timezone
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+from typing import Iterable, List, Optional, Tuple
+
+from cdp_backend.database import models as db_models
+from google.cloud.firestore import Client
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PREFIX = f"event-source-ids/v{SNAPSHOT_VERSION}"
+MANIFEST_NAME = f"{SNAPSHOT_PREFIX}/manifest.json"
+# Public GCS objects are served with max-age=3600 by default, a cached manifest could
+# point to a deleted snapshot for an hour, while a snapshot never changes once written
+MANIFEST_CACHE_CONTROL = "no-cache"
+SNAPSHOT_CACHE_CONTROL = "public, max-age=86400, immutable"
+# The latest snapshot and the two before it are kept, see prune_snapshots
+KEEP_SNAPSHOTS = 3
+
+
+class SnapshotStorage(ABC):
+    """Where the snapshots are stored, names are "/" separated paths."""
+
+    @abstractmethod
+    def write(
+        self,
+        name: str,
+        data: bytes,
+        content_type: str,
+        cache_control: Optional[str] = None,
+    ):
+        """Write a file, with the Cache-Control it is served with, if any."""
+
+    @abstractmethod
+    def read(self, name: str) -> Optional[bytes]:
+        """Read a stored file, or None if it doesn't exist."""
+
+    @abstractmethod
+    def list(self, prefix: str) -> List[str]:
+        """List the names of the stored files in a directory, e.g. SNAPSHOT_PREFIX."""
+
+    @abstractmethod
+    def delete(self, name: str):
+        """Delete a stored file, if it exists."""
+
+
+class LocalSnapshotStorage(SnapshotStorage):
+    """
+    Store the snapshots in a local directory.
+
+    Parameters
+    ----------
+    root_dir: str
+        The directory the snapshot names are relative to.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root_dir, *name.split("/"))
+
+    def write(
+        self,
+        name: str,
+        data: bytes,
+        content_type: str,
+        cache_control: Optional[str] = None,
+    ):
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Readers never see a partially written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as open_resource:
+            open_resource.write(data)
+        os.replace(tmp_path, path)
+
+    def read(self, name: str) -> Optional[bytes]:
+        try:
+            with open(self._path(name), "rb") as open_resource:
+                return open_resource.read()
+        except FileNotFoundError:
+            return None
+
+    def list(self, prefix: str) -> List[str]:
+        try:
+            file_names = os.listdir(self._path(prefix))
+        except FileNotFoundError:
+            return []
+        return [
+            f"{prefix}/{file_name}"
+            for file_name in file_names
+            if not file_name.endswith(".tmp")
+        ]
+
+    def delete(self, name: str):
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+
+class GCSSnapshotStorage(SnapshotStorage):
+    """
+    Store the snapshots in a Google Cloud Storage bucket, e.g. the CDP instance bucket.
+
+    Parameters
+    ----------
+    bucket: str
+        The name of the bucket.
+    credentials_file: str
+        The path to the Google Service Account credentials JSON file.
+    """
+
+    def __init__(self, bucket: str, credentials_file: str):
+        # gcsfs is installed with cdp-backend[pipeline], only the pipeline needs it
+        from gcsfs import GCSFileSystem
+
+        self.bucket = bucket
+        self._fs = GCSFileSystem(token=str(credentials_file))
+
+    def write(
+        self,
+        name: str,
+        data: bytes,
+        content_type: str,
+        cache_control: Optional[str] = None,
+    ):
+        self._fs.pipe_file(
+            f"{self.bucket}/{name}",
+            data,
+            content_type=content_type,
+            fixed_key_metadata=(
+                {"cache_control": cache_control} if cache_control is not None else None
+            ),
+        )
+
+    def read(self, name: str) -> Optional[bytes]:
+        try:
+            return self._fs.cat_file(f"{self.bucket}/{name}")
+        except FileNotFoundError:
+            return None
+
+    def list(self, prefix: str) -> List[str]:
+        try:
+            paths = self._fs.ls(f"{self.bucket}/{prefix}", refresh=True)
+        except FileNotFoundError:
+            return []
+        return [path[len(self.bucket) + 1 :] for path in paths]
+
+    def delete(self, name: str):
+        try:
+            self._fs.rm_file(f"{self.bucket}/{name}")
+        except FileNotFoundError:
+            pass
+
+
+def get_snapshot_name(created: datetime, etag: str) -> str:
+    # The ETag tells apart the snapshots published in the same second by the pipelines
+    return f"{SNAPSHOT_PREFIX}/{created.strftime('%Y%m%dT%H%M%SZ')}-{etag[:8]}.json.gz"
+
+
+def write_snapshot(
+    storage: SnapshotStorage,
+    events: Iterable[Tuple[str, Optional[str]]],
+    created: Optional[datetime] = None,
+) -> dict:
+    """
+    Write a snapshot of the events and point the manifest to it.
+
+    The manifest isn't switched to the new snapshot if a newer one was published in the
+    meantime, e.g. by another event gather pipeline. The previous snapshots are kept for
+    the readers of a manifest that is about to be replaced, see prune_snapshots.
+
+    Parameters
+    ----------
+    storage: SnapshotStorage
+        Where to write the snapshot.
+    events: Iterable[Tuple[str, Optional[str]]]
+        The (event_id, external_source_id) of every event.
+    created: Optional[datetime]
+        The time of the snapshot.
+        Default: None (now)
+
+    Returns
+    -------
+    manifest: dict
+        The manifest of the new snapshot, with the version, creation time, name, number
+        of events and ETag (the sha1 of the uncompressed JSON) of the snapshot.
+    """
+    created = created or datetime.now(timezone.utc)
+    events_with_source_id = [
+        {"event_id": event_id, "external_source_id": external_source_id}
+        for event_id, external_source_id in events
+    ]
+    body = json.dumps(events_with_source_id).encode("utf-8")
+    etag = hashlib.sha1(body).hexdigest()
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "created": created.isoformat(),
+        "name": get_snapshot_name(created, etag),
+        "events": len(events_with_source_id),
+        "etag": etag,
+    }
+
+    # mtime=0 so the same events always compress to the same bytes
+    storage.write(
+        manifest["name"],
+        gzip.compress(body, mtime=0),
+        content_type="application/gzip",
+        cache_control=SNAPSHOT_CACHE_CONTROL,
+    )
+    # The manifest is only switched to the new snapshot once it is fully written
+    previous_manifest = read_manifest(storage)
+    if previous_manifest is not None and datetime.fromisoformat(
+        previous_manifest["created"]
+    ) > datetime.fromisoformat(manifest["created"]):
+        logging.info(
+            f"Snapshot {previous_manifest['name']} is newer, the manifest isn't switched to {manifest['name']}."
+        )
+    else:
+        storage.write(
+            MANIFEST_NAME,
+            json.dumps(manifest).encode("utf-8"),
+            content_type="application/json",
+            cache_control=MANIFEST_CACHE_CONTROL,
+        )
+        logging.info(
+            f"Wrote snapshot {manifest['name']} with {manifest['events']} events."
+        )
+
+    prune_snapshots(storage)
+    return manifest
+
+
+def prune_snapshots(storage: SnapshotStorage, keep: int = KEEP_SNAPSHOTS):
+    """
+    Delete all but the latest snapshots and the one the manifest points to.
+
+    A reader that got the previous manifest a moment before it was replaced can still
+    read its snapshot, and the snapshots of the pipelines that published at the same
+    time as a newer one are deleted by the next publish.
+    """
+    manifest = read_manifest(storage)
+    # The names start with the creation time, so they sort from oldest to latest
+    names = sorted(
+        name for name in storage.list(SNAPSHOT_PREFIX) if name.endswith(".json.gz")
+    )
+    keep_names = set(names[-keep:])
+    if manifest is not None:
+        keep_names.add(manifest["name"])
+
+    for name in names:
+        if name not in keep_names:
+            logging.info(f"Deleting snapshot {name}.")
+            storage.delete(name)
+
+
+def read_manifest(storage: SnapshotStorage) -> Optional[dict]:
+    """Read the manifest of the latest snapshot, or None if there is none yet."""
+    data = storage.read(MANIFEST_NAME)
+    if data is None:
+        return None
+
+    manifest = json.loads(data)
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        logging.warning(f"Ignoring snapshot with version {manifest.get('version')}.")
+        return None
+
+    return manifest
+
+
+def read_snapshot(storage: SnapshotStorage) -> Optional[List[dict]]:
+    """Read the events of the latest snapshot, or None if there is none yet."""
+    manifest = read_manifest(storage)
+    if manifest is None:
+        return None
+
+    data = storage.read(manifest["name"])
+    if data is None:
+        return None
+
+    return json.loads(gzip.decompress(data))
+
+
+def get_all_event_source_ids(
+    credentials_file: str,
+) -> List[Tuple[str, Optional[str]]]:
+    """Read the (event_id, external_source_id) of every event from Firestore."""
+    client = Client.from_service_account_json(credentials_file)
+    # Only read the one field needed instead of loading full Event models
+    query = client.collection(db_models.Event._meta.collection_name).select(
+        ["external_source_id"]
+    )
+    return [
+        (snapshot.id, snapshot.get("external_source_id")) for snapshot in query.stream()
+    ]
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        description="Publish the event id to external source id snapshot."
+    )
+    parser.add_argument(
+        "config_file",
+        help="The event gather config, for the credentials file and bucket.",
+    )
+    parser.add_argument(
+        "--local-dir",
+        help="Write the snapshot to this directory instead of the bucket.",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+
+    with open(args.config_file) as open_resource:
+        config = json.load(open_resource)
+    credentials_file = config["google_credentials_file"]
+
+    if args.local_dir is not None:
+        storage = LocalSnapshotStorage(args.local_dir)
+    else:
+        bucket = config.get("gcs_bucket_name")
+        if bucket is None:
+            # The default bucket of a CDP instance, as in the cdp-backend pipeline
+            with open(credentials_file) as open_resource:
+                bucket = f"{json.load(open_resource)['project_id']}.appspot.com"
+        storage = GCSSnapshotStorage(bucket, credentials_file)
+
+    write_snapshot(storage, get_all_event_source_ids(credentials_file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+from cdp_montana_legislature_backend.snapshot import (
+    KEEP_SNAPSHOTS,
+    MANIFEST_NAME,
+    SNAPSHOT_CACHE_CONTROL,
+    SNAPSHOT_PREFIX,
+    GCSSnapshotStorage,
+    LocalSnapshotStorage,
+    read_manifest,
+    read_snapshot,
+    write_snapshot,
+)
+
+EVENTS = [("event-1", "https://sliq/1?agendaId=1"), ("event-2", None)]
+
+
+class SnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.storage = LocalSnapshotStorage(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_no_snapshot(self):
+        self.assertIsNone(read_manifest(self.storage))
+        self.assertIsNone(read_snapshot(self.storage))
+
+    def test_snapshot_round_trips(self):
+        created = datetime(2023, 1, 17, 8, 0, 5, tzinfo=timezone.utc)
+        manifest = write_snapshot(self.storage, EVENTS, created)
+
+        self.assertEqual(manifest, read_manifest(self.storage))
+        self.assertEqual(2, manifest["events"])
+        self.assertEqual(created.isoformat(), manifest["created"])
+        self.assertEqual(
+            [
+                {
+                    "event_id": "event-1",
+                    "external_source_id": "https://sliq/1?agendaId=1",
+                },
+                {"event_id": "event-2", "external_source_id": None},
+            ],
+            read_snapshot(self.storage),
+        )
+
+    def test_snapshot_is_gzip_compressed_api_response(self):
+        manifest = write_snapshot(self.storage, EVENTS)
+
+        body = gzip.decompress(self.storage.read(manifest["name"]))
+        self.assertEqual(
+            json.dumps(
+                [
+                    {"event_id": event_id, "external_source_id": source_id}
+                    for event_id, source_id in EVENTS
+                ]
+            ).encode("utf-8"),
+            body,
+        )
+
+    def test_new_snapshot_replaces_previous_one(self):
+        manifests = [
+            write_snapshot(
+                self.storage,
+                EVENTS[: (i + 1) % 2 + 1],
+                datetime(2023, 1, i, tzinfo=timezone.utc),
+            )
+            for i in range(1, 6)
+        ]
+
+        self.assertEqual(manifests[-1], read_manifest(self.storage))
+        self.assertEqual(1, len(read_snapshot(self.storage)))
+        self.assertNotEqual(manifests[-2]["etag"], manifests[-1]["etag"])
+        # The previous snapshots are kept for the readers of the previous manifests
+        self.assertEqual(
+            [m["name"] for m in manifests[-KEEP_SNAPSHOTS:]],
+            sorted(
+                name
+                for name in self.storage.list(SNAPSHOT_PREFIX)
+                if name != MANIFEST_NAME
+            ),
+        )
+        self.assertIsNone(self.storage.read(manifests[0]["name"]))
+
+    def test_older_snapshot_doesnt_replace_newer_one(self):
+        newer = write_snapshot(
+            self.storage, EVENTS, datetime(2023, 1, 18, tzinfo=timezone.utc)
+        )
+        older = write_snapshot(
+            self.storage, EVENTS[:1], datetime(2023, 1, 17, tzinfo=timezone.utc)
+        )
+
+        self.assertEqual(newer, read_manifest(self.storage))
+        self.assertIsNotNone(self.storage.read(older["name"]))
+
+    def test_snapshots_published_in_the_same_second_are_pruned(self):
+        created = datetime(2023, 1, 17, tzinfo=timezone.utc)
+        # e.g. the four event gather pipelines publishing at once
+        racing = [
+            write_snapshot(self.storage, EVENTS[:1] * i, created) for i in range(1, 5)
+        ]
+        self.assertEqual(4, len({m["name"] for m in racing}))
+        latest = write_snapshot(
+            self.storage, EVENTS, datetime(2023, 1, 18, tzinfo=timezone.utc)
+        )
+
+        names = [
+            name for name in self.storage.list(SNAPSHOT_PREFIX) if name != MANIFEST_NAME
+        ]
+        self.assertEqual(KEEP_SNAPSHOTS, len(names))
+        self.assertIn(latest["name"], names)
+
+    def test_manifest_is_not_cached(self):
+        storage = GCSSnapshotStorage.__new__(GCSSnapshotStorage)
+        storage.bucket = "bucket"
+        storage._fs = mock.Mock()
+        storage._fs.cat_file.side_effect = FileNotFoundError()
+        storage._fs.ls.return_value = []
+        manifest = write_snapshot(storage, EVENTS)
+
+        cache_controls = {
+            call.args[0]: call.kwargs["fixed_key_metadata"]["cache_control"]
+            for call in storage._fs.pipe_file.call_args_list
+        }
+        self.assertEqual(
+            {
+                f"bucket/{MANIFEST_NAME}": "no-cache",
+                f"bucket/{manifest['name']}": SNAPSHOT_CACHE_CONTROL,
+            },
+            cache_controls,
+        )
+
+    def test_manifest_with_other_version_is_ignored(self):
+        write_snapshot(self.storage, EVENTS)
+        path = os.path.join(self.tmp_dir.name, *MANIFEST_NAME.split("/"))
+        with open(path, "w") as open_resource:
+            json.dump({"version": 0}, open_resource)
+
+        self.assertIsNone(read_manifest(self.storage))
+        self.assertIsNone(read_snapshot(self.storage))
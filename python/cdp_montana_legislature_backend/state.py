@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Set
+
+# Version 2 keys the bills by session and type and number, instead of only the latter
+STATE_VERSION = 2
+
+
+def fingerprint_rows(rows: Iterable[str]) -> str:
+    """A content fingerprint of the action rows of a bill that link to SLIQ."""
+    return hashlib.sha1("\n".join(rows).encode("utf-8")).hexdigest()
+
+
+class GatherState:
+    """
+    What the previous gather runs learned about each bill, keyed by Bill.get_key().
+
+    For every bill this keeps the fingerprint of its action rows that link to SLIQ, the
+    SLIQ links that were already turned into events, and the SLIQ links that are still
+    pending. A link is pending when its hearing was in (or after) the gather window but
+    couldn't be turned into an event yet, e.g. because the link has no `agendaId` until
+    the timestamps are added to the video.
+
+    A bill whose fingerprint didn't change and that has no pending links doesn't need
+    to be processed again. The state assumes the gather windows move forward in time,
+    hearings older than the window of the run that saw them are not retried.
+    """
+
+    def __init__(self, bills: Dict[str, dict] = None):
+        self._bills: Dict[str, dict] = bills or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> "GatherState":
+        if not os.path.isfile(path):
+            logging.info(f"No gather state at {path}, all bills will be processed.")
+            return cls()
+
+        with open(path) as open_resource:
+            state = json.load(open_resource)
+
+        if state.get("version") != STATE_VERSION:
+            logging.warning(
+                f"Ignoring gather state at {path} with version {state.get('version')}."
+            )
+            return cls()
+
+        return cls(state["bills"])
+
+    def save(self, path: str):
+        with self._lock:
+            state = {"version": STATE_VERSION, "bills": self._bills}
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as open_resource:
+                json.dump(state, open_resource, separators=(",", ":"))
+            os.replace(tmp_path, path)
+
+    def is_unchanged(self, key: str, fingerprint: str) -> bool:
+        with self._lock:
+            bill = self._bills.get(key)
+            return (
+                bill is not None
+                and bill["fingerprint"] == fingerprint
+                and not bill["pending"]
+            )
+
+    def resolved_links(self, key: str) -> Set[str]:
+        with self._lock:
+            return set(self._bills.get(key, {}).get("resolved", []))
+
+    def update(
+        self,
+        key: str,
+        fingerprint: str,
+        resolved: Iterable[str],
+        pending: Iterable[str],
+    ):
+        with self._lock:
+            previously_resolved: List[str] = self._bills.get(key, {}).get(
+                "resolved", []
+            )
+            self._bills[key] = {
+                "fingerprint": fingerprint,
+                "resolved": sorted(set(previously_resolved).union(resolved)),
+                "pending": sorted(set(pending)),
+            }
+
+    def resolve(self, key: str, resolved: Iterable[str]):
+        """
+        Mark links of a bill as turned into events, without processing the bill, e.g.
+        for the hearings answered from the catalog.
+        """
+        with self._lock:
+            bill = self._bills.setdefault(
+                key, {"fingerprint": None, "resolved": [], "pending": []}
+            )
+            bill["resolved"] = sorted(set(bill["resolved"]).union(resolved))
+            bill["pending"] = sorted(set(bill["pending"]).difference(resolved))
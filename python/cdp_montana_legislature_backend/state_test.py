@@ -0,0 +1,60 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from cdp_montana_legislature_backend.state import GatherState, fingerprint_rows
+
+
+class GatherStateTestCase(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.state_file = os.path.join(self.tmp_dir.name, "gather-state.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_fingerprint_rows_changes_with_rows(self):
+        self.assertEqual(fingerprint_rows(["a", "b"]), fingerprint_rows(["a", "b"]))
+        self.assertNotEqual(
+            fingerprint_rows(["a", "b"]), fingerprint_rows(["a", "b", "c"])
+        )
+
+    def test_missing_state_file_is_empty_state(self):
+        state = GatherState.load(self.state_file)
+        self.assertFalse(state.is_unchanged("HB 1", fingerprint_rows([])))
+
+    def test_state_round_trips_through_file(self):
+        state = GatherState()
+        state.update("HB 1", "abc", ["https://sliq/1?agendaId=1"], [])
+        state.save(self.state_file)
+
+        state = GatherState.load(self.state_file)
+        self.assertTrue(state.is_unchanged("HB 1", "abc"))
+        self.assertFalse(state.is_unchanged("HB 1", "def"))
+        self.assertEqual({"https://sliq/1?agendaId=1"}, state.resolved_links("HB 1"))
+
+    def test_bill_with_pending_links_is_not_unchanged(self):
+        state = GatherState()
+        state.update("HB 1", "abc", [], ["https://sliq/1"])
+        self.assertFalse(state.is_unchanged("HB 1", "abc"))
+
+    def test_update_keeps_previously_resolved_links(self):
+        state = GatherState()
+        state.update("HB 1", "abc", ["https://sliq/1?agendaId=1"], [])
+        state.update("HB 1", "def", ["https://sliq/2?agendaId=2"], [])
+        self.assertEqual(
+            {"https://sliq/1?agendaId=1", "https://sliq/2?agendaId=2"},
+            state.resolved_links("HB 1"),
+        )
+
+    def test_resolve_marks_links_without_processing_bill(self):
+        state = GatherState()
+        state.update("HB 1", "abc", [], ["https://sliq/1?agendaId=1"])
+        state.resolve("HB 1", ["https://sliq/1?agendaId=1"])
+        state.resolve("HB 2", ["https://sliq/2?agendaId=2"])
+
+        self.assertTrue(state.is_unchanged("HB 1", "abc"))
+        self.assertEqual({"https://sliq/2?agendaId=2"}, state.resolved_links("HB 2"))
+        self.assertFalse(state.is_unchanged("HB 2", "abc"))
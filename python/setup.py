@@ -16,7 +16,9 @@ test_requirements = [
     "black>=19.10b0",
     "flake8>=3.8.3",
     "flake8-debugger>=3.2.1",
-    "betamax==0.8.1"
+    "betamax==0.8.1",
+    # For the tests of the get_event_source_ids Cloud Function in api/
+    "functions-framework==3.*",
 ]
 
 dev_requirements = [